@@ -0,0 +1,38 @@
+# Import 'SessionManager' class from 'telegram' module (make sure `telegram.py` located in the same directory as your main script)
+from telegram import SessionManager
+import asyncio
+
+
+"""++++++++++++++++++++++++++++++++++
+  Creating sessions from async code ↓
+++++++++++++++++++++++++++++++++++"""
+# The `create_*` coroutines never prompt; pass functions that return the code and 2FA password instead.
+# Providers must not block the event loop, so read the console in a worker thread (or await your own code source).
+api_id = ...
+api_hash = "..."
+phones = ["+123...", "+456..."]
+
+console = asyncio.Lock()
+
+
+async def get_code(phone):
+    # One prompt at a time, so answers can't go to the wrong phone
+    async with console:
+        return await asyncio.to_thread(input, f"Code for {phone}: ")
+
+
+async def get_password(phone):
+    async with console:
+        return await asyncio.to_thread(input, f"2FA password for {phone}: ")
+
+
+async def main():
+    clients = await asyncio.gather(*(
+        SessionManager.create_telethon(api_id, api_hash, phone, get_code, get_password)
+        for phone in phones
+    ))
+    for client in clients:
+        await client.disconnect()
+
+
+asyncio.run(main())
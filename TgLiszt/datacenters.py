@@ -0,0 +1,16 @@
+"""
+Telegram data center addresses shared by the session tools.
+
+Pyrogram session files and strings only store the DC ID, so converting them
+to Telethon sessions, which also store the server address, needs this table.
+It only uses the standard library, so both TgLiszt and the bot can import it.
+"""
+
+# Production addresses, as used by Telethon and Pyrogram
+PRODUCTION_DC_ADDRESSES = {
+    1: '149.154.175.53',
+    2: '149.154.167.51',
+    3: '149.154.175.100',
+    4: '149.154.167.91',
+    5: '91.108.56.130',
+}
@@ -1,10 +1,19 @@
-import sqlite3, sys, re  # noqa E401
+import asyncio, base64, csv, hashlib, inspect, ipaddress, json, os, sqlite3, struct, sys, re, threading, time  # noqa E401
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from .datacenters import PRODUCTION_DC_ADDRESSES
+except ImportError:
+    from datacenters import PRODUCTION_DC_ADDRESSES
 
 try:
     from telethon import functions, errors as telethon_errors
     from telethon.sync import TelegramClient, events
-    from telethon.sessions import StringSession
-    from telethon.tl.types import Channel
+    from telethon.crypto import AuthKey
+    from telethon.sessions import SQLiteSession, StringSession
+    from telethon.tl.functions.channels import GetAdminedPublicChannelsRequest
+    from telethon.tl.types import Channel, UpdateNewMessage
 except ModuleNotFoundError:
     print(
         "\n―― ⚠️ The Telethon library is not installed."
@@ -78,18 +87,20 @@ def _show_user_info(client) -> None:
         sys.exit(1)
 
 
+def _channel_kind(channel) -> str:
+    return f"{'public' if channel.username else 'private'}_{'group' if channel.megagroup else 'channel'}"
+
+
 def _show_user_channels(client) -> None:
-    public_group = 0
-    private_group = 0
-    public_channel = 0
-    private_channel = 0
+    counts = Counter()
 
     try:
-        dialogs = client.get_dialogs()
-        created_channels = [dialog for dialog in dialogs if isinstance(dialog.entity, Channel) and dialog.entity.creator]
+        # Stream the dialogs page by page instead of loading them all first
+        for dialog in client.iter_dialogs():
+            e = dialog.entity
+            if not isinstance(e, Channel) or not e.creator:
+                continue
 
-        for channel in created_channels:
-            e = channel.entity
             print(
                 f"ID: {e.id}\n"
                 f"Title: {e.title}\n"
@@ -97,23 +108,13 @@ def _show_user_channels(client) -> None:
                 f"Creation Date: {e.date.strftime('%Y-%m-%d')}\n"
                 f"Link: {f'https://www.t.me/{e.username}' if e.username else '-'}\n"
             )
-
-            if e.username:
-                if e.megagroup:
-                    public_group += 1
-                else:
-                    public_channel += 1
-            else:
-                if e.megagroup:
-                    private_group += 1
-                else:
-                    private_channel += 1
+            counts[_channel_kind(e)] += 1
 
         print(
-            f"Public Groups: {public_group}\n"
-            f"Private Groups: {private_group}\n"
-            f"Public Channels: {public_channel}\n"
-            f"Private Channels: {private_channel}\n"
+            f"Public Groups: {counts['public_group']}\n"
+            f"Private Groups: {counts['private_group']}\n"
+            f"Public Channels: {counts['public_channel']}\n"
+            f"Private Channels: {counts['private_channel']}\n"
         )
     except telethon_errors.RPCError as e:
         print(f"―― ❌ An error occurred: {e}")
@@ -152,6 +153,55 @@ def _update_password(client) -> None:
         sys.exit(1)
 
 
+class TgLisztError(Exception):
+    """Base class of the errors raised by the async API."""
+
+
+class SessionFileError(TgLisztError):
+    """The session file could not be opened, because it belongs to another library or is corrupted."""
+
+    def __init__(self, library: str):
+        super().__init__(
+            "The provided session file could not be opened. "
+            "This issue may occur if the session file was created using a different library or is corrupted. "
+            f"Please ensure that the session file is compatible with {library}."
+        )
+
+
+class AuthorizationError(TgLisztError):
+    """The session has been revoked or the account could not be signed in."""
+
+
+class PasswordRequiredError(AuthorizationError):
+    """The account has 2-Step Verification enabled and no password provider was given."""
+
+
+async def _provide(provider, *args):
+    # Providers may be plain functions or coroutine functions
+    value = provider(*args)
+    return await value if inspect.isawaitable(value) else value
+
+
+def _prompt_code(phone: str) -> str:
+    return input("Enter the code sent to your phone: ")
+
+
+def _prompt_password(phone: str) -> str:
+    return input("Enter 2-Step Verification (2FA) password: ")
+
+
+_loop = None
+
+
+def _run(coroutine):
+    # One loop for every command, set as the current loop so returned clients stay usable through telethon.sync
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coroutine)
+
+
 class SessionManager:
     """
     Create Telegram sessions using Telethon or Pyrogram.
@@ -159,6 +209,96 @@ class SessionManager:
     `[YouTube] How to Create Telegram Sessions <https://www.youtube.com/watch?v=-2vWERIXXZU>`_
     """
 
+    @staticmethod
+    async def create_telethon(api_id: int, api_hash: str, phone: str, code_provider,
+                              password_provider=None, session=None, code_attempts: int = 1) -> TelegramClient:
+        """
+        Authorize a Telethon session without prompting and return the connected client.
+
+        Providers are called with the phone number and may be coroutine functions, so many phones
+        can be signed in concurrently from one event loop.
+
+        :param api_id: Telegram API ID.
+        :param api_hash: Telegram API hash.
+        :param phone: Phone number in international format, or an existing Telethon session file name.
+        :param code_provider: Returns the login code sent to the phone.
+        :param password_provider: Returns the 2FA password, only called when the account has one.
+        :param session: Session file name or Telethon session object, defaults to `<phone>.session`.
+        :param code_attempts: Times the code provider is asked again after Telegram rejects a code as invalid.
+        :raises SessionFileError: The session file is not a Telethon session.
+        :raises PasswordRequiredError: 2FA is enabled and no password provider was given.
+        :raises telethon.errors.RPCError: Telegram rejected the phone, code or password.
+        """
+        try:
+            client = TelegramClient(session or f'{phone}.session', int(api_id), api_hash)
+        except sqlite3.OperationalError as e:
+            raise SessionFileError("Telethon") from e
+
+        try:
+            await client.connect()
+            if not await client.is_user_authorized():
+                await client.send_code_request(phone)
+                try:
+                    for attempt in range(1, code_attempts + 1):
+                        try:
+                            await client.sign_in(phone, await _provide(code_provider, phone))
+                            break
+                        except telethon_errors.PhoneCodeInvalidError:
+                            if attempt == code_attempts:
+                                raise
+                except telethon_errors.SessionPasswordNeededError:
+                    if password_provider is None:
+                        raise PasswordRequiredError(f"{phone} has 2-Step Verification enabled.")
+                    await client.sign_in(password=await _provide(password_provider, phone))
+        except BaseException:
+            await client.disconnect()
+            raise
+
+        return client
+
+    @staticmethod
+    async def create_pyrogram(api_id: int, api_hash: str, phone: str, code_provider,
+                              password_provider=None, session_name: str = None) -> str:
+        """
+        Authorize a Pyrogram session without prompting and return its string session.
+
+        :param api_id: Telegram API ID.
+        :param api_hash: Telegram API hash.
+        :param phone: Phone number in international format, or an existing Pyrogram session file name.
+        :param code_provider: Returns the login code sent to the phone.
+        :param password_provider: Returns the 2FA password, only called when the account has one.
+        :param session_name: Session file name, defaults to the phone number.
+        :raises SessionFileError: The session file is not a Pyrogram session.
+        :raises PasswordRequiredError: 2FA is enabled and no password provider was given.
+        :raises AuthorizationError: The phone number is not registered.
+        :raises pyrogram.errors.RPCError: Telegram rejected the phone, code or password.
+        """
+        try:
+            from pyrogram import Client, errors as pyrogram_errors
+            from pyrogram.types import User
+        except ModuleNotFoundError as e:
+            raise TgLisztError("The Pyrogram library is not installed. Install it with `pip install pyrogram`") from e
+
+        client = Client(session_name or phone, int(api_id), api_hash, phone_number=phone)
+        try:
+            if not await client.connect():
+                sent_code = await client.send_code(phone)
+                try:
+                    signed_in = await client.sign_in(
+                        phone, sent_code.phone_code_hash, await _provide(code_provider, phone))
+                except pyrogram_errors.SessionPasswordNeeded:
+                    if password_provider is None:
+                        raise PasswordRequiredError(f"{phone} has 2-Step Verification enabled.")
+                    signed_in = await client.check_password(await _provide(password_provider, phone))
+                if not isinstance(signed_in, User):
+                    raise AuthorizationError(f"{phone} is not registered on Telegram.")
+            return await client.export_session_string()
+        except sqlite3.OperationalError as e:
+            raise SessionFileError("Pyrogram") from e
+        finally:
+            if client.is_connected:
+                await client.disconnect()
+
     @staticmethod
     def telethon(api_id: int = None, api_hash: str = None, phone: str = None) -> None:
         """
@@ -175,25 +315,16 @@ class SessionManager:
 
         _show_warning()
 
-        user_api_id = api_id or int(input("Enter your API ID: "))
+        user_api_id = int(api_id or input("Enter your API ID: "))
         user_api_hash = api_hash or input("Enter your API HASH: ")
         user_phone = phone or input("Enter your phone number (e.g. +1234567890): ")
 
         try:
-            client = TelegramClient(f'{user_phone}.session', user_api_id, user_api_hash)
-            client.connect()
-            if not client.is_user_authorized():
-                client.send_code_request(user_phone)
-                try:
-                    client.sign_in(user_phone, input("Enter the code sent to your phone: "))
-                except telethon_errors.SessionPasswordNeededError:
-                    client.sign_in(password=input("Enter 2-Step Verification (2FA) password: "))
-        except sqlite3.OperationalError:
-            print(
-                "\n―― ❌ The provided session file could not be opened. "
-                "This issue may occur if the session file was created using a different library or is corrupted. "
-                "Please ensure that the session file is compatible with Telethon."
-            )
+            client = _run(SessionManager.create_telethon(
+                user_api_id, user_api_hash, user_phone, _prompt_code, _prompt_password
+            ))
+        except TgLisztError as e:
+            print(f"\n―― ❌ {e}")
             sys.exit(1)
         except telethon_errors.RPCError as e:
             print(f"\n―― ❌ An RPC error occurred: {e}")
@@ -223,7 +354,7 @@ class SessionManager:
                enter your pyrogram session file name instead.
         """
         try:
-            from pyrogram import Client, filters, errors as pyrogram_errors
+            from pyrogram import errors as pyrogram_errors
         except ModuleNotFoundError:
             print("\n―― ⚠️ The Pyrogram library is not installed.")
             print("―― Please install it by running: `pip install pyrogram`")
@@ -231,19 +362,16 @@ class SessionManager:
 
         _show_warning()
 
-        user_api_id = api_id or int(input("Enter your API ID: "))
+        user_api_id = int(api_id or input("Enter your API ID: "))
         user_api_hash = api_hash or input("Enter your API HASH: ")
         user_phone = phone or input("Enter your phone number (e.g. +1234567890): ")
 
         try:
-            client = Client(user_phone, user_api_id, user_api_hash, phone_number=user_phone)
-            client.start()
-        except sqlite3.OperationalError:
-            print(
-                "\n―― ❌ The provided session file could not be opened. "
-                "This issue may occur if the session file was created using a different library or is corrupted. "
-                "Please ensure that the session file is compatible with Pyrogram."
-            )
+            string_session = _run(SessionManager.create_pyrogram(
+                user_api_id, user_api_hash, user_phone, _prompt_code, _prompt_password
+            ))
+        except TgLisztError as e:
+            print(f"\n―― ❌ {e}")
             sys.exit(1)
         except pyrogram_errors.RPCError as e:
             print(f"\n―― ❌ An RPC error occurred: {e}")
@@ -255,11 +383,55 @@ class SessionManager:
         print(
             f"\n―― 🟢 PYROGRAM SESSION ↓"
             f"\n―― ✨ SESSION FILE saved as `{user_phone}{'.session' if not user_phone.endswith('.session') else ''}`"
-            f"\n―― ✨ STRING SESSION: {client.export_session_string()}")
+            f"\n―― ✨ STRING SESSION: {string_session}")
 
-        client.stop()
         sys.exit(0)
 
+    @staticmethod
+    def batch(csv_file: str = None, api_id: int = None, api_hash: str = None, codes_file: str = None,
+              interval: float = None, output_dir: str = None) -> None:
+        """
+        Create Telethon sessions for every phone of a CSV file without prompting for each code.
+
+        :param csv_file: CSV file with a `phone` column and optional `password`, `api_id` and `api_hash` columns.
+        :param api_id: API ID for rows without one.
+        :param api_hash: API hash for rows without one.
+        :param codes_file: File to watch for `<phone> <code>` lines, codes are read from stdin by default.
+        :param interval: Seconds between two code requests, 30 by default.
+        :param output_dir: Directory for the session files and `manifest.csv`, `sessions` by default.
+        """
+
+        _show_warning()
+
+        user_csv_file = csv_file or input("Enter the CSV file of phone numbers: ")
+        creator = BatchSessionCreator(
+            int(api_id) if api_id else None, api_hash, output_dir or 'sessions',
+            float(interval) if interval else BatchSessionCreator.INTERVAL
+        )
+
+        print(
+            f"―― ℹ️ Requesting a code every {creator.interval:g} seconds. "
+            f"Send each code as a `<phone> <code>` line {f'to `{codes_file}`' if codes_file else 'here'}.\n"
+        )
+
+        try:
+            records = _run(creator.run(user_csv_file, codes_file))
+        except KeyboardInterrupt:
+            sys.exit(1)
+        except TgLisztError as e:
+            print(f"\n―― ❌ {e}")
+            sys.exit(1)
+        except Exception as e:
+            print(f"\n―― ❌ An unexpected error occurred: {e}")
+            sys.exit(1)
+
+        created = sum(record['status'] == 'created' for record in records)
+        print(
+            f"\n―― ✨ Manifest saved to `{creator.manifest_path}`"
+            f"\n―― 🟢 {created} of {len(records)} sessions created."
+        )
+        sys.exit(0 if created == len(records) else 1)
+
 
 class Telegram:
     """
@@ -268,6 +440,43 @@ class Telegram:
     `[YouTube] Login to Telegram Using a Session File or String Session <https://www.youtube.com/watch?v=T2qQfX7kjgI>`_
     """
 
+    @staticmethod
+    async def wait_for_code(api_id: int, api_hash: str, session, on_ready=None, timeout: float = None) -> str:
+        """
+        Wait for the next login code Telegram (777000) sends to an authorized Telethon session.
+
+        :param api_id: Telegram API ID.
+        :param api_hash: Telegram API hash.
+        :param session: Telethon session file name or session object.
+        :param on_ready: Called once the session is authorized and listening, may be a coroutine function.
+        :param timeout: Seconds to wait before `asyncio.TimeoutError` is raised, waits forever by default.
+        :raises SessionFileError: The session file is not a Telethon session.
+        :raises AuthorizationError: The session has been revoked or is invalid.
+        """
+        try:
+            client = TelegramClient(session, int(api_id), api_hash)
+        except sqlite3.OperationalError as e:
+            raise SessionFileError("Telethon") from e
+
+        code = asyncio.get_running_loop().create_future()
+
+        async def get_otp_msg(event):
+            otp = OtpListener.CODE_PATTERN.search(event.raw_text)
+            if otp and not code.done():
+                code.set_result(otp.group(0))
+
+        try:
+            await client.connect()
+            if not await client.is_user_authorized():
+                raise AuthorizationError("The session has been revoked or is invalid.")
+
+            client.add_event_handler(get_otp_msg, events.NewMessage(from_users=777000))
+            if on_ready:
+                await _provide(on_ready)
+            return await asyncio.wait_for(code, timeout)
+        finally:
+            await client.disconnect()
+
     @staticmethod
     def login(api_id: int = None, api_hash: str = None, session_name: str = None) -> None:
         """
@@ -281,38 +490,23 @@ class Telegram:
             "please switch to Telethon for this function to work properly."
         )
 
-        user_api_id = api_id or int(input("Enter your API ID: "))
+        user_api_id = int(api_id or input("Enter your API ID: "))
         user_api_hash = api_hash or input("Enter your API HASH: ")
         user_session_name = session_name or input("Enter your Telethon session file name: ")
 
+        def on_ready():
+            print("\n―― 🟢 User Authorized!"
+                  "\n―― Please request an OTP code in your Telegram app."
+                  "\n―― 📲 𝙻𝚒𝚜𝚝𝚎𝚗𝚒𝚗𝚐 𝚏𝚘𝚛 𝚒𝚗𝚌𝚘𝚖𝚒𝚗𝚐 𝙾𝚃𝙿 . . .")
+
         try:
-            client = TelegramClient(user_session_name, user_api_id, user_api_hash)
-            client.connect()
-            if client.is_user_authorized():
-                print("\n―― 🟢 User Authorized!")
-
-                @client.on(events.NewMessage(from_users=777000))
-                async def get_otp_msg(event):
-                    otp = re.search(r'\b(\d{5})\b', event.raw_text)
-                    if otp:
-                        print("\n―― OTP received ✅\n―― Your login code:", otp.group(0))
-                        client.disconnect()
-                        sys.exit(0)
-
-                print("\n―― Please request an OTP code in your Telegram app."
-                      "\n―― 📲 𝙻𝚒𝚜𝚝𝚎𝚗𝚒𝚗𝚐 𝚏𝚘𝚛 𝚒𝚗𝚌𝚘𝚖𝚒𝚗𝚐 𝙾𝚃𝙿 . . .")
-                with client:
-                    client.run_until_disconnected()
-            else:
-                print("\n―― 🔴 Authorization Failed!"
-                      "\n―― The session has been revoked or is invalid.")
-                sys.exit(1)
-        except sqlite3.OperationalError:
-            print(
-                "\n―― ❌ The provided session file could not be opened. "
-                "This issue may occur if the session file was created using a different library or is corrupted. "
-                "Please ensure that the session file is compatible with Telethon."
-            )
+            otp = _run(Telegram.wait_for_code(user_api_id, user_api_hash, user_session_name, on_ready))
+        except AuthorizationError:
+            print("\n―― 🔴 Authorization Failed!"
+                  "\n―― The session has been revoked or is invalid.")
+            sys.exit(1)
+        except TgLisztError as e:
+            print(f"\n―― ❌ {e}")
             sys.exit(1)
         except telethon_errors.RPCError as e:
             print(f"\n―― ❌ An RPC error occurred: {e}")
@@ -321,19 +515,959 @@ class Telegram:
             print(f"\n―― ❌ An unexpected error occurred: {e}")
             sys.exit(1)
 
+        print("\n―― OTP received ✅\n―― Your login code:", otp)
+        sys.exit(0)
+
+    @staticmethod
+    def listen_all(directory: str = None, api_id: int = None, api_hash: str = None, output_file: str = None) -> None:
+        """
+        Listen for login codes on every session file of a directory.
+
+        :param directory: Directory of Telethon or Pyrogram `.session` files.
+        :param api_id: API ID for sessions without a JSON file next to them.
+        :param api_hash: API hash for sessions without a JSON file next to them.
+        :param output_file: Optional JSON-lines file every code is appended to.
+        """
+        user_directory = directory or input("Enter the directory of your session files: ")
+        listener = OtpListener(int(api_id) if api_id else None, api_hash, output_file)
+
+        try:
+            asyncio.run(listener.run(user_directory))
+        except KeyboardInterrupt:
+            sys.exit(0)
+        except Exception as e:
+            print(f"\n―― ❌ An unexpected error occurred: {e}")
+            sys.exit(1)
+
+    @staticmethod
+    def channel_inventory(directory: str = None, output_file: str = None, api_id: int = None, api_hash: str = None,
+                          public_only: str = None) -> None:
+        """
+        Write the channels and groups created by every account of a directory to a CSV file.
+
+        :param directory: Directory of Telethon or Pyrogram `.session` files.
+        :param output_file: CSV file to write, defaults to `channels.csv`.
+        :param api_id: API ID for sessions without a JSON file next to them.
+        :param api_hash: API hash for sessions without a JSON file next to them.
+        :param public_only: Pass `public` to only list public channels with one request per account.
+        """
+        user_directory = directory or input("Enter the directory of your session files: ")
+        user_output_file = output_file or 'channels.csv'
+        inventory = ChannelInventory(int(api_id) if api_id else None, api_hash, public_only=public_only == 'public')
+
+        try:
+            counts = asyncio.run(inventory.run(user_directory, user_output_file))
+        except Exception as e:
+            print(f"\n―― ❌ An unexpected error occurred: {e}")
+            sys.exit(1)
+
+        print(
+            f"\n―― ✨ Channels saved to `{user_output_file}`\n"
+            f"Public Groups: {counts['public_group']}\n"
+            f"Private Groups: {counts['private_group']}\n"
+            f"Public Channels: {counts['public_channel']}\n"
+            f"Private Channels: {counts['private_channel']}\n"
+            f"Failed Sessions: {counts['failed_sessions']}\n"
+        )
+
+
+def _session_credentials(path: str, api_id: int = None, api_hash: str = None) -> tuple:
+    side_file = os.path.splitext(path)[0] + '.json'
+    if os.path.exists(side_file):
+        with open(side_file, 'r', encoding='utf-8') as file:
+            side = json.load(file)
+        api_id = side.get('api_id') or side.get('app_id') or api_id
+        api_hash = side.get('api_hash') or side.get('app_hash') or api_hash
+    if not api_id or not api_hash:
+        raise ValueError("No API ID/API hash; pass them or put them in a JSON file next to the session")
+    return int(api_id), api_hash
+
+
+async def _open_session_file(path: str, api_id: int = None, api_hash: str = None,
+                             client_class=TelegramClient, **client_kwargs):
+    """
+    Connect a Telethon or Pyrogram session file as an in-memory Telethon client.
+
+    The file is converted offline to a string session, so it is never locked or written to.
+    API credentials come from a JSON file next to the session, or the given defaults.
+
+    :raises ValueError: If the session cannot be used or is no longer authorized.
+    """
+    string_session = SessionConverter.write(SessionConverter.read(path), 'telethon-string')
+    client = client_class(StringSession(string_session), *_session_credentials(path, api_id, api_hash), **client_kwargs)
+
+    await client.connect()
+    if not await client.is_user_authorized():
+        await client.disconnect()
+        raise ValueError("The session has been revoked or is invalid")
+    return client
+
+
+class _OtpClient(TelegramClient):
+    """
+    Client that only dispatches new messages from Telegram's service account (777000).
+
+    Every other update still goes through Telethon's update state tracking, so no gaps are
+    created, but it is dropped before events are built for it.
+    """
+
+    SERVICE_USER_ID = 777000
+
+    async def _dispatch_update(self, update):
+        if not isinstance(update, UpdateNewMessage) or update.message.out:
+            return
+        if getattr(update.message.peer_id, 'user_id', None) != self.SERVICE_USER_ID:
+            return
+        await super()._dispatch_update(update)
+
+
+class OtpListener:
+    """
+    Listen for login codes on many sessions in one asyncio process.
+
+    Sessions are loaded into memory as string sessions, so session files are never locked or
+    written to. The entity cache of each client is kept small and only 777000 messages are
+    dispatched, which keeps memory flat however long the listener runs.
+    """
+
+    CODE_PATTERN = re.compile(r'\b(\d{5})\b')
+
+    def __init__(self, api_id: int = None, api_hash: str = None, output_file: str = None, concurrency: int = 20):
+        """
+        :param api_id: API ID for sessions without a JSON file next to them.
+        :param api_hash: API hash for sessions without a JSON file next to them.
+        :param output_file: Optional JSON-lines file every code is appended to.
+        :param concurrency: Number of sessions connecting at the same time.
+        """
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.output_file = output_file
+        self._connect_limit = asyncio.Semaphore(concurrency)
+        self.clients = {}
+
+    async def add_session(self, path: str) -> str:
+        """
+        Connect a session file and start listening on it.
+
+        :param path: Path of a Telethon or Pyrogram session file.
+        :return: The label codes from this account are tagged with.
+        :raises ValueError: If the session cannot be used.
+        """
+        async with self._connect_limit:
+            client = await _open_session_file(
+                path, self.api_id, self.api_hash, client_class=_OtpClient, entity_cache_limit=100
+            )
+            me = await client.get_me()
+
+        label = f"{os.path.basename(path)} (+{me.phone})" if me.phone else os.path.basename(path)
+
+        @client.on(events.NewMessage(incoming=True))
+        async def on_service_message(event):
+            otp = self.CODE_PATTERN.search(event.raw_text)
+            if otp:
+                self.on_code(label, otp.group(0))
+
+        self.clients[label] = client
+        return label
+
+    def on_code(self, label: str, code: str) -> None:
+        """
+        Handle a received code. Prints it and appends it to the output file, if any.
+
+        :param label: Account the code was sent to.
+        :param code: The login code.
+        """
+        print(f"\n―― OTP received ✅ [{label}] Your login code: {code}")
+        if self.output_file:
+            with open(self.output_file, 'a', encoding='utf-8') as file:
+                file.write(json.dumps({'account': label, 'code': code, 'received_at': int(time.time())}) + '\n')
+
+    async def run(self, directory: str) -> None:
+        """
+        Listen on every session file of a directory until all clients disconnect.
+
+        :param directory: Directory of `.session` files.
+        """
+        paths = sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.session'))
+
+        async def add(path):
+            try:
+                print(f"―― 🟢 Listening on {await self.add_session(path)}")
+            except Exception as e:
+                print(f"―― 🔴 {os.path.basename(path)}: {e}")
+
+        await asyncio.gather(*(add(path) for path in paths))
+        if not self.clients:
+            raise ValueError("No usable sessions found")
+
+        print(f"\n―― Please request OTP codes in your Telegram apps."
+              f"\n―― 📲 𝙻𝚒𝚜𝚝𝚎𝚗𝚒𝚗𝚐 𝚏𝚘𝚛 𝚒𝚗𝚌𝚘𝚖𝚒𝚗𝚐 𝙾𝚃𝙿 on {len(self.clients)} sessions . . .")
+        try:
+            await asyncio.gather(*(client.disconnected for client in self.clients.values()))
+        finally:
+            for client in self.clients.values():
+                await client.disconnect()
+
+
+class ChannelInventory:
+    """
+    List the channels and groups created by the accounts of many session files.
+
+    Dialogs are streamed with `iter_dialogs` and each row is written to the CSV as soon as it is
+    found. With `public_only`, the much lighter `GetAdminedPublicChannelsRequest` is used instead,
+    which only returns public channels and groups the account owns.
+    """
+
+    FIELDS = ['session', 'channel_id', 'title', 'username', 'megagroup', 'created']
+
+    def __init__(self, api_id: int = None, api_hash: str = None, concurrency: int = 10, public_only: bool = False):
+        """
+        :param api_id: API ID for sessions without a JSON file next to them.
+        :param api_hash: API hash for sessions without a JSON file next to them.
+        :param concurrency: Number of sessions scanned at the same time.
+        :param public_only: Only list public channels and groups, with a single request per account.
+        """
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.public_only = public_only
+        self._limit = asyncio.Semaphore(concurrency)
+        self.counts = Counter()
+
+    async def _created_channels(self, client):
+        if self.public_only:
+            result = await client(GetAdminedPublicChannelsRequest())
+            for chat in result.chats:
+                if isinstance(chat, Channel) and chat.creator:
+                    yield chat
+            return
+
+        async for dialog in client.iter_dialogs(ignore_migrated=True):
+            if isinstance(dialog.entity, Channel) and dialog.entity.creator:
+                yield dialog.entity
+
+    async def scan_session(self, path: str, writer) -> int:
+        """
+        Write a row for every channel created by the account of a session file.
+
+        :param path: Path of a Telethon or Pyrogram session file.
+        :param writer: CSV `DictWriter` with `ChannelInventory.FIELDS`.
+        :return: Number of channels found.
+        """
+        found = 0
+        async with self._limit:
+            client = await _open_session_file(path, self.api_id, self.api_hash, entity_cache_limit=100)
+            try:
+                async for channel in self._created_channels(client):
+                    writer.writerow({
+                        'session': os.path.basename(path),
+                        'channel_id': channel.id,
+                        'title': channel.title,
+                        'username': channel.username or '',
+                        'megagroup': channel.megagroup,
+                        'created': channel.date.strftime('%Y-%m-%d') if channel.date else '',
+                    })
+                    self.counts[_channel_kind(channel)] += 1
+                    found += 1
+            finally:
+                await client.disconnect()
+        return found
+
+    async def run(self, directory: str, output_file: str) -> Counter:
+        """
+        Scan every session file of a directory concurrently into a CSV file.
+
+        :param directory: Directory of `.session` files.
+        :param output_file: CSV file to write.
+        :return: Counts of public/private groups and channels.
+        """
+        paths = sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.session'))
+
+        with open(output_file, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=self.FIELDS)
+            writer.writeheader()
+
+            async def scan(path):
+                try:
+                    found = await self.scan_session(path, writer)
+                    file.flush()
+                    print(f"―― 🟢 {os.path.basename(path)}: {found} created channels")
+                except Exception as e:
+                    self.counts['failed_sessions'] += 1
+                    print(f"―― 🔴 {os.path.basename(path)}: {e}")
+
+            await asyncio.gather(*(scan(path) for path in paths))
+
+        return self.counts
+
+
+class BatchSessionCreator:
+    """
+    Create Telethon sessions for many phones in one asyncio process.
+
+    Login codes are requested one phone at a time at a fixed pace, and every pending client stays
+    connected while it waits. Codes are matched to phones as they arrive, either as `<phone> <code>`
+    lines on stdin or appended to a watched file, so no account blocks the others.
+    """
+
+    INTERVAL = 30
+    CODE_TIMEOUT = 600
+    CODE_ATTEMPTS = 3
+    CODE_LINE = re.compile(r'^\s*\+?(\d+)[\s,:;]+(\S+)\s*$')
+    MANIFEST_FIELDS = ['phone', 'status', 'session_file', 'user_id', 'username', 'error']
+
+    def __init__(self, api_id: int = None, api_hash: str = None, output_dir: str = 'sessions',
+                 interval: float = INTERVAL, code_timeout: float = CODE_TIMEOUT,
+                 code_attempts: int = CODE_ATTEMPTS):
+        """
+        :param api_id: API ID for rows of the CSV file without one.
+        :param api_hash: API hash for rows of the CSV file without one.
+        :param output_dir: Directory the session files and `manifest.csv` are written to.
+        :param interval: Seconds between two code requests.
+        :param code_timeout: Seconds to wait for the code of each phone.
+        :param code_attempts: Codes accepted per phone before a wrong code fails it.
+        """
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.output_dir = output_dir
+        self.manifest_path = os.path.join(output_dir, 'manifest.csv')
+        self.interval = interval
+        self.code_timeout = code_timeout
+        self.code_attempts = code_attempts
+        self._codes = {}
+        self._asked = Counter()
+        self._flood_until = 0
+
+    @staticmethod
+    def read_accounts(csv_file: str) -> list:
+        """
+        Read the accounts to create from a CSV file with a `phone` column and optional
+        `password`, `api_id` and `api_hash` columns.
+        """
+        with open(csv_file, 'r', newline='', encoding='utf-8-sig') as file:
+            rows = [
+                {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+                for row in csv.DictReader(file)
+            ]
+        return [row for row in rows if row.get('phone')]
+
+    def _code_future(self, phone: str) -> asyncio.Future:
+        key = re.sub(r'\D', '', phone)
+        if key not in self._codes:
+            self._codes[key] = asyncio.get_running_loop().create_future()
+        return self._codes[key]
+
+    def deliver(self, line: str) -> None:
+        """
+        Hand a `<phone> <code>` line to the client waiting for it. Codes may arrive before the
+        phone's code was requested.
+        """
+        match = self.CODE_LINE.match(line)
+        if not match:
+            if line.strip():
+                print(f"―― ⚠️ Ignored `{line.strip()}`, expected `<phone> <code>`")
+            return
+
+        code = self._code_future(match.group(1))
+        if code.done():
+            print(f"―― ⚠️ A code for +{match.group(1)} was already received")
+        else:
+            code.set_result(match.group(2))
+
+    async def _wait_for_code(self, phone: str) -> str:
+        key = re.sub(r'\D', '', phone)
+        self._asked[key] += 1
+        if self._asked[key] == 1:
+            print(f"―― 📨 Code requested for {phone}")
+        else:
+            print(f"―― ⚠️ Wrong code for {phone}, send it again ({self._asked[key]}/{self.code_attempts})")
+        code = await asyncio.wait_for(self._code_future(phone), self.code_timeout)
+        # The next attempt waits for a new code
+        del self._codes[key]
+        return code
+
+    async def _pace(self) -> None:
+        # Recheck after every sleep, a flood wait may be recorded while sleeping
+        resume_at = time.monotonic() + self.interval
+        while True:
+            wait = max(resume_at, self._flood_until) - time.monotonic()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def _read_stdin(self, loop) -> None:
+        for line in sys.stdin:
+            loop.call_soon_threadsafe(self.deliver, line)
+
+    async def _watch_file(self, path: str) -> None:
+        offset = 0
+        while True:
+            if os.path.exists(path):
+                with open(path, 'rb') as file:
+                    file.seek(offset)
+                    data = file.read()
+                # Leave a half-written last line for the next poll
+                complete = data[:data.rfind(b'\n') + 1]
+                offset += len(complete)
+                for line in complete.decode('utf-8').splitlines():
+                    self.deliver(line)
+            await asyncio.sleep(1)
+
+    async def create(self, row: dict, writer) -> dict:
+        """
+        Create the session of one CSV row and add it to the manifest.
+
+        :param row: Row with a `phone` and optional `password`, `api_id` and `api_hash`.
+        :param writer: `csv.DictWriter` of the manifest.
+        :return: The manifest record.
+        """
+        phone = row['phone']
+        session_file = os.path.join(self.output_dir, re.sub(r'\D', '', phone) + '.session')
+        existed = os.path.exists(session_file)
+        password = row.get('password')
+        record = dict.fromkeys(self.MANIFEST_FIELDS, '')
+        record.update(phone=phone, status='failed')
+
+        try:
+            client = await SessionManager.create_telethon(
+                row.get('api_id') or self.api_id, row.get('api_hash') or self.api_hash, phone,
+                self._wait_for_code, (lambda _: password) if password else None, session=session_file,
+                code_attempts=self.code_attempts
+            )
+            try:
+                me = await client.get_me()
+            finally:
+                await client.disconnect()
+            record.update(status='created', session_file=session_file, user_id=me.id, username=me.username or '')
+            print(f"―― 🟢 {phone} saved as `{session_file}`")
+        except asyncio.TimeoutError:
+            record['error'] = f"No code received within {self.code_timeout:g} seconds"
+        except telethon_errors.FloodWaitError as e:
+            # Hold back the next code requests as well
+            self._flood_until = max(self._flood_until, time.monotonic() + e.seconds)
+            record['error'] = str(e)
+        except Exception as e:
+            record['error'] = str(e) or type(e).__name__
+
+        if record['status'] == 'failed':
+            print(f"―― ❌ {phone}: {record['error']}")
+            if not existed and os.path.exists(session_file):
+                os.remove(session_file)
+
+        writer.writerow(record)
+        return record
+
+    async def run(self, csv_file: str, codes_file: str = None) -> list:
+        """
+        Create the sessions of every row of a CSV file and write `manifest.csv`.
+
+        :param csv_file: CSV file of phone numbers, see `read_accounts`.
+        :param codes_file: File to watch for `<phone> <code>` lines, stdin is read by default.
+        :return: The manifest records.
+        :raises TgLisztError: If a row has no API credentials.
+        """
+        accounts = self.read_accounts(csv_file)
+        missing = [
+            row['phone'] for row in accounts
+            if not (row.get('api_id') or self.api_id) or not (row.get('api_hash') or self.api_hash)
+        ]
+        if missing:
+            raise TgLisztError(f"No API ID or API hash for {', '.join(missing)}")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        watcher = None
+        if codes_file:
+            watcher = loop.create_task(self._watch_file(codes_file))
+        else:
+            # A daemon thread, so a blocked read never keeps the process alive
+            threading.Thread(target=self._read_stdin, args=(loop,), daemon=True).start()
+
+        try:
+            with open(self.manifest_path, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.DictWriter(file, fieldnames=self.MANIFEST_FIELDS)
+                writer.writeheader()
+                tasks = []
+                for index, row in enumerate(accounts):
+                    if index:
+                        await self._pace()
+                    tasks.append(loop.create_task(self.create(row, writer)))
+                return await asyncio.gather(*tasks)
+        finally:
+            if watcher:
+                watcher.cancel()
+
+
+SessionData = namedtuple(
+    'SessionData',
+    ['dc_id', 'server_address', 'port', 'auth_key', 'api_id', 'user_id', 'test_mode', 'is_bot']
+)
+
+
+class SessionConverter:
+    """
+    Convert sessions between Telethon and Pyrogram formats offline.
+
+    Supported formats: ``telethon`` (SQLite file), ``pyrogram`` (SQLite file), ``telethon-string``
+    and ``pyrogram-string``. Nothing here connects to Telegram; every conversion is checked by
+    reading the result back and comparing the DC and auth key byte for byte.
+    """
+
+    FORMATS = ('telethon', 'pyrogram', 'telethon-string', 'pyrogram-string')
+
+    # Pyrogram only stores the DC ID, so these production addresses are used for Telethon
+    DC_ADDRESSES = PRODUCTION_DC_ADDRESSES
+
+    PYROGRAM_STRING_FORMAT = '>BI?256sQ?'
+    PYROGRAM_OLD_STRING_FORMATS = ('>B?256sI?', '>B?256sQ?')
+    PYROGRAM_VERSION = 3
+    PYROGRAM_SCHEMA = """
+    CREATE TABLE sessions
+    (
+        dc_id     INTEGER PRIMARY KEY,
+        api_id    INTEGER,
+        test_mode INTEGER,
+        auth_key  BLOB,
+        date      INTEGER NOT NULL,
+        user_id   INTEGER,
+        is_bot    INTEGER
+    );
+
+    CREATE TABLE peers
+    (
+        id             INTEGER PRIMARY KEY,
+        access_hash    INTEGER,
+        type           INTEGER NOT NULL,
+        username       TEXT,
+        phone_number   TEXT,
+        last_update_on INTEGER NOT NULL DEFAULT (CAST(STRFTIME('%s', 'now') AS INTEGER))
+    );
+
+    CREATE TABLE version
+    (
+        number INTEGER PRIMARY KEY
+    );
+
+    CREATE INDEX idx_peers_id ON peers (id);
+    CREATE INDEX idx_peers_username ON peers (username);
+    CREATE INDEX idx_peers_phone_number ON peers (phone_number);
+
+    CREATE TRIGGER trg_peers_last_update_on
+        AFTER UPDATE
+        ON peers
+    BEGIN
+        UPDATE peers
+        SET last_update_on = CAST(STRFTIME('%s', 'now') AS INTEGER)
+        WHERE id = NEW.id;
+    END;
+    """
+
+    @staticmethod
+    def read(source: str) -> SessionData:
+        """
+        Read a session file or string.
+
+        :param source: Path of a Telethon/Pyrogram session file, or a Telethon/Pyrogram string session.
+        :return: The session data.
+        :raises ValueError: If the source is not a usable session.
+        """
+        if os.path.isfile(source):
+            return SessionConverter._read_file(source)
+        if source.startswith('1') and len(source) in (353, 369):
+            session = StringSession(source)
+            return SessionData(
+                session.dc_id, session.server_address, session.port, session.auth_key.key, None, None, False, None
+            )
+        return SessionConverter._read_pyrogram_string(source)
+
+    @staticmethod
+    def _read_file(path: str) -> SessionData:
+        connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            cursor = connection.execute("SELECT * FROM sessions")
+            row = dict(zip([column[0] for column in cursor.description], cursor.fetchone() or ()))
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"Unreadable session file: {e}")
+        finally:
+            connection.close()
+
+        if not row.get('auth_key'):
+            raise ValueError("Session file has no auth key")
+
+        if 'server_address' in row:
+            return SessionData(
+                row['dc_id'], row['server_address'], row['port'], row['auth_key'], None, None, False, None
+            )
+        if 'test_mode' in row:
+            return SessionData(
+                row['dc_id'], SessionConverter.DC_ADDRESSES.get(row['dc_id']), 443, row['auth_key'],
+                row.get('api_id'), row.get('user_id'), bool(row['test_mode']), row.get('is_bot')
+            )
+        raise ValueError("Not a Telethon or Pyrogram session file")
+
+    @staticmethod
+    def _read_pyrogram_string(string: str) -> SessionData:
+        try:
+            packed = base64.urlsafe_b64decode(string + '=' * (-len(string) % 4))
+        except ValueError:
+            raise ValueError("Not a Telethon or Pyrogram string session")
+
+        if len(packed) == struct.calcsize(SessionConverter.PYROGRAM_STRING_FORMAT):
+            dc_id, api_id, test_mode, auth_key, user_id, is_bot = struct.unpack(
+                SessionConverter.PYROGRAM_STRING_FORMAT, packed
+            )
+        else:
+            for string_format in SessionConverter.PYROGRAM_OLD_STRING_FORMATS:
+                if len(packed) == struct.calcsize(string_format):
+                    dc_id, test_mode, auth_key, user_id, is_bot = struct.unpack(string_format, packed)
+                    api_id = None
+                    break
+            else:
+                raise ValueError("Not a Telethon or Pyrogram string session")
+
+        return SessionData(
+            dc_id, SessionConverter.DC_ADDRESSES.get(dc_id), 443, auth_key, api_id, user_id, test_mode, is_bot
+        )
+
+    @staticmethod
+    def write(data: SessionData, target_format: str, path: str = None) -> str:
+        """
+        Write session data in a format.
+
+        :param data: The session data.
+        :param target_format: One of `SessionConverter.FORMATS`.
+        :param path: Output file path for the SQLite formats.
+        :return: The string session, or the path of the written file.
+        :raises ValueError: If the data cannot be represented in the format.
+        """
+        if target_format in ('telethon', 'telethon-string'):
+            if data.test_mode:
+                raise ValueError("Test server sessions cannot be converted to Telethon")
+            if not data.server_address:
+                raise ValueError(f"Unknown DC ID: {data.dc_id}")
+
+        if target_format == 'telethon-string':
+            session = StringSession()
+            session.set_dc(data.dc_id, data.server_address, data.port)
+            session.auth_key = AuthKey(data.auth_key)
+            return session.save()
+
+        if target_format == 'pyrogram-string':
+            packed = struct.pack(
+                SessionConverter.PYROGRAM_STRING_FORMAT,
+                data.dc_id, data.api_id or 0, bool(data.test_mode), data.auth_key, data.user_id or 0, bool(data.is_bot)
+            )
+            return base64.urlsafe_b64encode(packed).decode().rstrip('=')
+
+        if os.path.exists(path):
+            raise ValueError(f"Output file already exists: {path}")
+
+        if target_format == 'telethon':
+            session = SQLiteSession(path)
+            session.set_dc(data.dc_id, data.server_address, data.port)
+            session.auth_key = AuthKey(data.auth_key)
+            session.save()
+            session.close()
+            return path
+
+        if target_format == 'pyrogram':
+            connection = sqlite3.connect(path)
+            with connection:
+                connection.executescript(SessionConverter.PYROGRAM_SCHEMA)
+                connection.execute("INSERT INTO version VALUES (?)", (SessionConverter.PYROGRAM_VERSION,))
+                connection.execute(
+                    "INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (data.dc_id, data.api_id, bool(data.test_mode), data.auth_key, int(time.time()),
+                     data.user_id, data.is_bot)
+                )
+            connection.close()
+            return path
+
+        raise ValueError(f"Unknown format: {target_format}")
+
+    @staticmethod
+    def convert_one(source: str, target_format: str, output_dir: str = '.', api_id: int = None) -> dict:
+        """
+        Convert one session and verify the result.
+
+        A JSON file next to a session file may give `api_id`/`app_id` and `user_id`/`id`, which
+        Pyrogram sessions need but Telethon sessions do not store.
+
+        :param source: Path of a session file, or a string session.
+        :param target_format: One of `SessionConverter.FORMATS`.
+        :param output_dir: Directory for converted session files.
+        :param api_id: API ID for Pyrogram output when the source has none.
+        :return: A result row with `source`, `status`, `output` and `error`.
+        """
+        is_file = os.path.isfile(source)
+        name = os.path.splitext(os.path.basename(source))[0] if is_file else f"session_{hashlib.sha256(source.encode()).hexdigest()[:8]}"
+        result = {'source': source if is_file else name, 'status': 'failed', 'output': None, 'error': None}
+
+        try:
+            data = SessionConverter.read(source)
+
+            side_file = os.path.splitext(source)[0] + '.json' if is_file else None
+            if side_file and os.path.exists(side_file):
+                with open(side_file, 'r', encoding='utf-8') as file:
+                    side = json.load(file)
+                data = data._replace(
+                    api_id=data.api_id or side.get('api_id') or side.get('app_id'),
+                    user_id=data.user_id or side.get('user_id') or side.get('id')
+                )
+            data = data._replace(api_id=data.api_id or api_id)
+
+            path = None
+            if target_format in ('telethon', 'pyrogram'):
+                path = os.path.join(output_dir, f"{name}.session")
+            output = SessionConverter.write(data, target_format, path)
+
+            # Read the result back offline and compare it with the source
+            converted = SessionConverter.read(output)
+            if converted.auth_key != data.auth_key or converted.dc_id != data.dc_id:
+                raise ValueError("Round-trip check failed: auth key or DC differs")
+            if target_format.startswith('telethon') and (converted.server_address, converted.port) != (
+                    ipaddress.ip_address(data.server_address).compressed, data.port):
+                raise ValueError("Round-trip check failed: server address differs")
+            if target_format.startswith('pyrogram') and (converted.api_id or None, converted.user_id or None) != (
+                    data.api_id or None, data.user_id or None):
+                raise ValueError("Round-trip check failed: api_id or user_id differs")
+            if target_format == 'pyrogram' and not data.user_id:
+                result['error'] = "No user_id known; Pyrogram will ask to log in again"
+
+            result.update(status='converted', output=output)
+        except Exception as e:
+            result['error'] = str(e)
+
+        return result
+
+    @staticmethod
+    def convert(source: str = None, target_format: str = None, output_dir: str = None, api_id: str = None) -> None:
+        """
+        Convert a session, or every session file of a directory in parallel.
+
+        String outputs are written to `<output_dir>/sessions_<format>.csv`.
+
+        :param source: A session file, a directory of `.session` files, or a string session.
+        :param target_format: One of `SessionConverter.FORMATS`.
+        :param output_dir: Directory for the converted sessions, defaults to `converted`.
+        :param api_id: API ID for Pyrogram output of sessions that have none.
+        """
+        user_source = source or input("Enter a session file, a directory of session files or a string session: ")
+        user_format = target_format or input(f"Enter the target format ({', '.join(SessionConverter.FORMATS)}): ")
+        user_output_dir = output_dir or 'converted'
+
+        if user_format not in SessionConverter.FORMATS:
+            print(f"\n―― ❌ Unknown format: `{user_format}`. Supported formats: {', '.join(SessionConverter.FORMATS)}")
+            sys.exit(1)
+
+        if api_id is not None and not str(api_id).isdigit():
+            print(f"\n―― ❌ The API ID must be a number, got `{api_id}`")
+            sys.exit(1)
+        user_api_id = int(api_id) if api_id is not None else None
+
+        if os.path.isdir(user_source):
+            sources = sorted(
+                os.path.join(user_source, name) for name in os.listdir(user_source) if name.endswith('.session')
+            )
+        else:
+            sources = [user_source]
+
+        os.makedirs(user_output_dir, exist_ok=True)
+        with ProcessPoolExecutor() as pool:
+            results = list(pool.map(
+                SessionConverter.convert_one, sources, [user_format] * len(sources),
+                [user_output_dir] * len(sources), [user_api_id] * len(sources), chunksize=16
+            ))
+
+        if user_format.endswith('string'):
+            strings_path = os.path.join(user_output_dir, f"sessions_{user_format}.csv")
+            with open(strings_path, 'w', encoding='utf-8', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(['source', 'session'])
+                for result in results:
+                    if result['status'] == 'converted':
+                        writer.writerow([result['source'], result['output']])
+            print(f"\n―― ✨ String sessions saved to `{strings_path}`")
+
+        converted = sum(result['status'] == 'converted' for result in results)
+        for result in results:
+            if result['error']:
+                print(f"―― {'⚠️' if result['status'] == 'converted' else '❌'} {result['source']}: {result['error']}")
+
+        print(f"\n―― 🟢 {converted} of {len(results)} sessions converted to {user_format} and verified offline.")
+        sys.exit(0 if converted == len(results) else 1)
+
+
+class SessionScanner:
+    """
+    Check session files offline before any connection is attempted.
+
+    Files are opened read-only with sqlite3, so they are never migrated or locked. Each file is
+    checked for SQLite integrity, a known Telethon or Pyrogram schema version, a valid DC and a
+    256-byte auth key. Files sharing an auth key (copies of one login) are reported as duplicates.
+    """
+
+    # Schema versions this module reads; older ones are migrated by the libraries on first open
+    SCHEMA_VERSIONS = {'telethon': 7, 'pyrogram': 3}
+    AUTH_KEY_LENGTH = 256
+
+    @staticmethod
+    def scan_one(path: str) -> dict:
+        """
+        Check one session file.
+
+        :param path: Path of a `.session` file.
+        :return: A report row. `status` is `ok` or `invalid`, `problems` lists why a file is
+                 invalid and `warnings` what the libraries will fix or ask for on first use.
+        """
+        result = {
+            'path': path, 'status': 'invalid', 'format': None, 'version': None, 'dc_id': None,
+            'user_id': None, 'auth_key_sha256': None, 'duplicate_of': None, 'problems': [], 'warnings': []
+        }
+        problems, warnings = result['problems'], result['warnings']
+
+        try:
+            with open(path, 'rb') as file:
+                if file.read(16) != b'SQLite format 3\x00':
+                    problems.append("Not an SQLite database")
+                    return result
+
+            connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                integrity = connection.execute("PRAGMA quick_check").fetchone()[0]
+                if integrity != 'ok':
+                    problems.append(f"Corrupted: {integrity}")
+                    return result
+
+                tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+                if 'sessions' not in tables or 'version' not in tables:
+                    problems.append("Not a Telethon or Pyrogram session file")
+                    return result
+
+                cursor = connection.execute("SELECT * FROM sessions")
+                columns = [column[0] for column in cursor.description]
+                rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                result['format'] = 'telethon' if 'server_address' in columns else 'pyrogram'
+                version_column = 'version' if result['format'] == 'telethon' else 'number'
+                version = connection.execute(f"SELECT {version_column} FROM version").fetchone()
+            finally:
+                connection.close()
+        except (OSError, sqlite3.DatabaseError) as e:
+            problems.append(f"Unreadable: {e}")
+            return result
+
+        result['version'] = version[0] if version else None
+        expected_version = SessionScanner.SCHEMA_VERSIONS[result['format']]
+        if result['version'] is None:
+            problems.append("No schema version")
+        elif result['version'] > expected_version:
+            problems.append(f"Schema version {result['version']} is newer than supported ({expected_version})")
+        elif result['version'] < expected_version:
+            warnings.append(f"Schema version {result['version']} will be migrated on first open")
+
+        if not rows:
+            problems.append("No session row")
+            return result
+        if len(rows) > 1:
+            warnings.append(f"{len(rows)} session rows, only the first is used")
+        row = rows[0]
+
+        result['dc_id'] = row['dc_id']
+        if row['dc_id'] not in SessionConverter.DC_ADDRESSES:
+            problems.append(f"Unknown DC ID: {row['dc_id']}")
+
+        if result['format'] == 'telethon':
+            try:
+                ipaddress.ip_address(row['server_address'])
+            except ValueError:
+                problems.append(f"Invalid server address: {row['server_address']}")
+        else:
+            result['user_id'] = row.get('user_id')
+            if row.get('test_mode'):
+                warnings.append("Test server session")
+            if not row.get('user_id'):
+                warnings.append("No user_id; Pyrogram will ask to log in again")
+
+        auth_key = row.get('auth_key')
+        if not auth_key:
+            problems.append("No auth key, the session is logged out")
+        elif len(auth_key) != SessionScanner.AUTH_KEY_LENGTH:
+            problems.append(f"Auth key is {len(auth_key)} bytes instead of {SessionScanner.AUTH_KEY_LENGTH}")
+        else:
+            result['auth_key_sha256'] = hashlib.sha256(auth_key).hexdigest()
+
+        if not problems:
+            result['status'] = 'ok'
+        return result
+
+    @staticmethod
+    def mark_duplicates(results: list) -> None:
+        """
+        Mark every file whose auth key was already seen in an earlier file as `duplicate`.
+        """
+        first_paths = {}
+        for result in results:
+            key_hash = result['auth_key_sha256']
+            if not key_hash:
+                continue
+            if key_hash in first_paths:
+                result['status'] = 'duplicate'
+                result['duplicate_of'] = first_paths[key_hash]
+            else:
+                first_paths[key_hash] = result['path']
+
+    @staticmethod
+    def scan(directory: str = None, output_file: str = None) -> None:
+        """
+        Check every session file of a directory in parallel and write a JSON-lines report.
+
+        :param directory: Directory of Telethon or Pyrogram `.session` files.
+        :param output_file: Report file, defaults to `scan_report.jsonl`.
+        """
+        user_directory = directory or input("Enter the directory of your session files: ")
+        user_output_file = output_file or 'scan_report.jsonl'
+
+        try:
+            paths = sorted(entry.path for entry in os.scandir(user_directory)
+                           if entry.name.endswith('.session') and entry.is_file())
+        except OSError as e:
+            print(f"\n―― ❌ {e}")
+            sys.exit(1)
+
+        with ProcessPoolExecutor() as pool:
+            results = list(pool.map(SessionScanner.scan_one, paths, chunksize=64))
+        SessionScanner.mark_duplicates(results)
+
+        with open(user_output_file, 'w', encoding='utf-8') as file:
+            for result in results:
+                file.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+        counts = Counter(result['status'] for result in results)
+        print(
+            f"\n―― ✨ Report saved to `{user_output_file}`\n"
+            f"Usable: {counts['ok']}\n"
+            f"Invalid: {counts['invalid']}\n"
+            f"Duplicates: {counts['duplicate']}\n"
+            f"With warnings: {sum(bool(result['warnings']) for result in results)}\n"
+        )
+
 
 if __name__ == "__main__":
     commands = {
         "--telethon": SessionManager.telethon,
         "--pyrogram": SessionManager.pyrogram,
+        "--batch": SessionManager.batch,
         "--login": Telegram.login,
+        "--convert": SessionConverter.convert,
+        "--listen-all": Telegram.listen_all,
+        "--inventory": Telegram.channel_inventory,
+        "--scan": SessionScanner.scan,
     }
 
     if len(sys.argv) > 1:
         cmd = sys.argv[1]
         action = commands.get(cmd)
         if action:
-            action()
+            action(*sys.argv[2:])
         else:
             print(f"\n―― ❌  Unknown command: `{cmd}`\n"
                   f"――  Supported commands: {', '.join(commands.keys())}\n"
@@ -5,37 +5,80 @@ Developed by VX (@KOXVX)
 """
 
 import asyncio
+import base64
+import csv
+import hashlib
+import heapq
+import io
 import json
 import logging
 from logging.handlers import RotatingFileHandler
+import mmap
 import os
+import queue
 import random
+import re
+import secrets
+import sqlite3
+import tempfile
+import threading
 import traceback
 import time
 import sys
+from collections import Counter, deque, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
-from functools import lru_cache, wraps
+from functools import lru_cache, partial, wraps
+from operator import itemgetter
+from string import Formatter
+from urllib.parse import parse_qs
 
 load_dotenv()
 from telebot.async_telebot import AsyncTeleBot, types as telebot_types
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from telethon import TelegramClient, functions, types
+from telethon.crypto import AuthKey
 from telethon.sessions import StringSession
 from telethon.tl.functions.channels import JoinChannelRequest
+from telethon.tl.functions.messages import SendReactionRequest
 from telethon.errors import (
     FloodWaitError, 
+    FloodError,
     BadRequestError, 
     PhoneCodeInvalidError, 
     SessionPasswordNeededError, 
-    PasswordHashInvalidError
+    PasswordHashInvalidError,
+    ServerError,
+    TimedOutError,
+    SlowModeWaitError,
+    UnauthorizedError,
+    AuthKeyError,
+    InviteHashExpiredError,
+    InviteHashInvalidError,
+    UserAlreadyParticipantError,
+    PeerFloodError
 )
 
+from TgLiszt.datacenters import PRODUCTION_DC_ADDRESSES
+
 import pyfiglet
 from termcolor import colored
 import colorama
 colorama.init()
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 from languages import Language
 
 logging.basicConfig(
@@ -54,8 +97,33 @@ class Config:
     BOT_TOKEN = os.getenv("BOT_TOKEN", "<your-bot-token>")
     DATA_DIR = os.getenv("DATA_DIR", "data")
     SESSIONS_FILE = os.path.join(DATA_DIR, "Sessions.json")
+    SESSIONS_FORMAT = os.getenv("SESSIONS_FORMAT", "json")
+    SESSIONS_PASSPHRASE = os.getenv("SESSIONS_PASSPHRASE", "")
     REACTION_LIST = ['🔥', '👍', '❤️']
-    
+    RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "4"))
+    RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "1"))
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "30"))
+    RETRY_ATTEMPT_TIMEOUT = float(os.getenv("RETRY_ATTEMPT_TIMEOUT", "30"))
+    RETRY_DEADLINE = float(os.getenv("RETRY_DEADLINE", "120"))
+    MAX_FLOOD_WAIT = int(os.getenv("MAX_FLOOD_WAIT", "60"))
+    REPORTS_DIR = os.path.join(DATA_DIR, "reports")
+    REPORT_FORMAT = os.getenv("REPORT_FORMAT", "csv")
+    LEDGER_FILE = os.path.join(DATA_DIR, "Ledger.json")
+    LEDGER_TTL = int(os.getenv("LEDGER_TTL", "0"))
+    BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "10"))
+    OUTREACH_QUOTA = int(os.getenv("OUTREACH_QUOTA", "20"))
+    OUTREACH_INTERVAL = float(os.getenv("OUTREACH_INTERVAL", "5"))
+    MEDIA_DIR = os.path.join(DATA_DIR, "media")
+    MEDIA_UPLOAD_CONCURRENCY = int(os.getenv("MEDIA_UPLOAD_CONCURRENCY", "4"))
+    MEDIA_CACHE_TTL = int(os.getenv("MEDIA_CACHE_TTL", "3600"))
+    MEDIA_CACHE_SIZE = int(os.getenv("MEDIA_CACHE_SIZE", "1000"))
+    MEDIA_RETENTION = int(os.getenv("MEDIA_RETENTION", "86400"))
+    SWEEP_ALLOWED_API_IDS = {int(api_id) for api_id in os.getenv("SWEEP_ALLOWED_API_IDS", "").split(',') if api_id.strip()}
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "100"))
+    VAULT_FILE = os.path.join(DATA_DIR, "Vault.json")
+    VAULT_PASSPHRASE = os.getenv("VAULT_PASSPHRASE", "")
+    SWEEP_DEVICE_MODELS = {model.strip() for model in os.getenv("SWEEP_DEVICE_MODELS", "").split(',') if model.strip()}
+    LOOP_LAG_REPORT_INTERVAL = float(os.getenv("LOOP_LAG_REPORT_INTERVAL", "300"))
 
 
 
@@ -115,1204 +183,4645 @@ async def process_multiple_accounts(accounts, action_func, *args, **kwargs):
     
     return await asyncio.gather(*tasks)
 
-def initialize_data():
-    """Initialize the data directory and sessions file if they don't exist."""
 
-    if not os.path.exists(Config.DATA_DIR):
-        os.makedirs(Config.DATA_DIR)
-    
-    if not os.path.exists(Config.SESSIONS_FILE):
-        with open(Config.SESSIONS_FILE, 'w', encoding='utf-8') as file:
-            json.dump({'sessions': {}}, file, indent=4)
+class SessionInvalidError(Exception):
+    """Raised when a stored session is no longer authorized."""
 
 
-class SessionManager:
+class RetryPolicy:
     """
-    Manage Telegram sessions using Telethon.
+    Retry Telegram calls with capped exponential backoff and jitter.
+    
+    Errors are classified as retryable (connection problems, timeouts and
+    500-class RPC errors), rate limited (flood waits) or fatal (everything
+    else). Fatal errors are raised immediately.
+    
+    Calls that are not idempotent (sends, joins, reactions) are only retried
+    after a flood wait, since Telegram rejects those before running them; a
+    timeout or lost connection may hide a request that already went through.
     """
-
     
-    @staticmethod
-    def read_sessions():
-        """Read sessions from the sessions file."""
-
-        with open(Config.SESSIONS_FILE, 'r', encoding='utf-8') as file:
-            return json.load(file)
+    RETRYABLE = 'retryable'
+    RATE_LIMITED = 'rate_limited'
+    FATAL = 'fatal'
     
-    @staticmethod
-    def get_session_count():
-        """Get the count of sessions."""
+    def __init__(self, max_attempts=None, base_delay=None, max_delay=None,
+                 attempt_timeout=None, deadline=None, max_flood_wait=None):
+        self.max_attempts = Config.RETRY_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.base_delay = Config.RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = Config.RETRY_MAX_DELAY if max_delay is None else max_delay
+        self.attempt_timeout = Config.RETRY_ATTEMPT_TIMEOUT if attempt_timeout is None else attempt_timeout
+        self.deadline = Config.RETRY_DEADLINE if deadline is None else deadline
+        self.max_flood_wait = Config.MAX_FLOOD_WAIT if max_flood_wait is None else max_flood_wait
+        self.counters = Counter()
+    
+    @classmethod
+    def classify(cls, error):
+        """Classify an exception as retryable, rate limited or fatal."""
 
-        sessions = SessionManager.read_sessions()
-        return len(sessions['sessions'])
+        if isinstance(error, (FloodError, SlowModeWaitError)):
+            return cls.RATE_LIMITED
+        if isinstance(error, (ServerError, TimedOutError, ConnectionError, TimeoutError, asyncio.TimeoutError)):
+            return cls.RETRYABLE
+        return cls.FATAL
+    
+    def backoff(self, attempt):
+        """Get a full-jitter backoff delay for the given attempt number."""
+
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
     
-    @staticmethod
-    def add_session(api_id, api_hash, phone, session_string, first_name, account_id, username):
-        """Add a new session to the sessions file."""
+    def snapshot(self):
+        """Get a copy of the error counters."""
 
+        return Counter(self.counters)
+    
+    async def run(self, factory, tracker=None, idempotent=True, timed=True):
+        """
+        Await a coroutine until it succeeds or the policy gives up.
         
-        with open(Config.SESSIONS_FILE, 'r', encoding='utf-8') as file:
-            sessions = json.load(file)
+        Args:
+            factory (callable): Zero-argument callable returning a new coroutine for each attempt
+            tracker (dict, optional): Its 'attempts' entry is incremented on every attempt
+            idempotent (bool): False to retry only after flood waits, never after a
+                failure that may have left the request sent
+            timed (bool): False to skip the per-attempt timeout, for uploads whose
+                duration grows with the file
+            
+        Returns:
+            The result of the first successful attempt
+        """
+        started = time.monotonic()
+        attempt = 0
         
+        while True:
+            attempt += 1
+            if tracker is not None:
+                tracker['attempts'] = tracker.get('attempts', 0) + 1
+            
+            remaining = self.deadline - (time.monotonic() - started)
+            try:
+                if not timed:
+                    return await factory()
+                return await asyncio.wait_for(factory(), timeout=min(self.attempt_timeout, remaining))
+            except Exception as e:
+                error_class = self.classify(e)
+                self.counters[error_class] += 1
+                
+                if error_class == self.FATAL or attempt >= self.max_attempts:
+                    raise
+                if error_class == self.RETRYABLE and not idempotent:
+                    raise
+                
+                if error_class == self.RATE_LIMITED:
+                    delay = getattr(e, 'seconds', None) or self.backoff(attempt)
+                    if delay > self.max_flood_wait:
+                        raise
+                else:
+                    delay = self.backoff(attempt)
+                
+                if time.monotonic() - started + delay >= self.deadline:
+                    raise
+                
+                self.counters['retries'] += 1
+                logger.warning(f"Attempt {attempt} failed ({error_class}): {e}. Retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+
+retry_policy = RetryPolicy()
+
+
+class BulkReport:
+    """
+    Stream one result row per account of a bulk action to a CSV or JSON-lines file.
+    """
+    
+    FIELDS = ['session_id', 'account_id', 'status', 'error_class', 'error', 'latency_ms', 'attempts']
+    
+    def __init__(self, action, report_format=None, extra_fields=()):
+        self.action = action
+        self.format = (report_format or Config.REPORT_FORMAT).lower()
+        if self.format not in ('csv', 'jsonl'):
+            raise ValueError(f"Unsupported report format: {self.format}")
         
-        session_id = f"session_{len(sessions['sessions']) + 1}"
+        self.fields = self.FIELDS + list(extra_fields)
+        self.total = 0
+        self.success_count = 0
+        self.status_counts = Counter()
+        self.error_classes = Counter()
         
+        os.makedirs(Config.REPORTS_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.path = os.path.join(Config.REPORTS_DIR, f"{action}_{timestamp}.{self.format}")
+        self._file = open(self.path, 'w', encoding='utf-8', newline='')
         
-        sessions['sessions'][session_id] = {
-            "id": len(sessions['sessions']) + 1,
-            "api_hash": api_hash,
-            "api_id": api_id,
-            "phone": phone,
-            "session": session_string,
-            "first_name": first_name,
-            "username": username,
-            "account_id": account_id
-        }
+        self._writer = None
+        if self.format == 'csv':
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fields)
+            self._writer.writeheader()
+    
+    def add(self, session_id, account_id, status, error=None, latency=0.0, attempts=0, **extra):
+        """
+        Write a result row and flush it to disk.
         
+        Args:
+            session_id (str): Session ID the row belongs to
+            account_id (str): Telegram account ID of the session
+            status (str): 'success', 'failed' or 'skipped', or a status of the action
+                such as 'updated'
+            error (Exception, optional): Error that caused the failure
+            latency (float): Seconds spent on this account
+            attempts (int): Number of Telegram call attempts made
+            **extra: Values for the report's extra fields
+        """
+        row = {
+            'session_id': session_id,
+            'account_id': account_id,
+            'status': status,
+            'error_class': type(error).__name__ if error else '',
+            'error': str(error) if error else '',
+            'latency_ms': round(latency * 1000),
+            'attempts': attempts
+        }
+        row.update(extra)
         
-        with open(Config.SESSIONS_FILE, 'w', encoding='utf-8') as file:
-            json.dump(sessions, file, indent=4)
-            
-        return session_id
+        if self._writer:
+            self._writer.writerow(row)
+        else:
+            self._file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        self._file.flush()
+        
+        self.total += 1
+        self.status_counts[status] += 1
+        if status == 'success':
+            self.success_count += 1
+        if error:
+            self.error_classes[row['error_class']] += 1
+    
+    def close(self):
+        """Close the report file."""
+
+        if not self._file.closed:
+            self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ActionLedger:
+    """
+    Persistent record of completed per-account work.
+    
+    Entries are keyed by (action, normalized target, account ID) so re-running
+    a bulk action can skip accounts that already did it without connecting them.
+    A TTL of 0 keeps entries forever.
+    """
+    
+    SAVE_EVERY = 50
+    
+    def __init__(self, path=None, ttl=None):
+        self.path = path or Config.LEDGER_FILE
+        self.ttl = Config.LEDGER_TTL if ttl is None else ttl
+        self._entries = None
+        self._unsaved = 0
     
     @staticmethod
-    def delete_session(session_id):
-        """Delete a session from the sessions file."""
+    def key(action, target, account_id):
+        """Build the ledger key for a unit of work."""
 
-        with open(Config.SESSIONS_FILE, 'r', encoding='utf-8') as file:
-            sessions = json.load(file)
-        
+        return f"{action}|{target}|{account_id}"
+    
+    def _load(self):
+        """Load the ledger file once and drop expired entries; an unreadable file counts as empty."""
 
-        if session_id in sessions['sessions']:
-            del sessions['sessions'][session_id]
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as file:
+                        self._entries = json.load(file).get('entries', {})
+                except (ValueError, AttributeError) as e:
+                    logger.warning(f"Ignoring unreadable ledger {self.path}: {e}")
             
+            if self.ttl:
+                cutoff = time.time() - self.ttl
+                self._entries = {key: done_at for key, done_at in self._entries.items() if done_at >= cutoff}
+        
+        return self._entries
+    
+    def is_done(self, action, target, account_id):
+        """Check whether an account already completed an action on a target."""
 
-            with open(Config.SESSIONS_FILE, 'w', encoding='utf-8') as file:
-                json.dump(sessions, file, indent=4)
-            return True
+        done_at = self._load().get(self.key(action, target, account_id))
+        if done_at is None:
+            return False
+        return not self.ttl or time.time() - done_at < self.ttl
+    
+    def record(self, action, target, account_id):
+        """Record completed work, saving the ledger periodically."""
+
+        self._load()[self.key(action, target, account_id)] = time.time()
+        self._unsaved += 1
+        if self._unsaved >= self.SAVE_EVERY:
+            self.save()
+    
+    def save(self):
+        """Write pending entries to the ledger file."""
+
+        if self._entries is None or not self._unsaved:
+            return
         
-        return False
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({'entries': self._entries}, file)
+        os.replace(temp_path, self.path)
+        self._unsaved = 0
+
+
+action_ledger = ActionLedger()
+
+
+class PasswordVault:
+    """
+    Encrypted local store of account 2FA passwords.
     
-    @staticmethod
-    async def create_session(api_id, api_hash, phone, bot, chat_id, message_id):
-        """Create a new Telethon session."""
+    The whole vault is sealed with AES-GCM under a key derived by scrypt from
+    Config.VAULT_PASSPHRASE. The key is derived once per vault object and
+    every save uses a fresh nonce.
+    
+    store and set_pending only change the entries in memory; save_async
+    writes them from a worker thread, and one write covers every change made
+    before it started.
+    """
+    
+    SCRYPT_PARAMS = {'n': 2 ** 15, 'r': 8, 'p': 1, 'maxmem': 64 * 1024 * 1024, 'dklen': 32}
+    
+    _shared = None
+    
+    def __init__(self, path=None, passphrase=None):
+        """
+        Open the vault and decrypt its entries.
         
-        try:
-            client = TelegramClient(StringSession(), api_id, api_hash)
-            await client.connect()
-            
-            
-            await bot.send_message(
-                chat_id,
-                "Sending code request..."
-            )
-            
-            sent = await client.send_code_request(phone)
-            
-            return True, client
-        except Exception as e:
-            return False, str(e)
+        Raises:
+            ValueError: If no passphrase is set, or the passphrase does not open the vault
+        """
+        self.path = path or Config.VAULT_FILE
+        passphrase = Config.VAULT_PASSPHRASE if passphrase is None else passphrase
+        if not passphrase:
+            raise ValueError("VAULT_PASSPHRASE is not set")
+        
+        self._entries = {}
+        self._salt = secrets.token_bytes(16)
+        self._version = 0
+        self._saved_version = 0
+        self._save_lock = asyncio.Lock()
+        
+        sealed = None
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as file:
+                sealed = json.load(file)
+            self._salt = base64.b64decode(sealed['salt'])
+        
+        self._aead = AESGCM(hashlib.scrypt(passphrase.encode('utf-8'), salt=self._salt, **self.SCRYPT_PARAMS))
+        
+        if sealed:
+            try:
+                data = self._aead.decrypt(base64.b64decode(sealed['nonce']), base64.b64decode(sealed['data']), None)
+            except InvalidTag:
+                raise ValueError("Wrong vault passphrase or damaged vault file")
+            self._entries = json.loads(data)
     
     @staticmethod
-    async def sign_in_with_code(client, phone, code, password=None):
+    async def open_shared():
         """
-        Sign in with the received code.
+        Get the vault every 2FA flow shares, opened in a worker thread on first use
+        since deriving its key blocks.
         
-        Args:
-            client (TelegramClient): Telethon client instance
-            phone (str): Phone number
-            code (str): Verification code
-            password (str, optional): Two-step verification password
-        
-        Returns:
-            tuple: (success, session_string or error message, user_info)
+        Raises:
+            ValueError: If no passphrase is set, or the passphrase does not open the vault
         """
-        try:
-            try:
+        if PasswordVault._shared is None:
+            vault = await asyncio.to_thread(PasswordVault)
+            if PasswordVault._shared is None:
+                PasswordVault._shared = vault
+        return PasswordVault._shared
+    
+    def get(self, account_id):
+        """Get the stored password of an account, or None."""
 
-                user = await client.sign_in(phone, code)
-            except SessionPasswordNeededError:
+        entry = self._entries.get(str(account_id))
+        return entry['password'] if entry else None
+    
+    def get_pending(self, account_id):
+        """Get the password that was being set on an account when its last change was cut off, or None."""
 
-                if password:
-                    user = await client.sign_in(password=password)
-                else:
-                    return False, "Two-step verification is enabled. Please provide your password.", None
-            
+        entry = self._entries.get(str(account_id))
+        return entry.get('pending') if entry else None
+    
+    def store(self, account_id, password, session_id=None):
+        """Store the confirmed password of an account and clear its pending one."""
 
-            session_string = client.session.save()
-            
+        self._entries[str(account_id)] = {
+            'password': password,
+            'pending': None,
+            'session_id': session_id,
+            'updated_at': datetime.now().isoformat(timespec='seconds')
+        }
+        self._version += 1
+    
+    def set_pending(self, account_id, pending, session_id=None):
+        """
+        Record the password being set on an account right now, or clear it with None.
+        
+        The confirmed password is left alone, so a change Telegram rejects never
+        loses it, while a change that went through but whose confirmation was
+        lost is recovered by rotate_2fa, which tries the pending password when
+        the confirmed one is rejected.
+        """
+        entry = self._entries.get(str(account_id)) or {'password': None}
+        self._entries[str(account_id)] = {
+            **entry,
+            'pending': pending,
+            'session_id': session_id or entry.get('session_id'),
+            'updated_at': datetime.now().isoformat(timespec='seconds')
+        }
+        self._version += 1
+    
+    async def save_async(self):
+        """Save the vault from a worker thread, unless a later write already covered the changes."""
 
-            user_info = {
-                "id": user.id,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "username": user.username,
-                "phone": user.phone
-            }
-            
-            return True, session_string, user_info
-        except PhoneCodeInvalidError:
-            return False, "Invalid code. Please try again.", None
-        except PasswordHashInvalidError:
-            return False, "Invalid password. Please try again.", None
-        except Exception as e:
-            return False, str(e), None
+        version = self._version
+        async with self._save_lock:
+            if self._saved_version >= version:
+                return
+            version = self._version
+            await asyncio.to_thread(self._write, json.dumps(self._entries))
+            self._saved_version = version
+    
+    def save(self):
+        """Encrypt the entries and replace the vault file."""
 
+        self._write(json.dumps(self._entries))
+        self._saved_version = self._version
+    
+    def _write(self, payload):
+        nonce = secrets.token_bytes(12)
+        data = self._aead.encrypt(nonce, payload.encode('utf-8'), None)
+        sealed = {
+            'salt': base64.b64encode(self._salt).decode('ascii'),
+            'nonce': base64.b64encode(nonce).decode('ascii'),
+            'data': base64.b64encode(data).decode('ascii')
+        }
+        
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(sealed, file)
+        os.replace(temp_path, self.path)
 
 
-class AccountManager:
+class RecordCipher:
     """
-    Manage Telegram accounts and perform actions with them.
+    Per-record encryption of the secret fields of session records.
+    
+    Each secret field is sealed on its own with AES-GCM and a fresh nonce, under a
+    key derived once by scrypt from Config.SESSIONS_PASSPHRASE. Names, IDs and tags
+    stay in cleartext, so listing and selecting accounts never decrypts anything;
+    a session string is only opened when a client is built from it.
+    
+    The associated data binds a value to its field name and to a context, the ID
+    of the record it belongs to, so a sealed value copied into another record or
+    field fails to open.
     """
     
+    SECRET_FIELDS = ('session', 'api_hash')
+    PREFIX = 'aesgcm:'
+    
+    def __init__(self, passphrase, salt):
+        self._aead = AESGCM(hashlib.scrypt(passphrase.encode('utf-8'), salt=salt, **PasswordVault.SCRYPT_PARAMS))
+    
     @staticmethod
-    async def get_client_for_session(session_id):
-        """
-        Create and connect a Telethon client for a specific session.
+    def is_sealed(value):
+        """Check whether a field value is encrypted."""
+
+        return isinstance(value, str) and value.startswith(RecordCipher.PREFIX)
+    
+    @staticmethod
+    def _associated_data(field, context):
+        return (field if context is None else f"{context}:{field}").encode('utf-8')
+    
+    def seal(self, field, value, context=None):
+        """Encrypt a field value, bound to its field name and the record ID given as context."""
+
+        if value is None or self.is_sealed(value):
+            return value
         
-        Args:
-            session_id (str): Session ID to create client for
-            
-        Returns:
-            tuple: (success, client or error message)
+        nonce = secrets.token_bytes(12)
+        data = self._aead.encrypt(nonce, str(value).encode('utf-8'), self._associated_data(field, context))
+        return self.PREFIX + base64.b64encode(nonce + data).decode('ascii')
+    
+    def open(self, field, value, context=None):
         """
-        sessions = SessionManager.read_sessions()['sessions']
+        Decrypt a field value; cleartext values are returned as they are.
         
-        if session_id not in sessions:
-            return False, "Session not found"
-        
-        session_data = sessions[session_id]
+        Raises:
+            ValueError: If the value was sealed under another passphrase, for another
+                record or field, or is damaged
+        """
+        if not self.is_sealed(value):
+            return value
         
+        raw = base64.b64decode(value[len(self.PREFIX):])
         try:
-            client = TelegramClient(
-                StringSession(session_data['session']),
-                int(session_data['api_id']),
-                session_data['api_hash']
-            )
-            
+            return self._aead.decrypt(raw[:12], raw[12:], self._associated_data(field, context)).decode('utf-8')
+        except InvalidTag:
+            raise ValueError(f"Cannot decrypt {field}: wrong SESSIONS_PASSPHRASE or damaged record")
+    
+    def seal_record(self, record, context=None):
+        """Get a copy of a record with its secret fields encrypted for the given context."""
 
-            await client.connect()
-            
-            if not await client.is_user_authorized():
-                await client.disconnect()
-                return False, "Session is no longer valid"
-            
-            return True, client
-        except Exception as e:
-            return False, str(e)
+        return {
+            **record,
+            **{field: self.seal(field, record[field], context) for field in self.SECRET_FIELDS if field in record}
+        }
+    
+    def reseal_record(self, record, old_context, new_context):
+        """Get a copy of a record with its secret fields moved from one context to another."""
+
+        return self.seal_record({
+            **record,
+            **{field: self.open(field, record[field], old_context) for field in self.SECRET_FIELDS if field in record}
+        }, new_context)
+
+
+def initialize_data():
+    """Initialize the data directory and sessions file if they don't exist."""
+
+    if not os.path.exists(Config.DATA_DIR):
+        os.makedirs(Config.DATA_DIR)
+    
+    if not os.path.exists(Config.SESSIONS_FILE):
+        with open(Config.SESSIONS_FILE, 'w', encoding='utf-8') as file:
+            json.dump({'sessions': {}}, file, indent=4)
+
+
+class StoreCodec:
+    """
+    Serialization format of the sessions file.
+    
+    `json` needs nothing extra, `orjson` and `msgpack` need their packages installed.
+    Loading detects the format from the file contents, so a file in any format can be
+    read and is rewritten in the configured one on the next save.
+    """
+    
+    FORMATS = ('json', 'orjson', 'msgpack')
+    
+    def __init__(self, name=None):
+        self.name = (name or Config.SESSIONS_FORMAT).lower()
+        if self.name not in self.FORMATS:
+            raise ValueError(f"Unknown sessions format: {self.name}")
+        if self.name == 'orjson' and orjson is None:
+            raise ValueError("The orjson sessions format needs `pip install orjson`")
+        if self.name == 'msgpack' and msgpack is None:
+            raise ValueError("The msgpack sessions format needs `pip install msgpack`")
+    
+    def dumps(self, data):
+        """Encode sessions data to bytes."""
+
+        if self.name == 'orjson':
+            return orjson.dumps(data)
+        if self.name == 'msgpack':
+            return msgpack.packb(data, use_bin_type=True)
+        return self._encode_json(data).encode('utf-8')
+    
+    _json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
     
     @staticmethod
-    async def get_account_details(session_id):
+    def _encode_json(value, depth=0):
+        # The C encoder holds the GIL for a whole call, so records are encoded one by one
+        # to let the event loop run between them while the writer thread saves
+        if isinstance(value, dict) and depth < 2:
+            return '{' + ','.join(
+                f"{StoreCodec._json_encoder.encode(str(key))}:{StoreCodec._encode_json(item, depth + 1)}"
+                for key, item in value.items()
+            ) + '}'
+        return StoreCodec._json_encoder.encode(value)
+    
+    @staticmethod
+    def detect(raw):
+        """Get the format name of encoded sessions data."""
+
+        return 'json' if raw.lstrip()[:1] == b'{' else 'msgpack'
+    
+    @staticmethod
+    def loads(raw):
+        """Decode sessions data in any supported format."""
+
+        if StoreCodec.detect(raw) == 'json':
+            return orjson.loads(raw) if orjson is not None else json.loads(raw)
+        if msgpack is None:
+            raise ValueError("The sessions file is in msgpack format, which needs `pip install msgpack`")
+        return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+
+
+class SessionStore:
+    """
+    In-memory copy of the sessions file with a single background writer.
+    
+    Reads are served from memory. Changes are applied in memory right away and a save
+    is queued for a writer thread, which snapshots the latest state and replaces the
+    file atomically. A burst of changes costs one write, and a slow disk never blocks
+    the event loop.
+    """
+    
+    UNIQUE_FIELDS = ('account_id', 'phone')
+    UNCHANGED = object()
+    
+    def __init__(self, path=None, codec=None):
+        self.path = path or Config.SESSIONS_FILE
+        self.codec = codec or StoreCodec()
+        self.cipher = None
+        self.version = 0
+        self._credentials = None
+        self._unique = None
+        self._edited = {}
+        self.write_count = 0
+        self.last_write_seconds = 0.0
+        self._data = None
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+        self._last_save = None
+    
+    def load(self):
         """
-        Get detailed information about an account.
+        Get the sessions data, reading the file on first use.
         
-        Args:
-            session_id (str): Session ID to get details for
-            
-        Returns:
-            tuple: (success, account_details or error message)
-        """
-        success, client_or_error = await AccountManager.get_client_for_session(session_id)
+        With SESSIONS_PASSPHRASE set, the encryption key is derived here once, and a
+        cleartext file is encrypted record by record on first load.
         
-        if not success:
-            return False, client_or_error
+        Raises:
+            ValueError: If the file is encrypted and the passphrase is missing or wrong
+        """
+        if self._data is not None:
+            return self._data
+        
+        with open(self.path, 'rb') as file:
+            data = StoreCodec.loads(file.read())
+        
+        encryption = data.get('encryption')
+        passphrase = Config.SESSIONS_PASSPHRASE
+        if encryption and not passphrase:
+            raise ValueError("The sessions file is encrypted but SESSIONS_PASSPHRASE is not set")
+        
+        if passphrase:
+            salt = base64.b64decode(encryption['salt']) if encryption else secrets.token_bytes(16)
+            cipher = RecordCipher(passphrase, salt)
+            if encryption:
+                cipher.open('check', encryption['check'])
+            self.cipher = cipher
+        
+        self._data = data
+        if 'next_id' not in data:
+            self.mutate(self._init_counter)
+        if passphrase and not encryption:
+            self.mutate(partial(self._encrypt_all, salt))
+        elif encryption and encryption.get('binding') != 'record':
+            self.mutate(self._bind_all)
+        if any('api_id' in record or 'api_hash' in record for record in data['sessions'].values()):
+            self.mutate(self._normalize_credentials)
+        return self._data
+    
+    def _init_counter(self, data):
+        # Hand-edited keys and IDs may be anything; only numbers can collide with the counter
+        numbers = [int(record['id']) for record in data['sessions'].values() if str(record.get('id')).isdigit()]
+        suffixes = [session_id.rsplit('_', 1)[-1] for session_id in data['sessions']]
+        numbers += [int(suffix) for suffix in suffixes if suffix.isdigit()]
+        data['next_id'] = max(max(numbers, default=0) + 1, data.get('next_id', 1))
+    
+    def allocate_id(self, data):
+        """Take the next session number from the persisted counter; call inside a change."""
+
+        number = data['next_id']
+        data['next_id'] = number + 1
+        return number
+    
+    @staticmethod
+    def _unique_key(field, value):
+        if value in (None, ''):
+            return None
+        if field == 'phone':
+            return re.sub(r'\D', '', str(value)) or None
+        return str(value)
+    
+    def _unique_index(self):
+        if self._unique is None:
+            self._unique = {field: {} for field in self.UNIQUE_FIELDS}
+            for session_id, record in self.load()['sessions'].items():
+                self._index_record(session_id, record)
+        return self._unique
+    
+    def _index_record(self, session_id, record, remove=False):
+        for field in self.UNIQUE_FIELDS:
+            key = self._unique_key(field, record.get(field))
+            if key is None:
+                continue
+            index = self._unique[field]
+            if not remove:
+                index[key] = session_id
+            elif index.get(key) == session_id:
+                del index[key]
+    
+    def find_account(self, account_id=None, phone=None):
+        """
+        Get the session ID of a stored account in O(1), by account ID or else by phone.
         
-        client = client_or_error
+        A phone match is ignored when both records have different account IDs,
+        since the number then moved to another account.
+        """
+        index = self._unique_index()
         
-        try:
-            
-            me = await client.get_me()
-            
-            
-            full = await client(functions.users.GetFullUserRequest(me.id))
-            bio = full.full_user.about if hasattr(full.full_user, 'about') else None
-            
-            
-            profile_photos = await client.get_profile_photos(me.id)
-            has_photo = len(profile_photos) > 0
-            
-            
-            active_sessions = await client(functions.account.GetAuthorizationsRequest())
-            
-            
-            password_settings = None
-            has_2fa = False
-            try:
-                password_settings = await client(functions.account.GetPasswordRequest())
-                has_2fa = password_settings.has_password
-            except Exception:
-                pass
-            
-            
-            account_details = {
-                "id": me.id,
-                "first_name": me.first_name,
-                "last_name": me.last_name,
-                "username": me.username,
-                "phone": me.phone,
-                "bio": bio,
-                "has_photo": has_photo,
-                "premium": me.premium if hasattr(me, 'premium') else False,
-                "verified": me.verified if hasattr(me, 'verified') else False,
-                "restricted": me.restricted if hasattr(me, 'restricted') else False,
-                "sessions_count": len(active_sessions.authorizations),
-                "has_2fa": has_2fa
+        key = self._unique_key('account_id', account_id)
+        if key is not None and key in index['account_id']:
+            return index['account_id'][key]
+        
+        session_id = index['phone'].get(self._unique_key('phone', phone))
+        if session_id and (key is None or not self._data['sessions'][session_id].get('account_id')):
+            return session_id
+        return None
+    
+    def put_record(self, data, session_id, record):
+        """Store a new record under a session ID, keeping the unique indexes current; call inside a change."""
+
+        self._unique_index()
+        data['sessions'][session_id] = record
+        self._index_record(session_id, record)
+    
+    def update_record(self, data, session_id, fields, drop=()):
+        """Update (or drop) fields of a stored record, keeping the unique indexes current; call inside a change."""
+
+        self._unique_index()
+        record = data['sessions'][session_id]
+        # Keep the fields the record had before this change, for mutate to roll back to
+        self._edited.setdefault(id(record), (record, dict(record)))
+        self._index_record(session_id, record, remove=True)
+        record.update(fields)
+        for field in drop:
+            record.pop(field, None)
+        self._index_record(session_id, record)
+    
+    def remove_record(self, data, session_id):
+        """Remove a stored record, keeping the unique indexes current; call inside a change."""
+
+        self._unique_index()
+        record = data['sessions'].pop(session_id, None)
+        if record:
+            self._index_record(session_id, record, remove=True)
+        return record
+    
+    def _encrypt_all(self, salt, data):
+        data['encryption'] = {
+            'cipher': 'aes-256-gcm',
+            'kdf': 'scrypt',
+            'salt': base64.b64encode(salt).decode('ascii'),
+            'check': self.cipher.seal('check', 'sessions'),
+            'binding': 'record'
+        }
+        for session_id, record in data['sessions'].items():
+            data['sessions'][session_id] = self.seal(self._with_id(data, record))
+        for credential_id, credential in data.get('credentials', {}).items():
+            data['credentials'][credential_id] = self.seal(credential, credential_id)
+    
+    def _bind_all(self, data):
+        # Values sealed before records were bound only carry their field name
+        for session_id, record in data['sessions'].items():
+            record = self._with_id(data, record)
+            record = self.cipher.reseal_record(record, None, record['id'])
+            if record.get('session'):
+                record['session_digest'] = self.session_digest(self.cipher.open('session', record['session'], record['id']))
+            data['sessions'][session_id] = record
+        for credential_id, credential in data.get('credentials', {}).items():
+            data['credentials'][credential_id] = self.cipher.reseal_record(credential, None, credential_id)
+        data['encryption']['binding'] = 'record'
+    
+    def _with_id(self, data, record):
+        # Sealed values are bound to the record ID, so every record needs one
+        if record.get('id') is None:
+            return {**record, 'id': self.allocate_id(data)}
+        return record
+    
+    def _normalize_credentials(self, data):
+        changed = False
+        for session_id, record in data['sessions'].items():
+            normalized = self.attach_credential(data, record)
+            if normalized is not record:
+                data['sessions'][session_id] = normalized
+                changed = True
+        # Records that keep an incomplete credential would otherwise be rewritten on every start
+        return None if changed else self.UNCHANGED
+    
+    def credentials(self):
+        """Get every API credential as credential ID -> (api_id, api_hash), decrypted once."""
+
+        if self._credentials is None:
+            self._credentials = {
+                credential_id: (int(credential['api_id']), self.reveal('api_hash', credential['api_hash'], credential_id))
+                for credential_id, credential in self.load().get('credentials', {}).items()
             }
-            
-            await client.disconnect()
-            return True, account_details
-        except Exception as e:
-            await client.disconnect()
-            return False, str(e)
+        return self._credentials
     
-    @staticmethod
-    async def update_profile(session_id, first_name=None, last_name=None, bio=None, username=None):
+    def credential_id(self, data, api_id, api_hash):
+        """Find or add the credential of an API ID and hash; call inside a change."""
+
+        credential = (int(api_id), api_hash)
+        for credential_id, known in self.credentials().items():
+            if known == credential:
+                return credential_id
+        
+        numbers = [int(credential_id.split('_')[1]) for credential_id in data.get('credentials', {})]
+        credential_id = f"cred_{max(numbers, default=0) + 1}"
+        data.setdefault('credentials', {})[credential_id] = self.seal({'api_id': credential[0], 'api_hash': api_hash}, credential_id)
+        self._credentials[credential_id] = credential
+        return credential_id
+    
+    def attach_credential(self, data, record, current=None):
         """
-        Update account profile information.
+        Replace the api_id and api_hash of a record with a credential_id; call inside a change.
+        
+        A record whose half credential cannot be completed keeps its api_id or
+        api_hash as they are, so nothing is lost before it is fixed.
         
         Args:
-            session_id (str): Session ID to update profile for
-            first_name (str, optional): New first name
-            last_name (str, optional): New last name
-            bio (str, optional): New bio
-            username (str, optional): New username
-            
-        Returns:
-            tuple: (success, message)
+            data (dict): Sessions data being changed
+            record (dict): Record, or fields to update, that may hold api_id and api_hash
+            current (dict, optional): Stored record the fields are for, to fill in a missing half
         """
-        success, client_or_error = await AccountManager.get_client_for_session(session_id)
-        
-        if not success:
-            return False, client_or_error
+        if 'api_id' not in record and 'api_hash' not in record:
+            return record
+        
+        context = (current or record).get('id')
+        known = self.credentials().get((current or record).get('credential_id'), (None, None))
+        api_id = record.get('api_id') or known[0]
+        api_hash = self.reveal('api_hash', record.get('api_hash'), context) or known[1]
+        if not (api_id and api_hash):
+            logger.warning(f"Keeping the incomplete API credential of session record {context}: api_id or api_hash is missing")
+            return record
+        
+        record = {field: value for field, value in record.items() if field not in ('api_id', 'api_hash')}
+        record['credential_id'] = self.credential_id(data, api_id, api_hash)
+        return record
+    
+    def seal(self, record, context=None):
+        """
+        Get a record ready to store, with its secret fields encrypted when encryption is on.
         
-        client = client_or_error
+        Sealed values are bound to the context, by default the record's own ID. A
+        session string also gets a session_digest, so duplicates can be found
+        without decrypting anything.
+        """
+        if not self.cipher:
+            return record
         
-        try:
+        sealed = self.cipher.seal_record(record, record.get('id') if context is None else context)
+        if record.get('session') and not RecordCipher.is_sealed(record['session']):
+            sealed['session_digest'] = self.session_digest(record['session'])
+        return sealed
+    
+    def reveal(self, field, value, context=None):
+        """Get the cleartext of a stored field value sealed for a context."""
 
-            me = await client.get_me()
-            current_first_name = me.first_name or ""
-            current_last_name = me.last_name or ""
-            full = await client(functions.users.GetFullUserRequest(me.id))
-            current_bio = full.full_user.about or ""
-            
-            update_first_name = first_name if first_name is not None else current_first_name
-            update_last_name = last_name if last_name is not None else current_last_name
-            update_bio = bio if bio is not None else current_bio
-            
-            await client(functions.account.UpdateProfileRequest(
-                first_name=update_first_name,
-                last_name=update_last_name,
-                about=update_bio
-            ))
-            
-            if username is not None:
-                await client(functions.account.UpdateUsernameRequest(
-                    username=username
-                ))
-            
-            sessions = SessionManager.read_sessions()
-            if session_id in sessions['sessions']:
-                if first_name is not None:
-                    sessions['sessions'][session_id]['first_name'] = first_name
-                if username is not None:
-                    sessions['sessions'][session_id]['username'] = username
-                
-                with open(Config.SESSIONS_FILE, 'w', encoding='utf-8') as file:
-                    json.dump(sessions, file, indent=4)
-            
-            await client.disconnect()
-            return True, "Profile updated successfully"
-        except Exception as e:
-            await client.disconnect()
-            return False, str(e)
+        return self.cipher.open(field, value, context) if self.cipher else value
     
     @staticmethod
-    async def update_2fa(session_id, current_password=None, new_password=None):
+    def session_digest(session_string):
+        """Get the SHA-256 digest used to recognize a session string."""
+
+        return hashlib.sha256(session_string.encode('utf-8')).hexdigest()
+    
+    def session_digests(self):
+        """Get the digests of every stored session string, without decrypting any."""
+
+        return {
+            record.get('session_digest') or self.session_digest(record['session'])
+            for record in self.load()['sessions'].values()
+            if record.get('session_digest') or (record.get('session') and not RecordCipher.is_sealed(record['session']))
+        }
+    
+    def mutate(self, change):
         """
-        Update or set up 2FA password.
+        Apply a change to the data and queue a save.
+        
+        If the change raises, the data is put back the way it was and nothing
+        is saved. The rollback copies the top-level maps, not the records, so
+        a change must edit stored records through update_record. A change that
+        found nothing to do returns SessionStore.UNCHANGED to skip the save.
         
         Args:
-            session_id (str): Session ID to update 2FA for
-            current_password (str, optional): Current 2FA password
-            new_password (str): New 2FA password
+            change (callable): Called with the data dict; must not block
             
         Returns:
-            tuple: (success, message)
+            The return value of change
         """
-        success, client_or_error = await AccountManager.get_client_for_session(session_id)
-        
-        if not success:
-            return False, client_or_error
+        data = self.load()
+        with self._lock:
+            backup = {key: dict(value) if isinstance(value, dict) else value for key, value in data.items()}
+            self._edited = {}
+            try:
+                result = change(data)
+            except BaseException:
+                for record, fields in self._edited.values():
+                    record.clear()
+                    record.update(fields)
+                data.clear()
+                data.update(backup)
+                self._credentials = None
+                self._unique = None
+                raise
+            finally:
+                self._edited = {}
+            if result is self.UNCHANGED:
+                return result
+            self.version += 1
+        
+        future = Future()
+        self._last_save = future
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._write_loop, name='session-store-writer', daemon=True)
+            self._writer.start()
+        self._queue.put(future)
+        return result
+    
+    def convert(self, codec):
+        """
+        Rewrite the sessions file in another format.
         
-        client = client_or_error
+        Args:
+            codec (StoreCodec): Format to write from now on
+        """
+        def switch(data):
+            self.codec = codec
         
-        try:
-            
-            password_settings = await client(functions.account.GetPasswordRequest())
-            has_2fa = password_settings.has_password
+        self.mutate(switch)
+        self.flush()
+    
+    async def wait_saved(self):
+        """Wait until every change made so far is on disk."""
+
+        if self._last_save is not None:
+            await asyncio.wrap_future(self._last_save)
+    
+    def flush(self, timeout=None):
+        """Block until every change made so far is on disk."""
+
+        if self._last_save is not None:
+            self._last_save.result(timeout)
+    
+    def _snapshot(self):
+        # Copy two levels deep so records can change while the snapshot is serialized
+        return {
+            key: {item: dict(record) if isinstance(record, dict) else record for item, record in value.items()}
+            if isinstance(value, dict) else value
+            for key, value in self._data.items()
+        }
+    
+    def _write_loop(self):
+        while True:
+            waiters = [self._queue.get()]
+            # Every save queued meanwhile is covered by this write
+            while True:
+                try:
+                    waiters.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
             
+            started = time.perf_counter()
+            try:
+                with self._lock:
+                    snapshot = self._snapshot()
+                    codec = self.codec
+                
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, 'wb') as file:
+                    file.write(codec.dumps(snapshot))
+                os.replace(temp_path, self.path)
+            except Exception as e:
+                logger.error(f"Failed to save sessions: {e}")
+                for waiter in waiters:
+                    waiter.set_exception(e)
+                continue
             
-            if has_2fa:
-                await client.edit_2fa(current_password, new_password)
-            else:
-                await client.edit_2fa(None, new_password)
+            self.write_count += 1
+            self.last_write_seconds = time.perf_counter() - started
+            for waiter in waiters:
+                waiter.set_result(None)
+
+
+session_store = SessionStore()
+
+
+class LoopLagMonitor:
+    """
+    Measure how late the event loop wakes up a sleeping task.
+    
+    Lag is time the loop spent running something else without yielding, such as
+    blocking file I/O inside a handler, so it shows how responsive the bot is.
+    """
+    
+    def __init__(self, interval=0.1, window=3000):
+        self.interval = interval
+        self.samples = deque(maxlen=window)
+    
+    def stats(self):
+        """Get the p50, p99 and max lag in milliseconds over the recent samples."""
+
+        if not self.samples:
+            return {'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+        
+        ordered = sorted(self.samples)
+        return {
+            'p50_ms': round(ordered[len(ordered) // 2] * 1000, 1),
+            'p99_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 1),
+            'max_ms': round(ordered[-1] * 1000, 1)
+        }
+    
+    async def run(self, report_interval=0):
+        """Sample the lag forever, logging a summary every report_interval seconds (0 never logs)."""
+
+        loop = asyncio.get_running_loop()
+        last_report = loop.time()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            self.samples.append(max(0.0, now - started - self.interval))
             
-            await client.disconnect()
-            return True, "2FA updated successfully"
-        except Exception as e:
-            await client.disconnect()
-            return False, str(e)
+            if report_interval and now - last_report >= report_interval:
+                last_report = now
+                stats = self.stats()
+                logger.info(
+                    f"Event loop lag p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms max={stats['max_ms']}ms; "
+                    f"session store writes={session_store.write_count} "
+                    f"last={session_store.last_write_seconds * 1000:.1f}ms"
+                )
+
+
+loop_lag_monitor = LoopLagMonitor()
+
+
+class MessageTarget(namedtuple('MessageTarget', ['kind', 'chat', 'message_id', 'topic_id', 'comment_id'], defaults=(None, None))):
+    """
+    Message a link points to.
     
+    ``kind`` is 'public' (``chat`` is a username) or 'private' (``chat`` is a
+    channel ID). ``comment_id`` is set for links to a comment on a channel post.
+    """
     
+    __slots__ = ()
     
-    @staticmethod
-    async def get_active_sessions(session_id):
+    def key(self):
+        """Get a normalized key for the target, e.g. for the action ledger."""
+
+        chat = self.chat.lower() if self.kind == 'public' else self.chat
+        key = f"{self.kind}:{chat}/{self.message_id}"
+        if self.comment_id:
+            key += f"?comment={self.comment_id}"
+        return key
+
+
+class LinkParser:
+    """
+    Parse Telegram message, invite and username links.
+    
+    Supported message links include t.me/<username>/<msg>, t.me/c/<channel id>/<msg>,
+    forum topic links with a topic ID before the message ID, ``?comment=``,
+    ``?thread=`` and ``?single`` query strings, and tg:// links.
+    """
+    
+    HOST = r'(?:https?://)?(?:www\.)?(?:t|telegram)\.(?:me|dog)/'
+    TAIL = r'/(?:(?P<topic>\d+)/)?(?P<message>\d+)/?(?:\?(?P<query>[^#]*))?(?:#.*)?$'
+    PUBLIC_PATTERN = re.compile(HOST + r'(?:s/)?(?P<username>[A-Za-z]\w{3,31})' + TAIL)
+    PRIVATE_PATTERN = re.compile(HOST + r'c/(?P<channel>\d+)' + TAIL)
+    TG_RESOLVE_PATTERN = re.compile(r'^tg://resolve\?(?P<query>.+)$')
+    TG_PRIVATE_PATTERN = re.compile(r'^tg://privatepost\?(?P<query>.+)$')
+    INVITE_PATTERN = re.compile(HOST + r'(?:\+|joinchat/)(?P<hash>[\w-]+)/?$')
+    TG_INVITE_PATTERN = re.compile(r'^tg://join\?invite=(?P<hash>[\w-]+)$')
+    USERNAME_PATTERN = re.compile(r'^(?:@|' + HOST + r')?(?P<username>[A-Za-z]\w{3,31})/?$')
+    
+    @classmethod
+    def parse_invite_hash(cls, link):
         """
-        Get detailed information about all active sessions for this account.
+        Get the hash of a private invite link.
         
         Args:
-            session_id (str): Session ID to get sessions for
+            link (str): Link such as https://t.me/+hash or https://t.me/joinchat/hash
             
         Returns:
-            tuple: (success, sessions_list or error message)
+            str: Invite hash, or None if the link is not an invite link
         """
-        success, client_or_error = await AccountManager.get_client_for_session(session_id)
-        
-        if not success:
-            return False, client_or_error
-        
-        client = client_or_error
+        link = (link or '').strip()
+        match = cls.INVITE_PATTERN.match(link) or cls.TG_INVITE_PATTERN.match(link)
+        return match.group('hash') if match else None
+    
+    @classmethod
+    def parse_username(cls, link):
+        """
+        Get the username from @username, username or a t.me/username link.
         
-        try:
-            result = await client(functions.account.GetAuthorizationsRequest())
-            sessions = []
-            
-            for auth in result.authorizations:
-                try:
-                    date_created = datetime.fromtimestamp(auth.date_created).strftime('%Y-%m-%d %H:%M:%S')
-                except (TypeError, ValueError):
-                    date_created = str(auth.date_created)
-                    
-                try:
-                    date_active = datetime.fromtimestamp(auth.date_active).strftime('%Y-%m-%d %H:%M:%S')
-                except (TypeError, ValueError):
-                    date_active = str(auth.date_active)
-                
-                session_info = {
-                    "hash": auth.hash,
-                    "device_model": auth.device_model,
-                    "platform": auth.platform,
-                    "system_version": auth.system_version,
-                    "api_id": auth.api_id,
-                    "app_name": auth.app_name,
-                    "app_version": auth.app_version,
-                    "date_created": date_created,
-                    "date_active": date_active,
-                    "ip": auth.ip,
-                    "country": auth.country,
-                    "region": auth.region,
-                    "is_current": auth.current,
-                    "is_official_app": auth.official_app,
-                    "is_password_pending": auth.password_pending
-                }
-                sessions.append(session_info)
-            
-            await client.disconnect()
-            return True, sessions
-        except Exception as e:
-            logger.error(f"Error in get_active_sessions: {str(e)}\n{traceback.format_exc()}")
-            await client.disconnect()
-            return False, str(e)
-            
-    @staticmethod
-    async def terminate_sessions(session_id, all_sessions=False, session_ids=None):
+        Raises:
+            ValueError: If the text is not a valid username or username link
         """
-        Terminate other sessions for this account.
+        match = cls.USERNAME_PATTERN.match((link or '').strip())
+        if not match:
+            raise ValueError(f"Invalid username or link: {link}")
+        return match.group('username')
+    
+    @classmethod
+    def parse_message(cls, link):
+        """
+        Parse a message link.
         
         Args:
-            session_id (str): Session ID to terminate sessions for
-            all_sessions (bool): Whether to terminate all other sessions
-            session_ids (list, optional): List of specific session IDs to terminate
+            link (str): Message link
             
         Returns:
-            tuple: (success, message)
+            MessageTarget: Parsed target
+            
+        Raises:
+            ValueError: If the link is not a supported message link
         """
-        success, client_or_error = await AccountManager.get_client_for_session(session_id)
+        link = (link or '').strip()
         
-        if not success:
-            return False, client_or_error
+        match = cls.PUBLIC_PATTERN.match(link)
+        if match:
+            return cls._from_match('public', match.group('username'), match)
         
-        client = client_or_error
+        match = cls.PRIVATE_PATTERN.match(link)
+        if match:
+            return cls._from_match('private', int(match.group('channel')), match)
         
-        try:
-            if all_sessions:
-                # Terminate all other sessions
-                await client(functions.auth.ResetAuthorizationsRequest())
-                message = "All other sessions terminated successfully"
-            elif session_ids:
-                # Terminate specific sessions
-                for session_id in session_ids:
-                    await client(functions.account.ResetAuthorizationRequest(hash=int(session_id)))
-                message = f"{len(session_ids)} sessions terminated successfully"
-            else:
-                await client.disconnect()
-                return False, "No sessions specified to terminate"
-            
-            await client.disconnect()
-            return True, message
-        except Exception as e:
-            await client.disconnect()
-            return False, str(e)
+        match = cls.TG_RESOLVE_PATTERN.match(link)
+        if match:
+            query = parse_qs(match.group('query'))
+            if 'domain' in query and 'post' in query:
+                return cls._from_query('public', query['domain'][0], query)
+        
+        match = cls.TG_PRIVATE_PATTERN.match(link)
+        if match:
+            query = parse_qs(match.group('query'))
+            if 'channel' in query and 'post' in query:
+                return cls._from_query('private', int(query['channel'][0]), query)
+        
+        raise ValueError(f"Unsupported message link: {link}")
     
     @staticmethod
-    async def send_message_with_all_accounts(username, message):
-        """
-        Send a message to a user with all accounts.
+    def _query_int(query, name):
+        """Get an integer query parameter, or None if it is missing."""
+
+        values = query.get(name)
+        if not values:
+            return None
+        if not values[0].isdigit():
+            raise ValueError(f"Invalid {name} in message link: {values[0]}")
+        return int(values[0])
+    
+    @classmethod
+    def _from_match(cls, kind, chat, match):
+        """Build a target from a t.me link match."""
+
+        query = parse_qs(match.group('query') or '', keep_blank_values=True)
+        topic_id = match.group('topic')
+        return MessageTarget(
+            kind,
+            chat,
+            int(match.group('message')),
+            int(topic_id) if topic_id else cls._query_int(query, 'thread'),
+            cls._query_int(query, 'comment')
+        )
+    
+    @classmethod
+    def _from_query(cls, kind, chat, query):
+        """Build a target from tg:// link parameters."""
+
+        return MessageTarget(
+            kind,
+            chat,
+            cls._query_int(query, 'post'),
+            cls._query_int(query, 'thread'),
+            cls._query_int(query, 'comment')
+        )
+
+
+class MessageTemplate:
+    """
+    Message template with {field} placeholders, compiled once per job.
+    
+    The template is parsed a single time into a printf-style format string
+    and an item getter, so rendering a message is one dict lookup per field
+    and a single % operation instead of a str.format parse per send.
+    
+    Text without a {field} placeholder is sent exactly as written, so plain
+    messages may contain any braces. Once a placeholder is used, literal
+    braces are written as {{ and }}.
+    """
+    
+    ACCOUNT_FIELDS = ('first_name', 'last_name', 'username', 'phone', 'account_id')
+    PLACEHOLDER_PATTERN = re.compile(r'\{[A-Za-z_][^{}]*\}')
+    
+    def __init__(self, text):
+        """
+        Compile a template.
         
         Args:
-            username (str): Username to send the message to
-            message (str): Message to send
-        
-        Returns:
-            int: Number of successful message sends
+            text (str): Template text
+            
+        Raises:
+            ValueError: If the template is malformed or uses conversions, format specs or attribute access
         """
-        sessions = SessionManager.read_sessions()['sessions']
-        success_count = 0
+        self.text = text
+        parts = []
+        fields = []
+        
+        if not self.PLACEHOLDER_PATTERN.search(text.replace('{{', '').replace('}}', '')):
+            self.fields = ()
+            self._format = self._static = text
+            self._getter = None
+            return
         
-        for session_id, session_data in sessions.items():
-            try:
-                # Create client with session string
-                client = TelegramClient(
-                    StringSession(session_data['session']),
-                    int(session_data['api_id']),
-                    session_data['api_hash']
-                )
-                
-                # Connect and send message
-                await client.connect()
-                await client.send_message(username, message)
-                await client.disconnect()
-                
-                success_count += 1
-            except Exception:
-                continue
+        try:
+            parsed = list(Formatter().parse(text))
+        except ValueError as e:
+            raise ValueError(f"Invalid message template: {e}")
         
-        return success_count
+        for literal, field, format_spec, conversion in parsed:
+            parts.append(literal.replace('%', '%%'))
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise ValueError(f"Invalid template field: {{{field}}}")
+            if format_spec or conversion:
+                raise ValueError(f"Template field {{{field}}} cannot have a format spec or conversion")
+            parts.append('%s')
+            fields.append(field)
+        
+        self.fields = tuple(fields)
+        self._format = ''.join(parts)
+        self._static = ''.join(literal for literal, _, _, _ in parsed)
+        
+        if len(fields) == 1:
+            field = fields[0]
+            self._getter = lambda values: (values[field],)
+        elif fields:
+            self._getter = itemgetter(*fields)
+        else:
+            self._getter = None
+    
+    @property
+    def is_static(self):
+        """Whether the template has no fields."""
+        return self._getter is None
     
     @staticmethod
-    async def join_channel_with_all_accounts(username):
+    def benchmark(sends=100000, rounds=5):
+        """Print the time to render a three-field template for a number of sends, per rendering method."""
+
+        text = "Hi {recipient}, {first_name} here. Reach me at @{username} {{not a field}}"
+        account = {
+            'first_name': 'Sara', 'last_name': '', 'username': 'sara_ads',
+            'phone': '+15550000001', 'account_id': '5000000001'
+        }
+        rows = [{**account, 'recipient': f"@user{number}"} for number in range(sends)]
+        template = MessageTemplate(text)
+        
+        methods = [
+            ('str.format(**row) per send', lambda: [text.format(**row) for row in rows]),
+            ('str.format_map(row) per send', lambda: [text.format_map(row) for row in rows]),
+            ('MessageTemplate.render per send', lambda: [template.render(row) for row in rows]),
+            ('MessageTemplate.render_many', lambda: template.render_many(rows)),
+            ('MessageTemplate() per send', lambda: [MessageTemplate(text).render(row) for row in rows]),
+        ]
+        
+        print(f"{sends:,} renders, best of {rounds}")
+        for name, render in methods:
+            times = []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                render()
+                times.append(time.perf_counter() - started)
+            print(f"  {name:<32} {min(times) * 1000:>9.1f} ms")
+    
+    def validate(self, available):
         """
-        Join a channel with all accounts.
+        Check that every field of the template is available.
         
         Args:
-            username (str): Username of the channel to join
+            available (iterable): Field names that will be provided when rendering
+            
+        Raises:
+            ValueError: If the template uses unknown fields
+        """
+        unknown = sorted(set(self.fields) - set(available))
+        if unknown:
+            raise ValueError(
+                f"Unknown template fields: {', '.join(unknown)}. "
+                f"Available fields: {', '.join(sorted(set(available)))}"
+            )
+    
+    def render(self, values):
+        """
+        Render the template.
         
+        Args:
+            values (dict): Field values
+            
         Returns:
-            int: Number of successful joins
+            str: Rendered message
         """
-        try:
-            sessions = SessionManager.read_sessions()['sessions']
-            logger.info(f"Found {len(sessions)} sessions to join channel {username}")
-        except Exception as e:
-            logger.error(f"Error reading sessions: {str(e)}")
-            return 0
+        if self._getter is None:
+            return self._static
+        return self._format % self._getter(values)
+    
+    def render_many(self, rows):
+        """Render the template for each dict of field values in rows."""
+        if self._getter is None:
+            return [self._static for _ in rows]
         
-        if not sessions:
-            logger.warning("No sessions found to join channel")
-            return 0
+        template_format = self._format
+        getter = self._getter
+        return [template_format % getter(values) for values in rows]
+    
+    @classmethod
+    def account_values(cls, session_data):
+        """Get the template field values of an account from its session data."""
+        return {field: str(session_data.get(field) or '') for field in cls.ACCOUNT_FIELDS}
+    
+    @staticmethod
+    def recipient_fields(recipients):
+        """Get the recipient fields every row of a recipient list has."""
+        if not recipients:
+            return set()
+        return set.intersection(*(set(row) for row in recipients))
+
+
+class SharedMedia:
+    """
+    Media file read once into a shared read-only memory map.
+    
+    Every account uploads from its own MediaReader over the same mapping, so
+    the file is never read from disk again or copied as a whole, however many
+    accounts send it.
+    """
+    
+    def __init__(self, path):
+        """
+        Map a media file.
         
-        success_count = 0
+        Args:
+            path (str): Path of the file
+            
+        Raises:
+            ValueError: If the file is empty
+        """
+        self.path = path
+        self.name = os.path.basename(path)
         
-        for session_id, session_data in sessions.items():
-            try:
-                logger.info(f"Attempting to join channel with session {session_id}")
-                
-                # Validate session data
-                if 'session' not in session_data or not session_data['session']:
-                    logger.error(f"Session string missing for session {session_id}")
-                    continue
-                    
-                if 'api_id' not in session_data or not session_data['api_id']:
-                    logger.error(f"API ID missing for session {session_id}")
-                    continue
-                    
-                if 'api_hash' not in session_data or not session_data['api_hash']:
-                    logger.error(f"API hash missing for session {session_id}")
-                    continue
-                
-                # Create client with session string
-                client = TelegramClient(
-                    StringSession(session_data['session']),
-                    int(session_data['api_id']),
-                    session_data['api_hash']
-                )
-                
-                # Connect and join channel
-                await client.connect()
-                if not await client.is_user_authorized():
-                    logger.error(f"Session {session_id} is not authorized")
-                    await client.disconnect()
-                    continue
-                
-                # Use the correct method for joining channels
-                try:
-                    # Ensure username is properly formatted
-                    if username.startswith('@'):
-                        username = username[1:]
-                    
-                    logger.info(f"Attempting to join channel: {username}")
-                    
-                    # Get the channel entity first
-                    channel_entity = await client.get_entity(username)
-                    logger.info(f"Found channel entity: {channel_entity.title if hasattr(channel_entity, 'title') else channel_entity}")
-                    
-                    # Join the channel using JoinChannelRequest
-                    result = await client(JoinChannelRequest(channel_entity))
-                    logger.info(f"Successfully joined channel: {channel_entity.title if hasattr(channel_entity, 'title') else username}")
-                except Exception as e:
-                    logger.error(f"Error joining channel {username}: {str(e)}")
-                    logger.error(traceback.format_exc())
-                    raise
-                        
-                await client.disconnect()
-                
-                logger.info(f"Successfully joined channel with session {session_id}")
-                success_count += 1
-            except ValueError as ve:
-                logger.error(f"Value error with session {session_id}: {str(ve)}")
-                continue
-            except Exception as e:
-                logger.error(f"Error joining channel with session {session_id}: {str(e)}")
-                logger.error(traceback.format_exc())
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                raise ValueError(f"Media file is empty: {path}")
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        self.view = memoryview(self._mmap)
+        self.size = len(self.view)
+        self.digest = hashlib.sha256(self.view).hexdigest()
+    
+    def reader(self):
+        """Get a new reader over the shared buffer."""
+        return MediaReader(self.view, self.name)
+    
+    def close(self):
+        """Release the memory map."""
+        self.view.release()
+        self._mmap.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class MediaReader(io.RawIOBase):
+    """
+    Seekable file object over a shared memoryview.
+    
+    Telethon reads uploads part by part, so only the part being sent is
+    copied out of the shared buffer.
+    """
+    
+    def __init__(self, view, name):
+        super().__init__()
+        self._view = view
+        self._pos = 0
+        self.name = name
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def tell(self):
+        return self._pos
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, min(offset, len(self._view)))
+        return self._pos
+    
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        part = bytes(self._view[self._pos:end])
+        self._pos = end
+        return part
+    
+    def readinto(self, buffer):
+        end = min(self._pos + len(buffer), len(self._view))
+        count = end - self._pos
+        buffer[:count] = self._view[self._pos:end]
+        self._pos = end
+        return count
+
+
+class MediaUploadCache:
+    """
+    Uploaded file handles per account and media, so repeat sends skip the upload.
+    
+    At most max_size handles are kept; expired handles are dropped first, then
+    the oldest ones.
+    """
+    
+    def __init__(self, ttl, max_size=None):
+        self.ttl = ttl
+        self.max_size = Config.MEDIA_CACHE_SIZE if max_size is None else max_size
+        self._handles = {}
+    
+    def get(self, session_id, digest):
+        """Get the cached upload handle of a media for an account, or None."""
+        entry = self._handles.get((session_id, digest))
+        if entry is None:
+            return None
+        if entry[1] < time.time():
+            del self._handles[(session_id, digest)]
+            return None
+        return entry[0]
+    
+    def put(self, session_id, digest, input_file):
+        """Cache the upload handle of a media for an account."""
+        self._handles.pop((session_id, digest), None)
+        self._handles[(session_id, digest)] = (input_file, time.time() + self.ttl)
+        
+        if len(self._handles) > self.max_size:
+            now = time.time()
+            self._handles = {key: entry for key, entry in self._handles.items() if entry[1] >= now}
+            # Handles are kept in insertion order, so the first ones are the oldest
+            for key in list(self._handles)[:len(self._handles) - self.max_size]:
+                del self._handles[key]
+
+
+media_upload_cache = MediaUploadCache(Config.MEDIA_CACHE_TTL)
+
+
+class RecipientScheduler:
+    """
+    Assign recipients to accounts, always picking the least-loaded account with quota left.
+    """
+    
+    def __init__(self, session_ids, quota):
+        self.quota = quota
+        self.load = {session_id: 0 for session_id in session_ids}
+        self._heap = [(0, order, session_id) for order, session_id in enumerate(session_ids)]
+        heapq.heapify(self._heap)
+    
+    def assign(self, recipients):
+        """
+        Assign recipients to accounts.
+        
+        Args:
+            recipients (list): Recipients to assign
+            
+        Returns:
+            tuple: (dict of session ID to its recipients, list of recipients no account has quota for)
+        """
+        assignments = {}
+        unassigned = []
+        
+        for recipient in recipients:
+            # Drop entries of accounts removed from rotation
+            while self._heap and self._heap[0][2] not in self.load:
+                heapq.heappop(self._heap)
+            
+            if not self._heap:
+                unassigned.append(recipient)
                 continue
+            
+            load, order, session_id = heapq.heappop(self._heap)
+            assignments.setdefault(session_id, []).append(recipient)
+            self.load[session_id] = load + 1
+            if load + 1 < self.quota:
+                heapq.heappush(self._heap, (load + 1, order, session_id))
         
-        logger.info(f"Joined channel with {success_count} out of {len(sessions)} accounts")
-        return success_count
+        return assignments, unassigned
     
-    @staticmethod
-    async def send_reaction_with_all_accounts(message_link):
+    def remove(self, session_id):
+        """Take an account out of rotation."""
+
+        self.load.pop(session_id, None)
+
+
+class SessionIndex:
+    """
+    Inverted indexes from tags, health states and record numbers to session IDs.
+    """
+    
+    def __init__(self, sessions):
+        self.by_tag = {}
+        self.by_health = {}
+        self.by_number = {}
+        
+        for session_id, session_data in sessions.items():
+            for tag in session_data.get('tags', []):
+                self.by_tag.setdefault(tag, set()).add(session_id)
+            self.by_health.setdefault(session_data.get('health', 'unknown'), set()).add(session_id)
+            if 'id' in session_data:
+                self.by_number[int(session_data['id'])] = session_id
+
+
+class TargetSelector:
+    """
+    Select the accounts a bulk action runs with.
+    
+    Selectors are written as space separated filters, e.g.
+    ``tags:poolb,poolc ids:1-200,305 health:ok``. Values of one filter are
+    alternatives, different filters must all match. ``all`` selects every account.
+    Adding the word ``force`` re-runs accounts that already completed the action.
+    """
+    
+    FILTER_PATTERN = re.compile(r'(\w+):(\S+)')
+    RANGE_PATTERN = re.compile(r'^(\d+)(?:-(\d+))?$')
+    
+    def __init__(self, tags=None, id_ranges=None, health=None, force=False):
+        self.tags = set(tags or [])
+        self.id_ranges = list(id_ranges or [])
+        self.health = set(health or [])
+        self.force = force
+    
+    @classmethod
+    def parse(cls, text):
         """
-        Send a reaction to a message with all accounts.
+        Parse a selector from user input.
         
         Args:
-            message_link (str): Link to the message to react to
+            text (str): Selector text
+            
+        Returns:
+            TargetSelector: Parsed selector
+        """
+        words = (text or '').strip().lower().split()
+        selector = cls(force='force' in words)
+        text = ' '.join(word for word in words if word not in ('force', 'all'))
+        if not text:
+            return selector
+        
+        remainder = cls.FILTER_PATTERN.sub('', text).strip()
+        if remainder:
+            raise ValueError(f"Unrecognized selector part: {remainder}")
+        
+        for name, value in cls.FILTER_PATTERN.findall(text):
+            values = [item for item in value.split(',') if item]
+            if name in ('tag', 'tags'):
+                selector.tags.update(item.lstrip('#') for item in values)
+            elif name in ('id', 'ids'):
+                for item in values:
+                    match = cls.RANGE_PATTERN.match(item)
+                    if not match:
+                        raise ValueError(f"Invalid id range: {item}")
+                    start = int(match.group(1))
+                    end = int(match.group(2) or start)
+                    selector.id_ranges.append((min(start, end), max(start, end)))
+            elif name == 'health':
+                selector.health.update(values)
+            else:
+                raise ValueError(f"Unknown selector filter: {name}")
+        
+        return selector
+    
+    def is_all(self):
+        """Check whether the selector matches every account."""
+
+        return not (self.tags or self.id_ranges or self.health)
+    
+    def resolve(self, index):
+        """
+        Resolve the selector to session IDs using a session index.
         
+        Args:
+            index (SessionIndex): Index of the stored sessions
+            
         Returns:
-            int: Number of successful reactions
+            set: Matching session IDs
         """
-        try:
-            sessions = SessionManager.read_sessions()['sessions']
-            logger.info(f"Found {len(sessions)} sessions to send reaction to {message_link}")
-        except Exception as e:
-            logger.error(f"Error reading sessions: {str(e)}")
-            return 0
+        candidates = None
         
-        if not sessions:
-            logger.warning("No sessions found to send reaction")
-            return 0
+        if self.tags:
+            candidates = set().union(*(index.by_tag.get(tag, set()) for tag in self.tags))
+        
+        if self.health:
+            matched = set().union(*(index.by_health.get(state, set()) for state in self.health))
+            candidates = matched if candidates is None else candidates & matched
         
-        success_count = 0
+        if self.id_ranges:
+            highest = max(index.by_number, default=0)
+            matched = set()
+            for start, end in self.id_ranges:
+                for number in range(start, min(end, highest) + 1):
+                    if number in index.by_number:
+                        matched.add(index.by_number[number])
+            candidates = matched if candidates is None else candidates & matched
+        
+        return candidates if candidates is not None else set()
+
+
+class SessionFileParser:
+    """
+    Read Telethon and Pyrogram .session SQLite files offline.
+    
+    Parsing only opens the SQLite file read-only, so it is safe to run in a
+    process pool and never touches the network.
+    """
+    
+    # Pyrogram only stores the DC ID, so use the production addresses Telethon uses
+    DC_ADDRESSES = PRODUCTION_DC_ADDRESSES
+    
+    @staticmethod
+    def parse(path):
+        """
+        Parse a .session file and convert it to a Telethon string session.
         
+        A JSON file next to it with the same name (as shipped by most session
+        sellers and tools) may give api_id/app_id, api_hash/app_hash and phone.
         
+        Args:
+            path (str): Path of the .session file
+            
+        Returns:
+            dict: file, format, dc_id, session, account_id, api_id, api_hash and phone
+            
+        Raises:
+            ValueError: If the file is not a usable Telethon or Pyrogram session
+        """
+        connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
         try:
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(sessions)")}
+            api_id = None
             
-            if '?single' in message_link:
-                message_link = message_link.split('?')[0]
-                
-            parts = message_link.split('/')
-            chat_username = parts[-2]
-            message_id = int(parts[-1])
-            logger.info(f"Parsed message link: chat={chat_username}, message_id={message_id}")
-        except Exception as e:
-            logger.error(f"Error parsing message link: {str(e)}")
-            return 0
+            if 'server_address' in columns:
+                session_format = 'telethon'
+                row = connection.execute("SELECT dc_id, server_address, port, auth_key FROM sessions").fetchone()
+                dc_id, server_address, port, auth_key = row or (None, None, None, None)
+                account_id = None
+            elif 'test_mode' in columns:
+                session_format = 'pyrogram'
+                row = connection.execute("SELECT * FROM sessions").fetchone()
+                row = dict(zip([column[0] for column in connection.execute("SELECT * FROM sessions").description], row or ()))
+                dc_id, auth_key, account_id, api_id = row.get('dc_id'), row.get('auth_key'), row.get('user_id'), row.get('api_id')
+                if row.get('test_mode'):
+                    raise ValueError("Test server sessions are not supported")
+                if auth_key and dc_id not in SessionFileParser.DC_ADDRESSES:
+                    raise ValueError(f"Unknown DC ID: {dc_id}")
+                server_address, port = SessionFileParser.DC_ADDRESSES.get(dc_id), 443
+            else:
+                raise ValueError("Not a Telethon or Pyrogram session file")
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"Unreadable session file: {e}")
+        finally:
+            connection.close()
+        
+        if not auth_key:
+            raise ValueError("Session file has no auth key")
+        
+        session = StringSession()
+        session.set_dc(dc_id, server_address, port)
+        session.auth_key = AuthKey(auth_key)
+        
+        record = {
+            'file': path,
+            'format': session_format,
+            'dc_id': dc_id,
+            'session': session.save(),
+            'account_id': account_id,
+            'api_id': api_id,
+            'api_hash': None,
+            'phone': None
+        }
         
-        for session_id, session_data in sessions.items():
-            try:
-                logger.info(f"Attempting to send reaction with session {session_id}")
-                
-                # Validate session data
-                if 'session' not in session_data or not session_data['session']:
-                    logger.error(f"Session string missing for session {session_id}")
-                    continue
-                    
-                if 'api_id' not in session_data or not session_data['api_id']:
-                    logger.error(f"API ID missing for session {session_id}")
-                    continue
-                    
-                if 'api_hash' not in session_data or not session_data['api_hash']:
-                    logger.error(f"API hash missing for session {session_id}")
-                    continue
-                
-                # Create client with session string
-                client = TelegramClient(
-                    StringSession(session_data['session']),
-                    int(session_data['api_id']),
-                    session_data['api_hash']
-                )
-                
-                # Connect and send reaction
-                await client.connect()
-                if not await client.is_user_authorized():
-                    logger.error(f"Session {session_id} is not authorized")
-                    await client.disconnect()
-                    continue
-                
-                # Get the chat entity
-                chat_entity = await client.get_entity(chat_username)
-                logger.info(f"Found chat entity: {chat_entity.title if hasattr(chat_entity, 'title') else chat_entity}")
-                
-                # Use SendReactionRequest from the appropriate module
-                try:
-                    from telethon.tl.functions.messages import SendReactionRequest
-                    
-                    # Choose a random reaction from the config
-                    reaction = random.choice(Config.REACTION_LIST)
-                    logger.info(f"Sending reaction {reaction} to message {message_id}")
-                    
-                    # Send the reaction
-                    result = await client(SendReactionRequest(
-                        peer=chat_entity,
-                        msg_id=message_id,
-                        reaction=[types.ReactionEmoji(emoticon=reaction)]
-                    ))
-                    
-                    logger.info(f"Successfully sent reaction with session {session_id}")
-                    success_count += 1
-                except ImportError:
-                    # Try alternative method if SendReactionRequest is not available
-                    logger.warning("SendReactionRequest not available, trying alternative method")
-                    try:
-                        # Get the message first
-                        message = await client.get_messages(chat_entity, ids=message_id)
-                        if not message:
-                            logger.error(f"Could not find message with ID {message_id}")
-                            continue
-                            
-                        # Try to use the react method if available
-                        reaction = random.choice(Config.REACTION_LIST)
-                        await message.react(reaction)
-                        logger.info(f"Successfully sent reaction with alternative method")
-                        success_count += 1
-                    except Exception as e:
-                        logger.error(f"Failed to send reaction with alternative method: {str(e)}")
-                        continue
-                
-                await client.disconnect()
-                
-            except Exception as e:
-                logger.error(f"Error sending reaction with session {session_id}: {str(e)}")
-                logger.error(traceback.format_exc())
-                continue
+        side_file = os.path.splitext(path)[0] + '.json'
+        if os.path.exists(side_file):
+            with open(side_file, 'r', encoding='utf-8') as file:
+                side = json.load(file)
+            record['api_id'] = side.get('api_id') or side.get('app_id') or record['api_id']
+            record['api_hash'] = side.get('api_hash') or side.get('app_hash')
+            record['phone'] = side.get('phone')
+            record['account_id'] = record['account_id'] or side.get('user_id') or side.get('id')
         
-        logger.info(f"Sent reactions with {success_count} out of {len(sessions)} accounts")
-        return success_count
+        return record
 
 
+class SessionManager:
+    """
+    Manage Telegram sessions using Telethon.
+    """
+    
+    _index = None
+    _index_version = None
 
-class Keyboards:
-    """Generate keyboards for the bot."""
     
     @staticmethod
-    def home_keyboard():
-        """Generate the home keyboard."""
-        keyboard = InlineKeyboardMarkup()
-        keyboard.add(InlineKeyboardButton(Language.get_text("manager_title"), callback_data='not'))
-        keyboard.add(
-            InlineKeyboardButton(Language.get_text("add_account"), callback_data='add_account'), 
-            InlineKeyboardButton(Language.get_text("show_accounts"), callback_data="show_accounts")
-        )
-        keyboard.add(InlineKeyboardButton(Language.get_text("account_tools"), callback_data='not'))
-        keyboard.add(
-            InlineKeyboardButton(Language.get_text("send_message"), callback_data='tool_send_message'),
-            InlineKeyboardButton(Language.get_text("join_channel"), callback_data='tool_join_channel')
-        )
-        keyboard.add(InlineKeyboardButton(Language.get_text("send_reaction"), callback_data='tool_reaction'))
-        return keyboard
+    def read_sessions():
+        """
+        Get the sessions data from the in-memory store.
+        
+        The returned dict is the live copy; change it only through the methods below.
+        """
+
+        return session_store.load()
     
     @staticmethod
-    def back_home_keyboard():
-        """Generate the back home keyboard."""
-        keyboard = InlineKeyboardMarkup()
-        keyboard.add(InlineKeyboardButton(Language.get_text("back"), callback_data='back_home'))
-        return keyboard
+    def get_session_count():
+        """Get the count of sessions."""
+
+        sessions = SessionManager.read_sessions()
+        return len(sessions['sessions'])
     
     @staticmethod
-    def accounts_keyboard():
-        """Generate the accounts keyboard."""
-        sessions = SessionManager.read_sessions()
-        keyboard = InlineKeyboardMarkup(row_width=4)
-        keyboard.add(
-            InlineKeyboardButton(Language.get_text("id_header"), callback_data="not"),
-            InlineKeyboardButton(Language.get_text("name_header"), callback_data="not"),
-            InlineKeyboardButton(Language.get_text("view_header"), callback_data="not"),
-            InlineKeyboardButton(Language.get_text("delete_header"), callback_data="not")
-        )
-        
-        if len(sessions['sessions']) > 0:
-            for session_id, session_data in sessions['sessions'].items():
-                # Show the actual account ID instead of session number
-                account_id = session_data.get('account_id', session_id.split('_')[1])
-                
-                # Create name button (full name if available)
-                full_name = session_data.get('first_name', '')
-                if session_data.get('last_name'):
-                    full_name += f" {session_data.get('last_name')}"
-                
-                # Create view details button
-                view_button = InlineKeyboardButton(
-                    Language.get_text("view_button"), 
-                    callback_data=f"view_account:{session_id}"
-                )
-                
-                # Create delete button
-                keyboard.add(
-                    InlineKeyboardButton(account_id, callback_data="not"),
-                    InlineKeyboardButton(full_name, callback_data=f"edit_account:{session_id}"),
-                    view_button,
-                    InlineKeyboardButton(Language.get_text("delete_button"), callback_data=f"delete_session:{session_id}")
-                )
-        else:
-            keyboard.add(InlineKeyboardButton(Language.get_text("no_accounts"), callback_data="not"))
+    def add_session(api_id, api_hash, phone, session_string, first_name, account_id, username):
+        """
+        Add a session, or refresh the stored one of the same account or phone.
         
-        keyboard.add(InlineKeyboardButton(Language.get_text("back_button"), callback_data="back_home"))
-        return keyboard
+        The file is written in the background.
+        """
+
+        return SessionManager.add_sessions([{
+            "api_hash": api_hash,
+            "api_id": api_id,
+            "phone": phone,
+            "session": session_string,
+            "first_name": first_name,
+            "username": username,
+            "account_id": account_id
+        }])[0]
     
     @staticmethod
-    def account_details_keyboard(session_id):
-        """Generate the account details keyboard."""
-        keyboard = InlineKeyboardMarkup(row_width=2)
-        keyboard.add(
-            InlineKeyboardButton(Language.get_text("edit_profile"), callback_data=f"edit_account:{session_id}"),
-            InlineKeyboardButton(Language.get_text("change_2fa"), callback_data=f"change_2fa:{session_id}")
-        )
-        keyboard.add(
-            InlineKeyboardButton(Language.get_text("manage_sessions"), callback_data=f"manage_sessions:{session_id}")
-        )
-        keyboard.add(InlineKeyboardButton(Language.get_text("back"), callback_data="show_accounts"))
-        return keyboard
+    async def add_session_async(*args):
+        """Add a new session and wait until it is saved."""
+
+        session_id = SessionManager.add_session(*args)
+        await session_store.wait_saved()
+        return session_id
     
     @staticmethod
-    def edit_profile_keyboard(session_id):
-        """Generate the edit profile keyboard."""
-        keyboard = InlineKeyboardMarkup(row_width=2)
-        keyboard.add(
-            InlineKeyboardButton(Language.get_text("edit_first_name"), callback_data=f"edit_first_name:{session_id}"),
-            InlineKeyboardButton(Language.get_text("edit_last_name"), callback_data=f"edit_last_name:{session_id}")
-        )
-        keyboard.add(
-            InlineKeyboardButton(Language.get_text("edit_username"), callback_data=f"edit_username:{session_id}"),
-            InlineKeyboardButton(Language.get_text("edit_bio"), callback_data=f"edit_bio:{session_id}")
-        )
-        keyboard.add(InlineKeyboardButton(Language.get_text("back"), callback_data=f"view_account:{session_id}"))
-        return keyboard
+    def delete_session(session_id):
+        """Delete a session; the file is written in the background."""
+
+        if session_id not in SessionManager.read_sessions()['sessions']:
+            return False
+        
+        session_store.mutate(lambda data: session_store.remove_record(data, session_id))
+        return True
     
     @staticmethod
-    def manage_sessions_keyboard(session_id):
-        """Generate the manage sessions keyboard."""
-        keyboard = InlineKeyboardMarkup()
-        keyboard.add(InlineKeyboardButton(Language.get_text("view_active_sessions"), callback_data=f"view_active_sessions:{session_id}"))
-        keyboard.add(InlineKeyboardButton(Language.get_text("terminate_all_sessions"), callback_data=f"terminate_all:{session_id}"))
-        keyboard.add(InlineKeyboardButton(Language.get_text("back"), callback_data=f"view_account:{session_id}"))
-        return keyboard
+    async def delete_session_async(session_id):
+        """Delete a session and wait until the change is saved."""
+
+        deleted = SessionManager.delete_session(session_id)
+        await session_store.wait_saved()
+        return deleted
     
     @staticmethod
-    def change_2fa_keyboard(session_id):
-        """Generate the change 2FA keyboard."""
-        keyboard = InlineKeyboardMarkup()
-        keyboard.add(InlineKeyboardButton(Language.get_text("set_change_password"), callback_data=f"set_2fa:{session_id}"))
-        keyboard.add(InlineKeyboardButton(Language.get_text("back"), callback_data=f"view_account:{session_id}"))
-        return keyboard
-
+    def add_sessions(records):
+        """
+        Add several sessions with a single write.
+        
+        New sessions get the next number of a persisted counter, so numbers are
+        never reused. A record whose account ID (or else phone) is already stored
+        updates that session in place instead of adding a second one.
+        
+        Args:
+            records (list): Session records with the same fields add_session stores
+            
+        Returns:
+            list: Session IDs of the added or updated sessions
+        """
+        if not records:
+            return []
+        
+        def add(data):
+            session_ids = []
+            for record in records:
+                record = session_store.attach_credential(data, record)
+                session_id = session_store.find_account(record.get('account_id'), record.get('phone'))
+                
+                if session_id:
+                    fields = {field: value for field, value in record.items() if value not in (None, '')}
+                    fields = session_store.seal(fields, data['sessions'][session_id].get('id'))
+                    # The health state belonged to the replaced session string
+                    session_store.update_record(data, session_id, fields, drop=('health',))
+                else:
+                    number = session_store.allocate_id(data)
+                    session_id = f"session_{number}"
+                    session_store.put_record(data, session_id, session_store.seal({**record, "id": number}))
+                session_ids.append(session_id)
+            return session_ids
+        
+        return session_store.mutate(add)
+    
+    @staticmethod
+    async def add_sessions_async(records):
+        """Add several sessions and wait until they are saved."""
 
+        session_ids = SessionManager.add_sessions(records)
+        await session_store.wait_saved()
+        return session_ids
+    
+    @staticmethod
+    def write_sessions(sessions):
+        """Replace all sessions data; the file is written in the background."""
 
-class Messages:
-    """Store message templates for the bot with language support."""
+        # The argument may be the live data from read_sessions, which replace clears
+        sessions = {**sessions, 'sessions': dict(sessions['sessions'])}
+        
+        def replace(data):
+            kept = {key: data[key] for key in ('encryption', 'credentials', 'next_id') if key in data}
+            data.clear()
+            data.update(sessions)
+            data.update(kept)
+            session_store._credentials = None
+            session_store._unique = None
+            session_store._init_counter(data)
+            data['sessions'] = {
+                session_id: session_store.seal(session_store.attach_credential(data, session_store._with_id(data, record)))
+                for session_id, record in sessions['sessions'].items()
+            }
+        
+        session_store.mutate(replace)
     
-    @classmethod
-    def get(cls, key, **kwargs):
-        """Get message text in the current language with optional formatting."""
-        text = Language.get_text(key)
-        if kwargs:
-            try:
-                return text.format(**kwargs)
-            except KeyError as e:
-                logging.error(f"Missing format key in message: {e}")
-                return text
-        return text
+    @staticmethod
+    def update_sessions(updates):
+        """
+        Apply field updates to several sessions with a single write.
+        
+        Args:
+            updates (dict): Mapping of session ID to a dict of fields to set
+            
+        Returns:
+            int: Number of sessions updated
+        """
+        sessions = SessionManager.read_sessions()['sessions']
+        updates = {session_id: fields for session_id, fields in updates.items() if session_id in sessions}
+        if not updates:
+            return 0
+        
+        def update(data):
+            for session_id, fields in updates.items():
+                record = data['sessions'][session_id]
+                fields = session_store.attach_credential(data, fields, record)
+                session_store.update_record(data, session_id, session_store.seal(fields, record.get('id')))
+        
+        session_store.mutate(update)
+        return len(updates)
     
+    @staticmethod
+    async def update_sessions_async(updates):
+        """Apply field updates to several sessions and wait until they are saved."""
+
+        updated = SessionManager.update_sessions(updates)
+        await session_store.wait_saved()
+        return updated
     
-    WELCOME = Language.get_text("welcome")
-    SHOW_ACCOUNTS = Language.get_text("show_accounts")
-    ADD_ACCOUNT = Language.get_text("add_account")
-    API_HASH_PROMPT = Language.get_text("api_hash_prompt")
-    API_ID_PROMPT = Language.get_text("api_id_prompt")
-    PHONE_PROMPT = Language.get_text("phone_prompt")
-    CODE_PROMPT = Language.get_text("code_prompt")
-    PASSWORD_PROMPT = Language.get_text("password_prompt")
-    ACCOUNT_ADDED = Language.get_text("account_added")
-    EDIT_FIRST_NAME_PROMPT = Language.get_text("edit_first_name_prompt")
-    EDIT_LAST_NAME_PROMPT = Language.get_text("edit_last_name_prompt")
-    EDIT_USERNAME_PROMPT = Language.get_text("edit_username_prompt")
-    EDIT_BIO_PROMPT = Language.get_text("edit_bio_prompt")
-    CURRENT_2FA_PROMPT = Language.get_text("current_2fa_prompt")
-    NEW_2FA_PROMPT = Language.get_text("new_2fa_prompt")
-    MESSAGE_USERNAME_PROMPT = Language.get_text("message_username_prompt")
-    MESSAGE_CONTENT_PROMPT = Language.get_text("message_content_prompt")
-    JOIN_CHANNEL_PROMPT = Language.get_text("join_channel_prompt")
-    REACTION_PROMPT = Language.get_text("reaction_prompt")
+    @staticmethod
+    def get_credentials():
+        """Get every API credential as credential ID -> (api_id, api_hash)."""
+
+        return session_store.credentials()
     
-    @classmethod
-    def update_messages(cls):
-        """Update all messages with current language"""
-        cls.WELCOME = Language.get_text("welcome")
-        cls.SHOW_ACCOUNTS = Language.get_text("show_accounts")
-        cls.ADD_ACCOUNT = Language.get_text("add_account")
-        cls.API_HASH_PROMPT = Language.get_text("api_hash_prompt")
-        cls.API_ID_PROMPT = Language.get_text("api_id_prompt")
-        cls.PHONE_PROMPT = Language.get_text("phone_prompt")
-        cls.CODE_PROMPT = Language.get_text("code_prompt")
-        cls.PASSWORD_PROMPT = Language.get_text("password_prompt")
-        cls.ACCOUNT_ADDED = Language.get_text("account_added")
-        cls.EDIT_FIRST_NAME_PROMPT = Language.get_text("edit_first_name_prompt")
-        cls.EDIT_LAST_NAME_PROMPT = Language.get_text("edit_last_name_prompt")
-        cls.EDIT_USERNAME_PROMPT = Language.get_text("edit_username_prompt")
-        cls.EDIT_BIO_PROMPT = Language.get_text("edit_bio_prompt")
-        cls.CURRENT_2FA_PROMPT = Language.get_text("current_2fa_prompt")
-        cls.NEW_2FA_PROMPT = Language.get_text("new_2fa_prompt")
-        cls.MESSAGE_USERNAME_PROMPT = Language.get_text("message_username_prompt")
-        cls.MESSAGE_CONTENT_PROMPT = Language.get_text("message_content_prompt")
-        cls.JOIN_CHANNEL_PROMPT = Language.get_text("join_channel_prompt")
-        cls.REACTION_PROMPT = Language.get_text("reaction_prompt")
+    @staticmethod
+    def credentials_for(session_data):
+        """
+        Get the API ID and hash a session connects with.
+        
+        Returns:
+            tuple: (api_id, api_hash)
+            
+        Raises:
+            ValueError: If the session has no known credential
+        """
+        credential = session_store.credentials().get(session_data.get('credential_id'))
+        if credential is None:
+            raise ValueError("Missing API credentials in session data")
+        return credential
     
     @staticmethod
-    def account_details(details):
-        """Format account details message."""
-        has_photo = "Yes" if details['has_photo'] else "No"
-        premium = "Yes" if details['premium'] else "No"
-        verified = "Yes" if details['verified'] else "No"
-        restricted = "Yes" if details['restricted'] else "No"
-        has_2fa = "Yes" if details['has_2fa'] else "No"
-        username = '@' + details['username'] if details['username'] else '-'
+    def credential_usage():
+        """
+        Get the sessions using each API credential.
         
-        # Format the details based on the current language
-        return Language.get_text("account_details").format(
-            id=details['id'],
-            first_name=details['first_name'] or '-',
-            last_name=details['last_name'] or '-',
-            username=username,
-            phone=details['phone'],
-            bio=details['bio'] or '-',
-            has_photo=has_photo,
-            premium=premium,
-            verified=verified,
-            restricted=restricted,
-            sessions_count=details['sessions_count'],
-            has_2fa=has_2fa
-        )
-
-
-# Initialize the bot
-initialize_data()
-bot = AsyncTeleBot(Config.BOT_TOKEN)
-
-# Create Messages instance
-messages = Messages()
-
-# Set up bot commands
-bot_commands = [
-    telebot_types.BotCommand("start", "Start the bot"),
-    telebot_types.BotCommand("help", "Show help information"),
-    telebot_types.BotCommand("eng", "Switch to English language"),
-    telebot_types.BotCommand("fa", "Switch to Persian language")
-]
+        Returns:
+            dict: Credential ID -> {'api_id': int, 'session_ids': list}
+        """
+        usage = {
+            credential_id: {'api_id': api_id, 'session_ids': []}
+            for credential_id, (api_id, _) in SessionManager.get_credentials().items()
+        }
+        for session_id, session_data in SessionManager.read_sessions()['sessions'].items():
+            if session_data.get('credential_id') in usage:
+                usage[session_data['credential_id']]['session_ids'].append(session_id)
+        return usage
+    
+    @staticmethod
+    def update_credential(credential_id, api_id=None, api_hash=None):
+        """Change an API credential for every session using it, e.g. to rotate its hash."""
 
-# State variables
-state = {
-    'waiting_for_input': False,
-    'current_action': None,
-    'temp_data': {},
-    'main_message_id': None,  # Store the main message ID for editing
-    'chat_id': None,  # Store the chat ID for editing
-    'add_account': {
-        'api_hash': None,
-        'api_id': None,
-        'phone': None,
-        'code': None,
-        'password': None,
-        'client': None,
-        'chat_id': None,
-        'message_id': None
-    }
-}
+        known = SessionManager.get_credentials().get(credential_id)
+        if known is None:
+            return False
+        
+        credential = (int(api_id) if api_id else known[0], api_hash or known[1])
+        
+        def update(data):
+            data['credentials'][credential_id] = session_store.seal(
+                {'api_id': credential[0], 'api_hash': credential[1]}, credential_id
+            )
+            session_store.credentials()[credential_id] = credential
+        
+        session_store.mutate(update)
+        return True
+    
+    @staticmethod
+    def reveal(session_data, field):
+        """
+        Get the cleartext of a field of a session record.
+        
+        Secret fields are stored encrypted when SESSIONS_PASSPHRASE is set; this is
+        the only place they are decrypted.
+        """
+        return session_store.reveal(field, session_data.get(field), session_data.get('id'))
+    
+    @staticmethod
+    def set_tags(session_id, tags):
+        """Replace the tags of a session."""
 
+        normalized = sorted({tag.strip().lstrip('#').lower() for tag in tags if tag.strip().lstrip('#')})
+        return SessionManager.update_sessions({session_id: {'tags': normalized}}) == 1
+    
+    @staticmethod
+    def get_index():
+        """Get the tag index for the current sessions, rebuilding it after any change."""
 
-# Command handlers
-@bot.message_handler(commands=['start'])
-async def start_command(message):
-    """Handle the /start command."""
-    # Make sure messages are updated with current language
-    Messages.update_messages()
+        if SessionManager._index is None or SessionManager._index_version != session_store.version:
+            SessionManager._index = SessionIndex(SessionManager.read_sessions()['sessions'])
+            SessionManager._index_version = session_store.version
+        return SessionManager._index
     
-    # Reset waiting state
-    state['waiting_for_input'] = False
-    
-    # Send the main message and store its ID for future editing using safe_execute
-    sent_message = await safe_execute(
-        bot.send_message(
-            message.chat.id,
-            Messages.WELCOME,
-            reply_markup=Keyboards.home_keyboard()
-        )
-    )
-    
-    # If message sending failed, return early
-    if sent_message is None:
-        return
-    
-    # Store the message ID and chat ID in state for future editing
-    state['main_message_id'] = sent_message.message_id
-    state['chat_id'] = message.chat.id
-
-
-# Callback query handlers
-@bot.callback_query_handler(func=lambda call: call.data == 'back_home')
-async def back_home_callback(call):
-    """Handle the back home callback."""
-    # Reset state
-    state['waiting_for_input'] = False
-    state['current_action'] = None
+    @staticmethod
+    def select_sessions(selector=None):
+        """
+        Get the sessions matched by a target selector.
+        
+        Args:
+            selector (TargetSelector, optional): Selector to resolve, None selects every session
+            
+        Returns:
+            dict: Matching sessions keyed by session ID
+        """
+        sessions = SessionManager.read_sessions()['sessions']
+        if selector is None or selector.is_all():
+            return sessions
+        
+        selected = selector.resolve(SessionManager.get_index())
+        return {session_id: sessions[session_id] for session_id in sessions if session_id in selected}
     
-    # Use the stored message ID or the current message ID
-    message_id = state.get('main_message_id') or call.message.message_id
-    chat_id = state.get('chat_id') or call.message.chat.id
+    @staticmethod
+    async def create_session(api_id, api_hash, phone, bot, chat_id, message_id):
+        """Create a new Telethon session."""
+        
+        try:
+            client = TelegramClient(StringSession(), api_id, api_hash)
+            await retry_policy.run(client.connect)
+            
+            
+            await bot.send_message(
+                chat_id,
+                "Sending code request..."
+            )
+            
+            sent = await client.send_code_request(phone)
+            
+            return True, client
+        except Exception as e:
+            return False, str(e)
     
-    # Edit the message instead of sending a new one
-    try:
-        await bot.edit_message_text(
-            Messages.WELCOME,
-            chat_id=chat_id,
-            message_id=message_id,
-            reply_markup=Keyboards.home_keyboard()
-        )
-    except Exception as e:
-        # Ignore 'message is not modified' errors as they're not critical
-        if "message is not modified" not in str(e):
-            logger.error(f"Error in back_home_callback: {e}")
-            # For other errors, try to send a new message
+    @staticmethod
+    async def sign_in_with_code(client, phone, code, password=None):
+        """
+        Sign in with the received code.
+        
+        Args:
+            client (TelegramClient): Telethon client instance
+            phone (str): Phone number
+            code (str): Verification code
+            password (str, optional): Two-step verification password
+        
+        Returns:
+            tuple: (success, session_string or error message, user_info)
+        """
+        try:
             try:
-                await bot.send_message(
-                    chat_id=chat_id,
-                    text=Messages.WELCOME,
-                    reply_markup=Keyboards.home_keyboard()
-                )
-            except Exception as send_error:
-                logger.error(f"Failed to send new message: {send_error}")
-    
-    # Update the stored message ID and chat ID
-    state['main_message_id'] = message_id
-    state['chat_id'] = chat_id
-    
-    # Answer the callback query to remove the loading state
-    await bot.answer_callback_query(call.id)
 
+                user = await client.sign_in(phone, code)
+            except SessionPasswordNeededError:
 
-@bot.callback_query_handler(func=lambda call: call.data == 'add_account')
-async def add_account_callback(call):
-    """Handle the add account callback."""
-    # Reset add account state
-    state['add_account'] = {
-        'api_hash': None,
-        'api_id': None,
-        'phone': None,
-        'code': None,
-        'password': None,
-        'client': None,
-        'chat_id': call.message.chat.id,
-        'message_id': call.message.message_id
-    }
-    
-    # Set waiting state
-    state['waiting_for_input'] = True
-    state['current_action'] = 'api_hash'
-    
-    # Use the stored message ID or the current message ID
-    message_id = state.get('main_message_id') or call.message.message_id
-    chat_id = state.get('chat_id') or call.message.chat.id
-    
-    await bot.edit_message_text(
-        Messages.API_HASH_PROMPT,
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=Keyboards.back_home_keyboard()
-    )
-    
-    # Update the stored message ID and chat ID
-    state['main_message_id'] = message_id
-    state['chat_id'] = chat_id
-    
-    # Answer the callback query to remove the loading state
-    await bot.answer_callback_query(call.id)
-
+                if password:
+                    user = await client.sign_in(password=password)
+                else:
+                    return False, "Two-step verification is enabled. Please provide your password.", None
+            
 
-@bot.callback_query_handler(func=lambda call: call.data == 'show_accounts')
-async def show_accounts_callback(call):
-    """Handle the show accounts callback."""
-    # Use the stored message ID or the current message ID
-    message_id = state.get('main_message_id') or call.message.message_id
-    chat_id = state.get('chat_id') or call.message.chat.id
-    
-    # Edit the message instead of sending a new one
-    await bot.edit_message_text(
-        Messages.SHOW_ACCOUNTS,
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=Keyboards.accounts_keyboard()
-    )
-    
-    # Update the stored message ID and chat ID
-    state['main_message_id'] = message_id
-    state['chat_id'] = chat_id
-    
-    # Answer the callback query to remove the loading state
-    await bot.answer_callback_query(call.id)
+            session_string = client.session.save()
+            
 
+            user_info = {
+                "id": user.id,
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+                "username": user.username,
+                "phone": user.phone
+            }
+            
+            return True, session_string, user_info
+        except PhoneCodeInvalidError:
+            return False, "Invalid code. Please try again.", None
+        except PasswordHashInvalidError:
+            return False, "Invalid password. Please try again.", None
+        except Exception as e:
+            return False, str(e), None
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('delete_session:'))
-async def delete_session_callback(call):
-    """Handle the delete session callback."""
-    session_id = call.data.split(':')[1]
-    
-    # Delete session
-    success = SessionManager.delete_session(session_id)
-    
-    if success:
-        await bot.answer_callback_query(call.id, "Account deleted successfully!")
-    else:
-        await bot.answer_callback_query(call.id, "Failed to delete account!")
-    
-    # Update accounts list (using send_message instead of edit_message_text)
-    await bot.send_message(
-        call.message.chat.id,
-        Messages.SHOW_ACCOUNTS,
-        reply_markup=Keyboards.accounts_keyboard()
-    )
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'tool_send_message')
-async def tool_send_message_callback(call):
-    """Handle the tool send message callback."""
-    # Set waiting state
-    state['waiting_for_input'] = True
-    state['current_action'] = 'send_message_username'
-    state['temp_data'] = {}
-    
-    # Use the current message ID or store it for future edits
-    message_id = call.message.message_id
-    chat_id = call.message.chat.id
+class AccountManager:
+    """
+    Manage Telegram accounts and perform actions with them.
+    """
     
-    # Store these for future reference
-    state['main_message_id'] = message_id
-    state['chat_id'] = chat_id
+    PROFILE_FIELDS = ('first_name', 'last_name', 'bio', 'username')
+    PHONE_PATTERN = re.compile(r'^\+?[\d\s().-]{5,}$')
     
-    # Edit the main message to show the prompt
-    await bot.edit_message_text(
-        Messages.MESSAGE_USERNAME_PROMPT,
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=Keyboards.back_home_keyboard()
-    )
+    @staticmethod
+    async def _open_client(session_data):
+        """
+        Create, connect and authorize-check a Telethon client once.
+        
+        Args:
+            session_data (dict): Stored session record
+            
+        Returns:
+            TelegramClient: Connected client
+        """
+        api_id, api_hash = SessionManager.credentials_for(session_data)
+        client = TelegramClient(StringSession(SessionManager.reveal(session_data, 'session')), api_id, api_hash)
+        
+        try:
+            await client.connect()
+            
+            if not await client.is_user_authorized():
+                raise SessionInvalidError("Session is no longer valid")
+        except BaseException:
+            await client.disconnect()
+            raise
+        
+        return client
     
-    # Answer the callback query to remove the loading state
-    await bot.answer_callback_query(call.id)
-
-
-@bot.callback_query_handler(func=lambda call: call.data == 'tool_join_channel')
-async def tool_join_channel_callback(call):
-    """Handle the tool join channel callback."""
-    # Set waiting state
-    state['waiting_for_input'] = True
-    state['current_action'] = 'join_channel'
+    @staticmethod
+    async def connect_session(session_data, tracker=None):
+        """
+        Connect a client for a stored session, retrying transient failures.
+        
+        Args:
+            session_data (dict): Stored session record
+            tracker (dict, optional): Attempt tracker passed to the retry policy
+            
+        Returns:
+            TelegramClient: Connected client
+        """
+        return await retry_policy.run(lambda: AccountManager._open_client(session_data), tracker)
+    
+    @staticmethod
+    async def get_client_for_session(session_id):
+        """
+        Create and connect a Telethon client for a specific session.
+        
+        Args:
+            session_id (str): Session ID to create client for
+            
+        Returns:
+            tuple: (success, client or error message)
+        """
+        sessions = SessionManager.read_sessions()['sessions']
+        
+        if session_id not in sessions:
+            return False, "Session not found"
+        
+        try:
+            client = await AccountManager.connect_session(sessions[session_id])
+            return True, client
+        except Exception as e:
+            return False, str(e)
+    
+    @staticmethod
+    async def get_account_details(session_id):
+        """
+        Get detailed information about an account.
+        
+        Args:
+            session_id (str): Session ID to get details for
+            
+        Returns:
+            tuple: (success, account_details or error message)
+        """
+        success, client_or_error = await AccountManager.get_client_for_session(session_id)
+        
+        if not success:
+            return False, client_or_error
+        
+        client = client_or_error
+        
+        try:
+            
+            me = await client.get_me()
+            
+            
+            full = await client(functions.users.GetFullUserRequest(me.id))
+            bio = full.full_user.about if hasattr(full.full_user, 'about') else None
+            
+            
+            profile_photos = await client.get_profile_photos(me.id)
+            has_photo = len(profile_photos) > 0
+            
+            
+            active_sessions = await client(functions.account.GetAuthorizationsRequest())
+            
+            
+            password_settings = None
+            has_2fa = False
+            try:
+                password_settings = await client(functions.account.GetPasswordRequest())
+                has_2fa = password_settings.has_password
+            except Exception:
+                pass
+            
+            
+            account_details = {
+                "id": me.id,
+                "first_name": me.first_name,
+                "last_name": me.last_name,
+                "username": me.username,
+                "phone": me.phone,
+                "bio": bio,
+                "has_photo": has_photo,
+                "premium": me.premium if hasattr(me, 'premium') else False,
+                "verified": me.verified if hasattr(me, 'verified') else False,
+                "restricted": me.restricted if hasattr(me, 'restricted') else False,
+                "sessions_count": len(active_sessions.authorizations),
+                "has_2fa": has_2fa
+            }
+            
+            # Refresh the cached profile that bulk profile edits diff against
+            cached = SessionManager.read_sessions()['sessions'].get(session_id, {})
+            profile = {field: account_details[field] or '' for field in AccountManager.PROFILE_FIELDS}
+            if any(cached.get(field) != value for field, value in profile.items()):
+                SessionManager.update_sessions({session_id: profile})
+            
+            await client.disconnect()
+            return True, account_details
+        except Exception as e:
+            await client.disconnect()
+            return False, str(e)
+    
+    @staticmethod
+    async def update_profile(session_id, first_name=None, last_name=None, bio=None, username=None):
+        """
+        Update account profile information.
+        
+        Args:
+            session_id (str): Session ID to update profile for
+            first_name (str, optional): New first name
+            last_name (str, optional): New last name
+            bio (str, optional): New bio
+            username (str, optional): New username
+            
+        Returns:
+            tuple: (success, message)
+        """
+        success, client_or_error = await AccountManager.get_client_for_session(session_id)
+        
+        if not success:
+            return False, client_or_error
+        
+        client = client_or_error
+        
+        try:
+            # UpdateProfileRequest leaves fields that are not passed unchanged,
+            # so there is no need to fetch the current profile first
+            changes = {
+                field: value for field, value in
+                (('first_name', first_name), ('last_name', last_name), ('bio', bio),
+                 ('username', username.lstrip('@') if username is not None else None))
+                if value is not None
+            }
+            await AccountManager._apply_profile_changes(client, changes)
+            SessionManager.update_sessions({session_id: changes})
+            
+            await client.disconnect()
+            return True, "Profile updated successfully"
+        except Exception as e:
+            await client.disconnect()
+            return False, str(e)
+    
+    @staticmethod
+    def profile_changes(session_data, profile):
+        """
+        Get the profile fields that differ from the cached profile of an account.
+        
+        Fields that are not cached yet count as changed.
+        
+        Args:
+            session_data (dict): Stored session record
+            profile (dict): Wanted values of first_name, last_name, bio and username; None leaves a field as is
+            
+        Returns:
+            dict: Fields to change with their new values
+        """
+        changes = {}
+        for field in AccountManager.PROFILE_FIELDS:
+            value = profile.get(field)
+            if value is None:
+                continue
+            if field == 'username':
+                value = value.lstrip('@')
+            if field not in session_data or (session_data[field] or '') != value:
+                changes[field] = value
+        return changes
+    
+    @staticmethod
+    async def _apply_profile_changes(client, changes, tracker=None):
+        """Send only the profile requests needed for the changed fields."""
+
+        profile = {
+            request_field: changes[field]
+            for field, request_field in (('first_name', 'first_name'), ('last_name', 'last_name'), ('bio', 'about'))
+            if field in changes
+        }
+        if profile:
+            await retry_policy.run(lambda: client(functions.account.UpdateProfileRequest(**profile)), tracker)
+        
+        if 'username' in changes:
+            await retry_policy.run(
+                lambda: client(functions.account.UpdateUsernameRequest(username=changes['username'].lstrip('@'))),
+                tracker
+            )
+    
+    @staticmethod
+    def parse_profile_source(text, sessions):
+        """
+        Parse the wanted profiles for a bulk profile edit.
+        
+        Accepts either a CSV with an 'account_id', 'session_id' or 'phone'
+        column and any of the first_name, last_name, bio and username columns
+        (empty cells leave a field as is), or template lines such as
+        'bio: Admin of {username}' that apply to every account, rendered with
+        the account fields of MessageTemplate.
+        
+        Args:
+            text (str): CSV or template lines
+            sessions (dict): Sessions to match the CSV rows against
+            
+        Returns:
+            tuple: (dict of session ID to wanted profile, list of unmatched identifiers)
+            
+        Raises:
+            ValueError: If the text is neither a valid CSV nor valid template lines
+        """
+        first_line = text.strip().splitlines()[0].lower() if text.strip() else ''
+        if any(field in first_line.split(',') for field in ('session_id', 'account_id', 'phone')):
+            rows, unmatched = AccountManager.match_csv_rows(text, sessions)
+            profiles = {
+                session_id: {field: row.get(field) or None for field in AccountManager.PROFILE_FIELDS}
+                for session_id, row in rows.items()
+            }
+            return profiles, unmatched
+        
+        templates = {}
+        for line in text.strip().splitlines():
+            field, separator, template = line.partition(':')
+            field = field.strip().lower()
+            if not separator or field not in AccountManager.PROFILE_FIELDS:
+                raise ValueError(f"Expected 'field: template' with a field of {', '.join(AccountManager.PROFILE_FIELDS)}: {line}")
+            templates[field] = MessageTemplate(template.strip())
+            templates[field].validate(MessageTemplate.ACCOUNT_FIELDS)
+        
+        profiles = {}
+        for session_id, session_data in sessions.items():
+            values = MessageTemplate.account_values(session_data)
+            profiles[session_id] = {field: template.render(values) for field, template in templates.items()}
+        return profiles, []
+    
+    @staticmethod
+    async def update_profiles(profiles, selector=None, progress=None):
+        """
+        Apply wanted profiles to many accounts.
+        
+        Each wanted profile is diffed against the cached profile first.
+        Accounts with nothing to change are skipped without connecting, the
+        others only send the requests their changes need. The cached profiles
+        are updated in one store write at the end.
+        
+        Args:
+            profiles (dict): Session ID to wanted profile from parse_profile_source
+            selector (TargetSelector, optional): Accounts to use, defaults to all accounts
+            progress (callable, optional): Coroutine function called with the report after each account
+            
+        Returns:
+            BulkReport: Per-account results of the run
+        """
+        sessions = {
+            session_id: session_data for session_id, session_data in SessionManager.select_sessions(selector).items()
+            if session_id in profiles
+        }
+        changes = {
+            session_id: AccountManager.profile_changes(session_data, profiles[session_id])
+            for session_id, session_data in sessions.items()
+        }
+        unchanged = {session_id for session_id, fields in changes.items() if not fields}
+        session_updates = {}
+        
+        async def update(client, session_id, tracker):
+            await AccountManager._apply_profile_changes(client, changes[session_id], tracker)
+            session_updates[session_id] = changes[session_id]
+            return {'changed': ','.join(changes[session_id])}
+        
+        return await AccountManager.run_bulk_action(
+            'update_profile', update, sessions, skip_sessions=unchanged, extra_fields=['changed'],
+            progress=progress, session_updates=session_updates
+        )
+    
+    @staticmethod
+    async def update_2fa(session_id, current_password=None, new_password=None):
+        """
+        Update or set up 2FA password.
+        
+        Args:
+            session_id (str): Session ID to update 2FA for
+            current_password (str, optional): Current 2FA password
+            new_password (str): New 2FA password
+            
+        Returns:
+            tuple: (success, message)
+        """
+        success, client_or_error = await AccountManager.get_client_for_session(session_id)
+        
+        if not success:
+            return False, client_or_error
+        
+        client = client_or_error
+        
+        try:
+            # edit_2fa fetches the password settings itself and ignores the
+            # current password when the account has none
+            await client.edit_2fa(current_password, new_password)
+            
+            await client.disconnect()
+        except Exception as e:
+            await client.disconnect()
+            return False, str(e)
+        
+        # Keep the vault current, or the next rotate_2fa would send a stale password
+        if Config.VAULT_PASSPHRASE:
+            session_data = SessionManager.read_sessions()['sessions'].get(session_id, {})
+            try:
+                vault = await PasswordVault.open_shared()
+                vault.store(session_data.get('account_id') or session_id, new_password, session_id)
+                await vault.save_async()
+            except Exception as e:
+                logger.warning(f"2FA of {session_id} was changed but could not be saved in the vault: {e}")
+        
+        return True, "2FA updated successfully"
+    
+    
+    
+    @staticmethod
+    async def get_active_sessions(session_id):
+        """
+        Get detailed information about all active sessions for this account.
+        
+        Args:
+            session_id (str): Session ID to get sessions for
+            
+        Returns:
+            tuple: (success, sessions_list or error message)
+        """
+        success, client_or_error = await AccountManager.get_client_for_session(session_id)
+        
+        if not success:
+            return False, client_or_error
+        
+        client = client_or_error
+        
+        try:
+            result = await client(functions.account.GetAuthorizationsRequest())
+            sessions = []
+            
+            for auth in result.authorizations:
+                try:
+                    date_created = datetime.fromtimestamp(auth.date_created).strftime('%Y-%m-%d %H:%M:%S')
+                except (TypeError, ValueError):
+                    date_created = str(auth.date_created)
+                    
+                try:
+                    date_active = datetime.fromtimestamp(auth.date_active).strftime('%Y-%m-%d %H:%M:%S')
+                except (TypeError, ValueError):
+                    date_active = str(auth.date_active)
+                
+                session_info = {
+                    "hash": auth.hash,
+                    "device_model": auth.device_model,
+                    "platform": auth.platform,
+                    "system_version": auth.system_version,
+                    "api_id": auth.api_id,
+                    "app_name": auth.app_name,
+                    "app_version": auth.app_version,
+                    "date_created": date_created,
+                    "date_active": date_active,
+                    "ip": auth.ip,
+                    "country": auth.country,
+                    "region": auth.region,
+                    "is_current": auth.current,
+                    "is_official_app": auth.official_app,
+                    "is_password_pending": auth.password_pending
+                }
+                sessions.append(session_info)
+            
+            await client.disconnect()
+            return True, sessions
+        except Exception as e:
+            logger.error(f"Error in get_active_sessions: {str(e)}\n{traceback.format_exc()}")
+            await client.disconnect()
+            return False, str(e)
+            
+    @staticmethod
+    async def terminate_sessions(session_id, all_sessions=False, session_ids=None):
+        """
+        Terminate other sessions for this account.
+        
+        Args:
+            session_id (str): Session ID to terminate sessions for
+            all_sessions (bool): Whether to terminate all other sessions
+            session_ids (list, optional): List of specific session IDs to terminate
+            
+        Returns:
+            tuple: (success, message)
+        """
+        success, client_or_error = await AccountManager.get_client_for_session(session_id)
+        
+        if not success:
+            return False, client_or_error
+        
+        client = client_or_error
+        
+        try:
+            if all_sessions:
+                # Terminate all other sessions
+                await client(functions.auth.ResetAuthorizationsRequest())
+                message = "All other sessions terminated successfully"
+            elif session_ids:
+                # Terminate specific sessions concurrently
+                terminated, failed = await AccountManager._reset_authorizations(client, session_ids)
+                if failed:
+                    await client.disconnect()
+                    return False, (
+                        f"{len(terminated)} of {len(session_ids)} sessions terminated, failed: "
+                        + ', '.join(f"{auth_hash} ({error})" for auth_hash, error in failed.items())
+                    )
+                message = f"{len(terminated)} sessions terminated successfully"
+            else:
+                await client.disconnect()
+                return False, "No sessions specified to terminate"
+            
+            await client.disconnect()
+            return True, message
+        except Exception as e:
+            await client.disconnect()
+            return False, str(e)
+    
+    @staticmethod
+    async def _reset_authorizations(client, auth_hashes, tracker=None):
+        """
+        Terminate several sessions of one account concurrently.
+        
+        Args:
+            client (TelegramClient): Connected client
+            auth_hashes (list): Hashes of the sessions to terminate
+            tracker (dict, optional): Attempt tracker passed to the retry policy
+            
+        Returns:
+            tuple: (list of terminated hashes, dict of failed hash to error)
+        """
+        async def reset(auth_hash):
+            await retry_policy.run(
+                lambda: client(functions.account.ResetAuthorizationRequest(hash=int(auth_hash))), tracker
+            )
+        
+        results = await asyncio.gather(*(reset(auth_hash) for auth_hash in auth_hashes), return_exceptions=True)
+        
+        terminated = []
+        failed = {}
+        for auth_hash, result in zip(auth_hashes, results):
+            if isinstance(result, Exception):
+                failed[auth_hash] = result
+            else:
+                terminated.append(auth_hash)
+        return terminated, failed
+    
+    @staticmethod
+    def is_foreign_authorization(authorization, allowed_api_ids):
+        """
+        Check whether a session of an account was not created by this manager.
+        
+        A session is foreign when it uses an api_id outside allowed_api_ids, or
+        when Config.SWEEP_DEVICE_MODELS is set and its device model is not one
+        of them. The session the check runs from is never foreign.
+        
+        Args:
+            authorization (types.Authorization): Session from GetAuthorizationsRequest
+            allowed_api_ids (set): API IDs of the managed sessions
+            
+        Returns:
+            bool: True if the session is foreign
+        """
+        if authorization.current:
+            return False
+        if authorization.api_id not in allowed_api_ids:
+            return True
+        return bool(Config.SWEEP_DEVICE_MODELS) and authorization.device_model not in Config.SWEEP_DEVICE_MODELS
+    
+    @staticmethod
+    async def sweep_sessions(selector=None, terminate=False):
+        """
+        Check the active sessions of every account for sessions this manager did not create.
+        
+        Every selected account fetches its sessions in parallel. Foreign
+        sessions are listed in the report and, if terminate is set, terminated.
+        
+        Args:
+            selector (TargetSelector, optional): Accounts to sweep, defaults to all accounts
+            terminate (bool): Terminate the foreign sessions found
+            
+        Returns:
+            tuple: (BulkReport with the foreign sessions per account, Counter of foreign and terminated sessions)
+        """
+        allowed_api_ids = {api_id for api_id, _ in SessionManager.get_credentials().values()} | Config.SWEEP_ALLOWED_API_IDS
+        totals = Counter()
+        
+        async def sweep(client, session_id, tracker):
+            result = await retry_policy.run(lambda: client(functions.account.GetAuthorizationsRequest()), tracker)
+            foreign = [
+                authorization for authorization in result.authorizations
+                if AccountManager.is_foreign_authorization(authorization, allowed_api_ids)
+            ]
+            
+            terminated = []
+            if terminate and foreign:
+                terminated, failed = await AccountManager._reset_authorizations(
+                    client, [authorization.hash for authorization in foreign], tracker
+                )
+                for auth_hash, error in failed.items():
+                    logger.error(f"Could not terminate session {auth_hash} of {session_id}: {error}")
+            
+            totals['foreign'] += len(foreign)
+            totals['terminated'] += len(terminated)
+            return {
+                'sessions': len(result.authorizations),
+                'foreign': len(foreign),
+                'terminated': len(terminated),
+                'foreign_sessions': '; '.join(
+                    f"{authorization.hash} {authorization.app_name} {authorization.app_version} "
+                    f"api_id={authorization.api_id} device={authorization.device_model} "
+                    f"ip={authorization.ip} {authorization.country}"
+                    for authorization in foreign
+                )
+            }
+        
+        report = await AccountManager.run_bulk_action(
+            'session_sweep', sweep, SessionManager.select_sessions(selector),
+            extra_fields=['sessions', 'foreign', 'terminated', 'foreign_sessions']
+        )
+        return report, totals
+    
+    @staticmethod
+    def parse_password_rows(text, sessions):
+        """
+        Parse a CSV of 2FA passwords and match its rows to sessions.
+        
+        The CSV is read by match_csv_rows and may have 'current_password' and
+        'new_password' columns. Empty values are left to the vault and the
+        password generator.
+        
+        Args:
+            text (str): CSV text
+            sessions (dict): Sessions to match the rows against
+            
+        Returns:
+            tuple: (dict of session ID to (current password, new password), list of unmatched identifiers)
+            
+        Raises:
+            ValueError: If the CSV has no identifier column
+        """
+        rows, unmatched = AccountManager.match_csv_rows(text, sessions)
+        passwords = {
+            session_id: (row.get('current_password') or None, row.get('new_password') or None)
+            for session_id, row in rows.items()
+        }
+        return passwords, unmatched
+    
+    @staticmethod
+    def match_csv_rows(text, sessions):
+        """
+        Parse a CSV keyed by account and match its rows to sessions.
+        
+        The header must have an 'account_id', 'session_id' or 'phone' column;
+        the first one present identifies the account. Column names are
+        lowercased and values stripped.
+        
+        Args:
+            text (str): CSV text
+            sessions (dict): Sessions to match the rows against
+            
+        Returns:
+            tuple: (dict of session ID to row, list of unmatched identifiers)
+            
+        Raises:
+            ValueError: If the CSV has no identifier column
+        """
+        reader = csv.DictReader(text.strip().splitlines())
+        fields = [field.strip().lower() for field in reader.fieldnames or []]
+        id_field = next((field for field in ('session_id', 'account_id', 'phone') if field in fields), None)
+        if id_field is None:
+            raise ValueError("The CSV needs an account_id, session_id or phone column")
+        
+        lookup = {}
+        for session_id, session_data in sessions.items():
+            lookup[('session_id', session_id)] = session_id
+            lookup[('account_id', str(session_data.get('account_id')))] = session_id
+            lookup[('phone', str(session_data.get('phone', '')).lstrip('+'))] = session_id
+        
+        rows = {}
+        unmatched = []
+        for row in reader:
+            row = {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+            identifier = row.get(id_field, '')
+            session_id = lookup.get((id_field, identifier.lstrip('+') if id_field == 'phone' else identifier))
+            if session_id is None:
+                unmatched.append(identifier)
+                continue
+            rows[session_id] = row
+        
+        return rows, unmatched
+    
+    @staticmethod
+    async def rotate_2fa(passwords=None, selector=None, progress=None):
+        """
+        Set a new 2FA password on many accounts.
+        
+        Current passwords come from the passwords mapping or, failing that, the
+        vault. New passwords come from the mapping or are generated per
+        account. Every new password is written to the encrypted vault as
+        pending before it is sent and as current once Telegram accepts it; the
+        stored current password is only replaced at that point. When Telegram
+        rejects the current password and an earlier run left a pending one,
+        that change went through unconfirmed, so the change is sent again with
+        the pending password. The change is otherwise sent once, without the
+        retry policy, since repeating an applied change with the old password
+        would fail.
+        
+        Args:
+            passwords (dict, optional): Session ID to (current password, new password); limits the
+                run to those sessions. Without it every selected account gets a generated password
+            selector (TargetSelector, optional): Accounts to use, defaults to all accounts
+            progress (callable, optional): Coroutine function called with the report after each account
+            
+        Returns:
+            BulkReport: Per-account results of the run
+            
+        Raises:
+            ValueError: If the vault cannot be opened
+        """
+        vault = await PasswordVault.open_shared()
+        
+        sessions = SessionManager.select_sessions(selector)
+        if passwords is not None:
+            sessions = {session_id: data for session_id, data in sessions.items() if session_id in passwords}
+        
+        async def rotate(client, session_id, tracker):
+            account_id = sessions[session_id].get('account_id') or session_id
+            current_password, new_password = (passwords or {}).get(session_id, (None, None))
+            current_password = current_password or vault.get(account_id)
+            new_password = new_password or secrets.token_urlsafe(18)
+            previous_pending = vault.get_pending(account_id)
+            
+            vault.set_pending(account_id, new_password, session_id)
+            await vault.save_async()
+            
+            tracker['attempts'] += 1
+            try:
+                try:
+                    await client.edit_2fa(current_password, new_password)
+                except PasswordHashInvalidError:
+                    if not previous_pending or previous_pending == current_password:
+                        raise
+                    tracker['attempts'] += 1
+                    try:
+                        await client.edit_2fa(previous_pending, new_password)
+                    except PasswordHashInvalidError:
+                        # Neither password is the account's, so the pending one is no use either
+                        previous_pending = None
+                        raise
+            except Exception as e:
+                # Only a timeout or lost connection may hide an applied change
+                if RetryPolicy.classify(e) != RetryPolicy.RETRYABLE:
+                    vault.set_pending(account_id, previous_pending, session_id)
+                    await vault.save_async()
+                raise
+            
+            vault.store(account_id, new_password, session_id)
+            await vault.save_async()
+        
+        return await AccountManager.run_bulk_action('rotate_2fa', rotate, sessions, progress=progress)
+    
+    @staticmethod
+    async def import_session_files(directory, api_id=None, api_hash=None, verify=False):
+        """
+        Import every .session file of a directory into the session store.
+        
+        Files are parsed offline in a process pool and streamed into the store
+        in batches of Config.IMPORT_BATCH_SIZE. Files whose auth key is already
+        stored are skipped. A file of an account already stored replaces its
+        session and is reported 'updated'; a second file of the same account
+        in one import is reported 'duplicate' and not imported. With verify set, the imported accounts then log in
+        concurrently to fill in account_id, first_name, username and phone.
+        
+        Args:
+            directory (str): Directory to scan
+            api_id (int, optional): API ID for files without one of their own
+            api_hash (str, optional): API hash for files without one of their own
+            verify (bool): Check the imported sessions online
+            
+        Returns:
+            tuple: (BulkReport of the import, BulkReport of the verification or None)
+            
+        Raises:
+            ValueError: If the directory does not exist
+        """
+        if not os.path.isdir(directory):
+            raise ValueError(f"Directory not found: {directory}")
+        
+        paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.session')
+        )
+        # Digests, so finding duplicates never decrypts the stored sessions
+        known_sessions = session_store.session_digests()
+        # Session IDs in import order, without repeats
+        imported = {}
+        seen_accounts = set()
+        batch = []
+        
+        logger.info(f"Importing {len(paths)} session files from {directory}")
+        
+        def flush():
+            accepted = []
+            for record, path in batch:
+                existing = session_store.find_account(record['account_id'], record['phone'])
+                keys = {existing} if existing else set()
+                for field in SessionStore.UNIQUE_FIELDS:
+                    key = SessionStore._unique_key(field, record[field])
+                    if key is not None:
+                        keys.add(f"{field}:{key}")
+                
+                # Another file of this import already holds the account; the first one wins
+                if keys & seen_accounts:
+                    logger.warning(f"Not importing {path}: another file of this import is the same account")
+                    report.add(existing or '', record['account_id'], 'duplicate', file=path)
+                    continue
+                seen_accounts.update(keys)
+                accepted.append((record, path, 'updated' if existing else 'success'))
+            
+            session_ids = SessionManager.add_sessions([record for record, _, _ in accepted])
+            for session_id, (record, path, status) in zip(session_ids, accepted):
+                report.add(session_id, record['account_id'], status, file=path)
+            imported.update(dict.fromkeys(session_ids))
+            batch.clear()
+        
+        loop = asyncio.get_running_loop()
+        
+        async def parse(path):
+            try:
+                return path, await loop.run_in_executor(pool, SessionFileParser.parse, path), None
+            except Exception as e:
+                return path, None, e
+        
+        with BulkReport('import_sessions', extra_fields=['file']) as report, ProcessPoolExecutor() as pool:
+            for next_result in asyncio.as_completed([parse(path) for path in paths]):
+                path, parsed, error = await next_result
+                if error:
+                    logger.error(f"Could not import session file {path}: {error}")
+                    report.add('', '', 'failed', error=error, file=path)
+                    continue
+                
+                digest = SessionStore.session_digest(parsed['session'])
+                if digest in known_sessions:
+                    report.add('', parsed['account_id'], 'skipped', file=path)
+                    continue
+                
+                record_api_id = parsed['api_id'] or api_id
+                record_api_hash = parsed['api_hash'] or api_hash
+                if not record_api_id or not record_api_hash:
+                    report.add('', parsed['account_id'], 'failed', error=ValueError("No api_id/api_hash"), file=path)
+                    continue
+                try:
+                    record_api_id = int(record_api_id)
+                except (TypeError, ValueError):
+                    logger.error(f"Could not import session file {path}: invalid api_id {record_api_id!r}")
+                    report.add(
+                        '', parsed['account_id'], 'failed', error=ValueError(f"Invalid api_id: {record_api_id!r}"), file=path
+                    )
+                    continue
+                
+                known_sessions.add(digest)
+                batch.append(({
+                    "api_hash": record_api_hash,
+                    "api_id": record_api_id,
+                    "phone": parsed['phone'],
+                    "session": parsed['session'],
+                    "first_name": None,
+                    "username": None,
+                    "account_id": parsed['account_id']
+                }, path))
+                
+                if len(batch) >= Config.IMPORT_BATCH_SIZE:
+                    flush()
+            
+            flush()
+            await session_store.wait_saved()
+        
+        logger.info(f"Imported {len(imported)} out of {len(paths)} session files")
+        
+        if not verify or not imported:
+            return report, None
+        
+        session_updates = {}
+        
+        async def check(client, session_id, tracker):
+            me = await retry_policy.run(client.get_me, tracker)
+            session_updates[session_id] = {
+                'account_id': me.id,
+                'first_name': me.first_name,
+                'last_name': me.last_name or '',
+                'username': me.username or '',
+                'phone': me.phone
+            }
+        
+        all_sessions = SessionManager.read_sessions()['sessions']
+        verify_report = await AccountManager.run_bulk_action(
+            'verify_import', check, {session_id: all_sessions[session_id] for session_id in imported},
+            session_updates=session_updates
+        )
+        return report, verify_report
+    
+    @staticmethod
+    async def run_bulk_action(action, worker, sessions=None, target=None, force=False, concurrency=None,
+                              skip_sessions=None, extra_fields=(), progress=None, session_updates=None):
+        """
+        Run a worker with every account and record a report row for each one.
+        
+        Args:
+            action (str): Action name used for logging and the report file name
+            worker (callable): Coroutine function taking (client, session_id, tracker); it may return
+                a dict of values for the extra report fields
+            sessions (dict, optional): Sessions to use, defaults to all stored sessions
+            target (str, optional): Normalized action target; enables the idempotency ledger
+            force (bool): Run accounts the ledger lists as done anyway
+            concurrency (int, optional): Accounts connected at once, defaults to Config.BULK_CONCURRENCY
+            skip_sessions (set, optional): Session IDs known to have the work done already
+            extra_fields (list, optional): Extra report fields filled from the worker's return value
+            progress (callable, optional): Coroutine function called with the report after each account
+            session_updates (dict, optional): Session record changes the worker fills in; written
+                together with the health updates in one store write
+        
+        Returns:
+            BulkReport: Closed report of the run
+        """
+        if sessions is None:
+            sessions = SessionManager.read_sessions()['sessions']
+        
+        logger.info(f"Running {action} with {len(sessions)} accounts")
+        counters_before = retry_policy.snapshot()
+        health_updates = {}
+        semaphore = asyncio.Semaphore(concurrency or Config.BULK_CONCURRENCY)
+        
+        async def run_account(session_id, session_data):
+            await run_worker(session_id, session_data)
+            if progress:
+                await safe_execute(progress(report))
+        
+        async def run_worker(session_id, session_data):
+            account_id = session_data.get('account_id') or session_id
+            
+            if target is not None and not force and action_ledger.is_done(action, target, account_id):
+                report.add(session_id, session_data.get('account_id'), 'skipped')
+                return
+            
+            if skip_sessions and session_id in skip_sessions:
+                report.add(session_id, session_data.get('account_id'), 'skipped')
+                if target is not None:
+                    action_ledger.record(action, target, account_id)
+                return
+            
+            async with semaphore:
+                health = await AccountManager._run_for_account(report, worker, session_id, session_data)
+            
+            if health and health != session_data.get('health'):
+                health_updates[session_id] = {'health': health}
+            if health == 'ok' and target is not None:
+                action_ledger.record(action, target, account_id)
+        
+        with BulkReport(action, extra_fields=extra_fields) as report:
+            try:
+                await asyncio.gather(*(
+                    run_account(session_id, session_data) for session_id, session_data in sessions.items()
+                ))
+            finally:
+                action_ledger.save()
+        
+        for session_id, fields in (session_updates or {}).items():
+            health_updates.setdefault(session_id, {}).update(fields)
+        SessionManager.update_sessions(health_updates)
+        
+        logger.info(f"{action} succeeded with {report.success_count} out of {report.total} accounts")
+        logger.info(f"Retry counters for {action}: {dict(retry_policy.snapshot() - counters_before)}")
+        return report
+    
+    @staticmethod
+    def _health_for_error(error):
+        """Get the health state an error implies for the account, or None if it says nothing about it."""
+
+        if isinstance(error, (SessionInvalidError, UnauthorizedError, AuthKeyError)):
+            return 'invalid'
+        if RetryPolicy.classify(error) == RetryPolicy.RATE_LIMITED:
+            return 'limited'
+        return None
+    
+    @staticmethod
+    async def _run_for_account(report, worker, session_id, session_data):
+        """
+        Connect one account, run the worker with it and add the outcome to the report.
+        
+        Returns:
+            str: Health state observed for the account, or None
+        """
+
+        tracker = {'attempts': 0}
+        started = time.monotonic()
+        
+        try:
+            missing = [field for field in ('session', 'credential_id') if not session_data.get(field)]
+            if missing:
+                raise ValueError(f"Missing {', '.join(missing)} in session data")
+            
+            client = await AccountManager.connect_session(session_data, tracker)
+            try:
+                extra = await worker(client, session_id, tracker)
+            finally:
+                await client.disconnect()
+            
+            report.add(
+                session_id, session_data.get('account_id'), 'success',
+                latency=time.monotonic() - started, attempts=tracker['attempts'], **(extra or {})
+            )
+            return 'ok'
+        except Exception as e:
+            logger.error(f"{report.action} failed with session {session_id}: {type(e).__name__}: {e}")
+            report.add(
+                session_id, session_data.get('account_id'), 'failed', error=e,
+                latency=time.monotonic() - started, attempts=tracker['attempts']
+            )
+            return AccountManager._health_for_error(e)
+    
+    @staticmethod
+    def _content_digest(message, media=None):
+        """Get a short digest of a message and its media for the action ledger."""
+
+        content = message if media is None else f"{message}\0{media.digest}"
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+    
+    @staticmethod
+    async def upload_media(client, session_id, media, semaphore, tracker=None):
+        """
+        Upload shared media with an account, reusing its cached handle when there is one.
+        
+        Args:
+            client (TelegramClient): Connected client
+            session_id (str): Session ID of the account
+            media (SharedMedia): Media to upload
+            semaphore (asyncio.Semaphore): Bound on uploads running at the same time
+            tracker (dict, optional): Attempt tracker passed to the retry policy
+            
+        Returns:
+            InputFile: Upload handle
+        """
+        input_file = media_upload_cache.get(session_id, media.digest)
+        if input_file is None:
+            async with semaphore:
+                input_file = await retry_policy.run(
+                    lambda: client.upload_file(media.reader(), file_size=media.size, file_name=media.name),
+                    tracker, timed=False
+                )
+            media_upload_cache.put(session_id, media.digest, input_file)
+        return input_file
+    
+    @staticmethod
+    async def _send_content(client, session_id, peer, text, media, upload_semaphore, tracker):
+        """Send a text message, or the media with the text as its caption."""
+
+        if media is None:
+            await retry_policy.run(lambda: client.send_message(peer, text), tracker, idempotent=False)
+            return
+        
+        input_file = await AccountManager.upload_media(client, session_id, media, upload_semaphore, tracker)
+        await retry_policy.run(lambda: client.send_file(peer, input_file, caption=text), tracker, idempotent=False)
+    
+    @staticmethod
+    async def send_message_with_all_accounts(username, message, selector=None, force=False, media=None):
+        """
+        Send a message to a user with all accounts.
+        
+        The message is a MessageTemplate; it is compiled and validated once and
+        rendered for every account before any account connects.
+        
+        Args:
+            username (str): Username to send the message to
+            message (str): Message template to send
+            selector (TargetSelector, optional): Accounts to use, defaults to all accounts
+            force (bool): Send again from accounts that already sent this message
+            media (SharedMedia, optional): Media to send with the message as its caption
+        
+        Returns:
+            BulkReport: Per-account results of the run
+            
+        Raises:
+            ValueError: If the message template is invalid
+        """
+        template = MessageTemplate(message)
+        template.validate(MessageTemplate.ACCOUNT_FIELDS + ('recipient',))
+        
+        sessions = SessionManager.select_sessions(selector)
+        texts = dict(zip(sessions, template.render_many(
+            {**MessageTemplate.account_values(session_data), 'recipient': username}
+            for session_data in sessions.values()
+        )))
+        
+        upload_semaphore = asyncio.Semaphore(Config.MEDIA_UPLOAD_CONCURRENCY)
+        
+        async def send(client, session_id, tracker):
+            await AccountManager._send_content(
+                client, session_id, username, texts[session_id], media, upload_semaphore, tracker
+            )
+        
+        message_digest = AccountManager._content_digest(message, media)
+        target = f"{username.lstrip('@').lower()}#{message_digest}"
+        
+        return await AccountManager.run_bulk_action(
+            'send_message', send, sessions, target=target, force=force
+        )
+    
+    @staticmethod
+    async def check_chat_invite(sessions, invite_hash):
+        """
+        Check an invite link once with the first account that connects.
+        
+        Args:
+            sessions (dict): Candidate sessions for the check
+            invite_hash (str): Invite hash to check
+            
+        Returns:
+            set: Session IDs whose accounts are known to be members of the chat already
+            
+        Raises:
+            ValueError: If the invite link is invalid or expired, or no account could check it
+        """
+        last_error = None
+        
+        for session_id, session_data in list(sessions.items())[:3]:
+            try:
+                client = await AccountManager.connect_session(session_data)
+                try:
+                    invite = await retry_policy.run(
+                        lambda: client(functions.messages.CheckChatInviteRequest(hash=invite_hash))
+                    )
+                finally:
+                    await client.disconnect()
+            except (InviteHashExpiredError, InviteHashInvalidError) as e:
+                raise ValueError(f"Invite link is invalid or expired: {e}")
+            except Exception as e:
+                last_error = e
+                logger.warning(f"Invite pre-flight could not use session {session_id}: {e}")
+                continue
+            
+            if isinstance(invite, types.ChatInviteAlready):
+                return {session_id}
+            if isinstance(invite, types.ChatInvite):
+                member_ids = {str(user.id) for user in invite.participants or []}
+                return {
+                    other_id for other_id, other_data in sessions.items()
+                    if other_data.get('account_id') and str(other_data['account_id']) in member_ids
+                }
+            return set()
+        
+        raise ValueError(f"No account could check the invite link: {last_error}")
+    
+    @staticmethod
+    async def join_channel_with_all_accounts(username, selector=None, force=False):
+        """
+        Join a channel with all accounts.
+        
+        Private invite links (t.me/+hash, t.me/joinchat/hash) are checked once
+        with CheckChatInviteRequest before the run; invalid or expired links
+        reject the whole run and accounts already known to be members are
+        skipped without connecting.
+        
+        Args:
+            username (str): Username, public link or invite link of the channel to join
+            selector (TargetSelector, optional): Accounts to use, defaults to all accounts
+            force (bool): Join again with accounts the ledger lists as joined
+        
+        Returns:
+            BulkReport: Per-account results of the run
+            
+        Raises:
+            ValueError: If the username or invite link is invalid
+        """
+        sessions = SessionManager.select_sessions(selector)
+        invite_hash = LinkParser.parse_invite_hash(username)
+        
+        if invite_hash:
+            members = await AccountManager.check_chat_invite(sessions, invite_hash)
+            
+            async def join(client, session_id, tracker):
+                try:
+                    await retry_policy.run(
+                        lambda: client(functions.messages.ImportChatInviteRequest(hash=invite_hash)), tracker,
+                        idempotent=False
+                    )
+                except UserAlreadyParticipantError:
+                    pass
+            
+            return await AccountManager.run_bulk_action(
+                'join_channel', join, sessions, target=f"invite:{invite_hash}", force=force,
+                skip_sessions=members
+            )
+        
+        username = LinkParser.parse_username(username)
+        
+        async def join(client, session_id, tracker):
+            channel_entity = await retry_policy.run(lambda: client.get_input_entity(username), tracker)
+            await retry_policy.run(lambda: client(JoinChannelRequest(channel_entity)), tracker, idempotent=False)
+        
+        return await AccountManager.run_bulk_action(
+            'join_channel', join, sessions, target=username.lower(), force=force
+        )
+    
+    @staticmethod
+    def parse_recipients(text):
+        """
+        Parse a recipient list.
+        
+        Accepts either a CSV whose header row has a 'recipient' column (other
+        columns are kept as recipient fields), or usernames, IDs and phone
+        numbers separated by new lines or commas. Duplicates (by the peer they
+        resolve to) are dropped, keeping the first one.
+        
+        Args:
+            text (str): Recipient list
+            
+        Returns:
+            list: Recipient rows, dicts with at least a 'recipient' key
+        """
+        lines = text.strip().splitlines()
+        header = [field.strip().lower() for field in lines[0].split(',')] if lines else []
+        
+        if 'recipient' in header:
+            rows = [
+                {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+                for row in csv.DictReader(lines)
+            ]
+        else:
+            rows = [{'recipient': field.strip()} for line in lines for field in line.split(',')]
+        
+        unique = {}
+        for row in rows:
+            recipient = row.get('recipient', '').strip()
+            if recipient:
+                unique.setdefault(str(AccountManager.recipient_peer(recipient)).lower(), row)
+        
+        return list(unique.values())
+    
+    @staticmethod
+    def recipient_peer(recipient):
+        """
+        Get the peer to message for a recipient.
+        
+        User and chat IDs must be written as id:<number> (negative chat IDs
+        may omit the prefix). Any other number, with or without '+' and
+        separators, is a phone number and is normalized to +<digits>;
+        everything else is a username.
+        """
+        recipient = recipient.strip()
+        if recipient.lower().startswith('id:') and recipient[3:].strip().lstrip('-').isdigit():
+            return int(recipient[3:].strip())
+        if recipient.startswith('-') and recipient[1:].isdigit():
+            return int(recipient)
+        if AccountManager.PHONE_PATTERN.match(recipient):
+            return '+' + re.sub(r'\D', '', recipient)
+        return recipient
+    
+    @staticmethod
+    async def send_message_to_recipients(recipients, message, selector=None, force=False, media=None):
+        """
+        Send a message to a list of recipients, spreading them across the accounts.
+        
+        Recipients are assigned to healthy accounts by a least-loaded scheduler
+        capped at Config.OUTREACH_QUOTA per account. Each account sends at most
+        one message per Config.OUTREACH_INTERVAL seconds. Config.BULK_CONCURRENCY
+        limits the connects and sends in flight, not the accounts, so pacing
+        sleeps leave the slots to other accounts. Accounts that fail to
+        connect or get rate limited are taken out of rotation and their unsent
+        recipients are reassigned.
+        
+        The message is a MessageTemplate over the account fields and the
+        recipient fields; recipient fields win when both have the same name.
+        Each account renders its whole batch of recipients before connecting.
+        
+        Args:
+            recipients (list): Recipient rows from parse_recipients
+            message (str): Message template to send
+            selector (TargetSelector, optional): Accounts to use, defaults to all accounts
+            force (bool): Message recipients the ledger lists as already messaged
+            media (SharedMedia, optional): Media to send with the message as its caption
+        
+        Returns:
+            BulkReport: Per-recipient results of the run
+            
+        Raises:
+            ValueError: If the message template is invalid
+        """
+        template = MessageTemplate(message)
+        template.validate(MessageTemplate.ACCOUNT_FIELDS + tuple(MessageTemplate.recipient_fields(recipients)))
+        
+        sessions = {
+            session_id: session_data
+            for session_id, session_data in SessionManager.select_sessions(selector).items()
+            if session_data.get('health') not in ('invalid', 'limited')
+        }
+        message_digest = AccountManager._content_digest(message, media)
+        scheduler = RecipientScheduler(list(sessions), Config.OUTREACH_QUOTA)
+        semaphore = asyncio.Semaphore(Config.BULK_CONCURRENCY)
+        upload_semaphore = asyncio.Semaphore(Config.MEDIA_UPLOAD_CONCURRENCY)
+        health_updates = {}
+        counters_before = retry_policy.snapshot()
+        
+        logger.info(f"Running outreach to {len(recipients)} recipients with {len(sessions)} accounts")
+        
+        def ledger_target(recipient):
+            # Keyed on the peer, so one recipient written two ways is messaged once
+            peer = str(AccountManager.recipient_peer(recipient))
+            return f"{peer.lstrip('@').lower()}#{message_digest}"
+        
+        async def run_account(session_id, assigned, returned):
+            session_data = sessions[session_id]
+            account_values = MessageTemplate.account_values(session_data)
+            texts = template.render_many({**account_values, **row} for row in assigned)
+            
+            try:
+                async with semaphore:
+                    client = await AccountManager.connect_session(session_data)
+            except Exception as e:
+                logger.error(f"Outreach could not connect session {session_id}: {type(e).__name__}: {e}")
+                scheduler.remove(session_id)
+                health_updates[session_id] = {'health': AccountManager._health_for_error(e) or session_data.get('health', 'unknown')}
+                returned.extend(assigned)
+                return
+            
+            try:
+                last_sent = 0.0
+                for index, row in enumerate(assigned):
+                    recipient = row['recipient']
+                    peer = AccountManager.recipient_peer(recipient)
+                    wait = Config.OUTREACH_INTERVAL - (time.monotonic() - last_sent)
+                    if last_sent and wait > 0:
+                        await asyncio.sleep(wait)
+                    
+                    tracker = {'attempts': 0}
+                    try:
+                        async with semaphore:
+                            started = time.monotonic()
+                            await AccountManager._send_content(
+                                client, session_id, peer, texts[index], media, upload_semaphore, tracker
+                            )
+                        report.add(
+                            session_id, session_data.get('account_id'), 'success',
+                            latency=time.monotonic() - started, attempts=tracker['attempts'], recipient=recipient
+                        )
+                        action_ledger.record('outreach', ledger_target(recipient), '*')
+                        health_updates[session_id] = {'health': 'ok'}
+                    except Exception as e:
+                        if isinstance(e, PeerFloodError) or RetryPolicy.classify(e) == RetryPolicy.RATE_LIMITED:
+                            logger.warning(f"Session {session_id} is rate limited, reassigning its recipients: {e}")
+                            scheduler.remove(session_id)
+                            health_updates[session_id] = {'health': 'limited'}
+                            returned.extend(assigned[index:])
+                            return
+                        
+                        report.add(
+                            session_id, session_data.get('account_id'), 'failed', error=e,
+                            latency=time.monotonic() - started, attempts=tracker['attempts'], recipient=recipient
+                        )
+                    finally:
+                        last_sent = time.monotonic()
+            finally:
+                await client.disconnect()
+        
+        with BulkReport('outreach', extra_fields=['recipient']) as report:
+            pending = []
+            for row in recipients:
+                if not force and action_ledger.is_done('outreach', ledger_target(row['recipient']), '*'):
+                    report.add('', '', 'skipped', recipient=row['recipient'])
+                else:
+                    pending.append(row)
+            
+            leftover = []
+            try:
+                while pending:
+                    assignments, unassigned = scheduler.assign(pending)
+                    leftover.extend(unassigned)
+                    if not assignments:
+                        break
+                    
+                    returned = []
+                    await asyncio.gather(*(
+                        run_account(session_id, assigned, returned) for session_id, assigned in assignments.items()
+                    ))
+                    pending = returned
+            finally:
+                action_ledger.save()
+            
+            if leftover:
+                logger.warning(f"No account with quota left for {len(leftover)} outreach recipients")
+            for row in leftover:
+                report.add('', '', 'skipped', recipient=row['recipient'])
+        
+        SessionManager.update_sessions(health_updates)
+        
+        logger.info(f"Outreach reached {report.success_count} out of {len(recipients)} recipients")
+        logger.info(f"Retry counters for outreach: {dict(retry_policy.snapshot() - counters_before)}")
+        return report
+    
+    @staticmethod
+    async def resolve_message_target(client, target, tracker=None):
+        """
+        Resolve a parsed message link to an input peer and message ID for one account.
+        
+        Public chats cost a single username resolution. Private channels are
+        fetched by ID first and only fall back to walking the dialogs when
+        Telegram will not return the channel without its access hash. Comment
+        links are resolved to the comment inside the linked discussion group.
+        
+        Args:
+            client (TelegramClient): Connected client
+            target (MessageTarget): Parsed message link
+            tracker (dict, optional): Attempt tracker passed to the retry policy
+            
+        Returns:
+            tuple: (input peer, message ID)
+        """
+        if target.kind == 'public':
+            peer = await retry_policy.run(lambda: client.get_input_entity(target.chat), tracker)
+        else:
+            peer = await AccountManager._find_private_channel(client, target.chat, tracker)
+            if peer is None:
+                raise ValueError(f"Account is not a member of private channel {target.chat}")
+        
+        if not target.comment_id:
+            return peer, target.message_id
+        
+        discussion = await retry_policy.run(
+            lambda: client(functions.messages.GetDiscussionMessageRequest(peer=peer, msg_id=target.message_id)),
+            tracker
+        )
+        if not discussion.messages:
+            raise ValueError("The post has no discussion group")
+        
+        # chats also holds the broadcast channel, in no fixed order
+        group_id = getattr(discussion.messages[0].peer_id, 'channel_id', None)
+        group = next((chat for chat in discussion.chats if chat.id == group_id), None)
+        if group is None:
+            raise ValueError("The post has no discussion group")
+        
+        return await client.get_input_entity(group), target.comment_id
+    
+    @staticmethod
+    async def _find_private_channel(client, channel_id, tracker=None):
+        # A fresh StringSession has no cached access hashes, so ask Telegram by ID first
+        try:
+            result = await retry_policy.run(
+                lambda: client(functions.channels.GetChannelsRequest([types.InputChannel(channel_id, 0)])),
+                tracker
+            )
+            channel = next((chat for chat in result.chats if chat.id == channel_id), None)
+            if isinstance(channel, types.Channel):
+                return await client.get_input_entity(channel)
+            if isinstance(channel, types.ChannelForbidden):
+                return None
+        except BadRequestError:
+            pass
+        
+        async def walk_dialogs():
+            async for dialog in client.iter_dialogs():
+                if isinstance(dialog.entity, types.Channel) and dialog.entity.id == channel_id:
+                    return await client.get_input_entity(dialog.entity)
+            return None
+        
+        # The walk takes as long as the account has dialogs, so it gets no attempt timeout
+        return await retry_policy.run(walk_dialogs, tracker, timed=False)
+    
+    @staticmethod
+    async def get_allowed_reactions(client, peer, reactions, tracker=None):
+        """
+        Filter reactions down to the ones a chat allows.
+        
+        Args:
+            client (TelegramClient): Connected client
+            peer (InputPeer): Chat the message belongs to
+            reactions (list): Candidate emoji reactions
+            tracker (dict, optional): Attempt tracker passed to the retry policy
+            
+        Returns:
+            list: Allowed reactions, in the form the chat lists them
+        """
+        if isinstance(peer, types.InputPeerChannel):
+            full = await retry_policy.run(lambda: client(functions.channels.GetFullChannelRequest(peer)), tracker)
+        elif isinstance(peer, types.InputPeerChat):
+            full = await retry_policy.run(lambda: client(functions.messages.GetFullChatRequest(peer.chat_id)), tracker)
+        else:
+            return list(reactions)
+        
+        available = full.full_chat.available_reactions
+        if isinstance(available, types.ChatReactionsNone):
+            return []
+        # An unset field says nothing about the chat, so it must not fail the whole run
+        if available is None or isinstance(available, types.ChatReactionsAll):
+            return list(reactions)
+        
+        # Telegram lists emoji without the variation selector, e.g. '❤' for '❤️'
+        listed = {
+            reaction.emoticon.replace('\ufe0f', ''): reaction.emoticon
+            for reaction in available.reactions
+            if isinstance(reaction, types.ReactionEmoji)
+        }
+        return [listed[emoji.replace('\ufe0f', '')] for emoji in reactions if emoji.replace('\ufe0f', '') in listed]
+    
+    @staticmethod
+    async def _send_reaction(client, peer, message_id, reaction, tracker=None):
+        """Send an emoji reaction to a message with a connected client."""
+
+        await retry_policy.run(lambda: client(SendReactionRequest(
+            peer=peer,
+            msg_id=message_id,
+            reaction=[types.ReactionEmoji(emoticon=reaction)]
+        )), tracker, idempotent=False)
+    
+    @staticmethod
+    async def send_reaction(session_id, message_link, reaction=None):
+        """
+        Send a reaction to a message with one account.
+        
+        Args:
+            session_id (str): Session ID to react with
+            message_link (str): Link to the message to react to
+            reaction (str, optional): Emoji to send, defaults to a random allowed one from the config
+            
+        Returns:
+            tuple: (success, message)
+        """
+        try:
+            target = LinkParser.parse_message(message_link)
+        except ValueError as e:
+            return False, str(e)
+        
+        success, client_or_error = await AccountManager.get_client_for_session(session_id)
+        
+        if not success:
+            return False, client_or_error
+        
+        client = client_or_error
+        
+        try:
+            peer, message_id = await AccountManager.resolve_message_target(client, target)
+            allowed = await AccountManager.get_allowed_reactions(client, peer, [reaction] if reaction else Config.REACTION_LIST)
+            if not allowed:
+                await client.disconnect()
+                return False, "Reaction is not allowed in this chat"
+            
+            await AccountManager._send_reaction(client, peer, message_id, random.choice(allowed))
+            
+            await client.disconnect()
+            return True, "Reaction sent successfully"
+        except Exception as e:
+            await client.disconnect()
+            return False, str(e)
+    
+    @staticmethod
+    async def send_reaction_with_all_accounts(message_link, selector=None, force=False):
+        """
+        Send a reaction to a message with all accounts.
+        
+        The link is parsed once and the chat's allowed reactions are checked
+        once per run with the first account, before any other connects; each
+        account then only resolves the target and sends. When the first account
+        cannot check them, the first account of the run that can does.
+        
+        Args:
+            message_link (str): Link to the message to react to
+            selector (TargetSelector, optional): Accounts to use, defaults to all accounts
+            force (bool): React again with accounts the ledger lists as done
+        
+        Returns:
+            BulkReport: Per-account results of the run
+            
+        Raises:
+            ValueError: If the chat allows none of Config.REACTION_LIST
+        """
+        target = LinkParser.parse_message(message_link)
+        logger.info(f"Parsed message link: {target}")
+        
+        sessions = SessionManager.select_sessions(selector)
+        allowed = {'reactions': None}
+        allowed_lock = asyncio.Lock()
+        
+        if sessions:
+            session_id, session_data = next(iter(sessions.items()))
+            try:
+                client = await AccountManager.connect_session(session_data)
+                try:
+                    peer, _ = await AccountManager.resolve_message_target(client, target)
+                    allowed['reactions'] = await AccountManager.get_allowed_reactions(client, peer, Config.REACTION_LIST)
+                finally:
+                    await client.disconnect()
+                logger.info(f"Allowed reactions for {target.key()}: {allowed['reactions']}")
+            except Exception as e:
+                logger.warning(f"Could not check the allowed reactions with {session_id}: {type(e).__name__}: {e}")
+            
+            if allowed['reactions'] == []:
+                raise ValueError("None of the configured reactions are allowed in this chat")
+        
+        async def react(client, session_id, tracker):
+            peer, message_id = await AccountManager.resolve_message_target(client, target, tracker)
+            
+            async with allowed_lock:
+                if allowed['reactions'] is None:
+                    allowed['reactions'] = await AccountManager.get_allowed_reactions(
+                        client, peer, Config.REACTION_LIST, tracker
+                    )
+                    logger.info(f"Allowed reactions for {target.key()}: {allowed['reactions']}")
+            
+            if not allowed['reactions']:
+                raise ValueError("None of the configured reactions are allowed in this chat")
+            
+            await AccountManager._send_reaction(client, peer, message_id, random.choice(allowed['reactions']), tracker)
+        
+        return await AccountManager.run_bulk_action(
+            'send_reaction', react, sessions, target=target.key(), force=force
+        )
+
+
+
+class Keyboards:
+    """Generate keyboards for the bot."""
+    
+    @staticmethod
+    def home_keyboard():
+        """Generate the home keyboard."""
+        keyboard = InlineKeyboardMarkup()
+        keyboard.add(InlineKeyboardButton(Language.get_text("manager_title"), callback_data='not'))
+        keyboard.add(
+            InlineKeyboardButton(Language.get_text("add_account"), callback_data='add_account'), 
+            InlineKeyboardButton(Language.get_text("show_accounts"), callback_data="show_accounts")
+        )
+        keyboard.add(InlineKeyboardButton(Language.get_text("account_tools"), callback_data='not'))
+        keyboard.add(
+            InlineKeyboardButton(Language.get_text("send_message"), callback_data='tool_send_message'),
+            InlineKeyboardButton(Language.get_text("join_channel"), callback_data='tool_join_channel')
+        )
+        keyboard.add(
+            InlineKeyboardButton(Language.get_text("send_reaction"), callback_data='tool_reaction'),
+            InlineKeyboardButton(Language.get_text("bulk_outreach"), callback_data='tool_outreach')
+        )
+        keyboard.add(
+            InlineKeyboardButton(Language.get_text("session_sweep"), callback_data='tool_sweep'),
+            InlineKeyboardButton(Language.get_text("bulk_2fa"), callback_data='tool_2fa')
+        )
+        keyboard.add(
+            InlineKeyboardButton(Language.get_text("bulk_profile"), callback_data='tool_profile'),
+            InlineKeyboardButton(Language.get_text("import_sessions"), callback_data='tool_import')
+        )
+        keyboard.add(InlineKeyboardButton(Language.get_text("api_credentials"), callback_data='tool_credentials'))
+        return keyboard
+    
+    @staticmethod
+    def sweep_mode_keyboard():
+        """Generate the session sweep mode keyboard."""
+        keyboard = InlineKeyboardMarkup()
+        keyboard.add(
+            InlineKeyboardButton(Language.get_text("sweep_report_only"), callback_data='sweep:report'),
+            InlineKeyboardButton(Language.get_text("sweep_terminate"), callback_data='sweep:terminate')
+        )
+        keyboard.add(InlineKeyboardButton(Language.get_text("back"), callback_data='back_home'))
+        return keyboard
+    
+    @staticmethod
+    def back_home_keyboard():
+        """Generate the back home keyboard."""
+        keyboard = InlineKeyboardMarkup()
+        keyboard.add(InlineKeyboardButton(Language.get_text("back"), callback_data='back_home'))
+        return keyboard
+    
+    @staticmethod
+    def accounts_keyboard():
+        """Generate the accounts keyboard."""
+        sessions = SessionManager.read_sessions()
+        keyboard = InlineKeyboardMarkup(row_width=4)
+        keyboard.add(
+            InlineKeyboardButton(Language.get_text("id_header"), callback_data="not"),
+            InlineKeyboardButton(Language.get_text("name_header"), callback_data="not"),
+            InlineKeyboardButton(Language.get_text("view_header"), callback_data="not"),
+            InlineKeyboardButton(Language.get_text("delete_header"), callback_data="not")
+        )
+        
+        if len(sessions['sessions']) > 0:
+            for session_id, session_data in sessions['sessions'].items():
+                # Show the actual account ID instead of session number
+                account_id = session_data.get('account_id', session_id.split('_')[1])
+                
+                # Create name button (full name if available)
+                full_name = session_data.get('first_name', '')
+                if session_data.get('last_name'):
+                    full_name += f" {session_data.get('last_name')}"
+                
+                # Create view details button
+                view_button = InlineKeyboardButton(
+                    Language.get_text("view_button"), 
+                    callback_data=f"view_account:{session_id}"
+                )
+                
+                # Create delete button
+                keyboard.add(
+                    InlineKeyboardButton(account_id, callback_data="not"),
+                    InlineKeyboardButton(full_name, callback_data=f"edit_account:{session_id}"),
+                    view_button,
+                    InlineKeyboardButton(Language.get_text("delete_button"), callback_data=f"delete_session:{session_id}")
+                )
+        else:
+            keyboard.add(InlineKeyboardButton(Language.get_text("no_accounts"), callback_data="not"))
+        
+        keyboard.add(InlineKeyboardButton(Language.get_text("back_button"), callback_data="back_home"))
+        return keyboard
+    
+    @staticmethod
+    def account_details_keyboard(session_id):
+        """Generate the account details keyboard."""
+        keyboard = InlineKeyboardMarkup(row_width=2)
+        keyboard.add(
+            InlineKeyboardButton(Language.get_text("edit_profile"), callback_data=f"edit_account:{session_id}"),
+            InlineKeyboardButton(Language.get_text("change_2fa"), callback_data=f"change_2fa:{session_id}")
+        )
+        keyboard.add(
+            InlineKeyboardButton(Language.get_text("manage_sessions"), callback_data=f"manage_sessions:{session_id}"),
+            InlineKeyboardButton(Language.get_text("edit_tags"), callback_data=f"edit_tags:{session_id}")
+        )
+        keyboard.add(InlineKeyboardButton(Language.get_text("back"), callback_data="show_accounts"))
+        return keyboard
+    
+    @staticmethod
+    def edit_profile_keyboard(session_id):
+        """Generate the edit profile keyboard."""
+        keyboard = InlineKeyboardMarkup(row_width=2)
+        keyboard.add(
+            InlineKeyboardButton(Language.get_text("edit_first_name"), callback_data=f"edit_first_name:{session_id}"),
+            InlineKeyboardButton(Language.get_text("edit_last_name"), callback_data=f"edit_last_name:{session_id}")
+        )
+        keyboard.add(
+            InlineKeyboardButton(Language.get_text("edit_username"), callback_data=f"edit_username:{session_id}"),
+            InlineKeyboardButton(Language.get_text("edit_bio"), callback_data=f"edit_bio:{session_id}")
+        )
+        keyboard.add(InlineKeyboardButton(Language.get_text("back"), callback_data=f"view_account:{session_id}"))
+        return keyboard
+    
+    @staticmethod
+    def manage_sessions_keyboard(session_id):
+        """Generate the manage sessions keyboard."""
+        keyboard = InlineKeyboardMarkup()
+        keyboard.add(InlineKeyboardButton(Language.get_text("view_active_sessions"), callback_data=f"view_active_sessions:{session_id}"))
+        keyboard.add(InlineKeyboardButton(Language.get_text("terminate_all_sessions"), callback_data=f"terminate_all:{session_id}"))
+        keyboard.add(InlineKeyboardButton(Language.get_text("back"), callback_data=f"view_account:{session_id}"))
+        return keyboard
+    
+    @staticmethod
+    def change_2fa_keyboard(session_id):
+        """Generate the change 2FA keyboard."""
+        keyboard = InlineKeyboardMarkup()
+        keyboard.add(InlineKeyboardButton(Language.get_text("set_change_password"), callback_data=f"set_2fa:{session_id}"))
+        keyboard.add(InlineKeyboardButton(Language.get_text("back"), callback_data=f"view_account:{session_id}"))
+        return keyboard
+
+
+
+class Messages:
+    """Store message templates for the bot with language support."""
+    
+    @classmethod
+    def get(cls, key, **kwargs):
+        """Get message text in the current language with optional formatting."""
+        text = Language.get_text(key)
+        if kwargs:
+            try:
+                return text.format(**kwargs)
+            except KeyError as e:
+                logging.error(f"Missing format key in message: {e}")
+                return text
+        return text
+    
+    
+    WELCOME = Language.get_text("welcome")
+    SHOW_ACCOUNTS = Language.get_text("show_accounts")
+    ADD_ACCOUNT = Language.get_text("add_account")
+    API_HASH_PROMPT = Language.get_text("api_hash_prompt")
+    API_ID_PROMPT = Language.get_text("api_id_prompt")
+    PHONE_PROMPT = Language.get_text("phone_prompt")
+    CODE_PROMPT = Language.get_text("code_prompt")
+    PASSWORD_PROMPT = Language.get_text("password_prompt")
+    ACCOUNT_ADDED = Language.get_text("account_added")
+    EDIT_FIRST_NAME_PROMPT = Language.get_text("edit_first_name_prompt")
+    EDIT_LAST_NAME_PROMPT = Language.get_text("edit_last_name_prompt")
+    EDIT_USERNAME_PROMPT = Language.get_text("edit_username_prompt")
+    EDIT_BIO_PROMPT = Language.get_text("edit_bio_prompt")
+    CURRENT_2FA_PROMPT = Language.get_text("current_2fa_prompt")
+    NEW_2FA_PROMPT = Language.get_text("new_2fa_prompt")
+    MESSAGE_USERNAME_PROMPT = Language.get_text("message_username_prompt")
+    MESSAGE_CONTENT_PROMPT = Language.get_text("message_content_prompt")
+    JOIN_CHANNEL_PROMPT = Language.get_text("join_channel_prompt")
+    REACTION_PROMPT = Language.get_text("reaction_prompt")
+    TARGET_PROMPT = Language.get_text("target_prompt")
+    OUTREACH_RECIPIENTS_PROMPT = Language.get_text("outreach_recipients_prompt")
+    
+    @classmethod
+    def update_messages(cls):
+        """Update all messages with current language"""
+        cls.WELCOME = Language.get_text("welcome")
+        cls.SHOW_ACCOUNTS = Language.get_text("show_accounts")
+        cls.ADD_ACCOUNT = Language.get_text("add_account")
+        cls.API_HASH_PROMPT = Language.get_text("api_hash_prompt")
+        cls.API_ID_PROMPT = Language.get_text("api_id_prompt")
+        cls.PHONE_PROMPT = Language.get_text("phone_prompt")
+        cls.CODE_PROMPT = Language.get_text("code_prompt")
+        cls.PASSWORD_PROMPT = Language.get_text("password_prompt")
+        cls.ACCOUNT_ADDED = Language.get_text("account_added")
+        cls.EDIT_FIRST_NAME_PROMPT = Language.get_text("edit_first_name_prompt")
+        cls.EDIT_LAST_NAME_PROMPT = Language.get_text("edit_last_name_prompt")
+        cls.EDIT_USERNAME_PROMPT = Language.get_text("edit_username_prompt")
+        cls.EDIT_BIO_PROMPT = Language.get_text("edit_bio_prompt")
+        cls.CURRENT_2FA_PROMPT = Language.get_text("current_2fa_prompt")
+        cls.NEW_2FA_PROMPT = Language.get_text("new_2fa_prompt")
+        cls.MESSAGE_USERNAME_PROMPT = Language.get_text("message_username_prompt")
+        cls.MESSAGE_CONTENT_PROMPT = Language.get_text("message_content_prompt")
+        cls.JOIN_CHANNEL_PROMPT = Language.get_text("join_channel_prompt")
+        cls.REACTION_PROMPT = Language.get_text("reaction_prompt")
+        cls.TARGET_PROMPT = Language.get_text("target_prompt")
+        cls.OUTREACH_RECIPIENTS_PROMPT = Language.get_text("outreach_recipients_prompt")
+    
+    @staticmethod
+    def account_details(details):
+        """Format account details message."""
+        has_photo = "Yes" if details['has_photo'] else "No"
+        premium = "Yes" if details['premium'] else "No"
+        verified = "Yes" if details['verified'] else "No"
+        restricted = "Yes" if details['restricted'] else "No"
+        has_2fa = "Yes" if details['has_2fa'] else "No"
+        username = '@' + details['username'] if details['username'] else '-'
+        
+        # Format the details based on the current language
+        return Language.get_text("account_details").format(
+            id=details['id'],
+            first_name=details['first_name'] or '-',
+            last_name=details['last_name'] or '-',
+            username=username,
+            phone=details['phone'],
+            bio=details['bio'] or '-',
+            has_photo=has_photo,
+            premium=premium,
+            verified=verified,
+            restricted=restricted,
+            sessions_count=details['sessions_count'],
+            has_2fa=has_2fa
+        )
+
+
+# Initialize the bot
+initialize_data()
+bot = AsyncTeleBot(Config.BOT_TOKEN)
+
+# Create Messages instance
+messages = Messages()
+
+# Set up bot commands
+bot_commands = [
+    telebot_types.BotCommand("start", "Start the bot"),
+    telebot_types.BotCommand("help", "Show help information"),
+    telebot_types.BotCommand("eng", "Switch to English language"),
+    telebot_types.BotCommand("fa", "Switch to Persian language")
+]
+
+# State variables
+state = {
+    'waiting_for_input': False,
+    'current_action': None,
+    'temp_data': {},
+    'main_message_id': None,  # Store the main message ID for editing
+    'chat_id': None,  # Store the chat ID for editing
+    'add_account': {
+        'api_hash': None,
+        'api_id': None,
+        'phone': None,
+        'code': None,
+        'password': None,
+        'client': None,
+        'chat_id': None,
+        'message_id': None
+    }
+}
+
+
+# Actions that accept an uploaded file instead of text
+FILE_INPUT_ACTIONS = {
+    'outreach_recipients', 'send_message_content', 'outreach_content', 'bulk_2fa_source', 'bulk_profile_source'
+}
+
+
+# Command handlers
+@bot.message_handler(commands=['start'])
+async def start_command(message):
+    """Handle the /start command."""
+    # Make sure messages are updated with current language
+    Messages.update_messages()
+    
+    # Reset waiting state
+    state['waiting_for_input'] = False
+    
+    # Send the main message and store its ID for future editing using safe_execute
+    sent_message = await safe_execute(
+        bot.send_message(
+            message.chat.id,
+            Messages.WELCOME,
+            reply_markup=Keyboards.home_keyboard()
+        )
+    )
+    
+    # If message sending failed, return early
+    if sent_message is None:
+        return
+    
+    # Store the message ID and chat ID in state for future editing
+    state['main_message_id'] = sent_message.message_id
+    state['chat_id'] = message.chat.id
+
+
+# Callback query handlers
+@bot.callback_query_handler(func=lambda call: call.data == 'back_home')
+async def back_home_callback(call):
+    """Handle the back home callback."""
+    # Reset state
+    state['waiting_for_input'] = False
+    state['current_action'] = None
+    
+    # Use the stored message ID or the current message ID
+    message_id = state.get('main_message_id') or call.message.message_id
+    chat_id = state.get('chat_id') or call.message.chat.id
+    
+    # Edit the message instead of sending a new one
+    try:
+        await bot.edit_message_text(
+            Messages.WELCOME,
+            chat_id=chat_id,
+            message_id=message_id,
+            reply_markup=Keyboards.home_keyboard()
+        )
+    except Exception as e:
+        # Ignore 'message is not modified' errors as they're not critical
+        if "message is not modified" not in str(e):
+            logger.error(f"Error in back_home_callback: {e}")
+            # For other errors, try to send a new message
+            try:
+                await bot.send_message(
+                    chat_id=chat_id,
+                    text=Messages.WELCOME,
+                    reply_markup=Keyboards.home_keyboard()
+                )
+            except Exception as send_error:
+                logger.error(f"Failed to send new message: {send_error}")
+    
+    # Update the stored message ID and chat ID
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data == 'add_account')
+async def add_account_callback(call):
+    """Handle the add account callback."""
+    # Reset add account state
+    state['add_account'] = {
+        'api_hash': None,
+        'api_id': None,
+        'phone': None,
+        'code': None,
+        'password': None,
+        'client': None,
+        'chat_id': call.message.chat.id,
+        'message_id': call.message.message_id
+    }
+    
+    # Set waiting state
+    state['waiting_for_input'] = True
+    state['current_action'] = 'api_hash'
+    
+    # Use the stored message ID or the current message ID
+    message_id = state.get('main_message_id') or call.message.message_id
+    chat_id = state.get('chat_id') or call.message.chat.id
+    
+    await bot.edit_message_text(
+        Messages.API_HASH_PROMPT,
+        chat_id=chat_id,
+        message_id=message_id,
+        reply_markup=Keyboards.back_home_keyboard()
+    )
+    
+    # Update the stored message ID and chat ID
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data == 'show_accounts')
+async def show_accounts_callback(call):
+    """Handle the show accounts callback."""
+    # Use the stored message ID or the current message ID
+    message_id = state.get('main_message_id') or call.message.message_id
+    chat_id = state.get('chat_id') or call.message.chat.id
+    
+    # Edit the message instead of sending a new one
+    await bot.edit_message_text(
+        Messages.SHOW_ACCOUNTS,
+        chat_id=chat_id,
+        message_id=message_id,
+        reply_markup=Keyboards.accounts_keyboard()
+    )
+    
+    # Update the stored message ID and chat ID
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('delete_session:'))
+async def delete_session_callback(call):
+    """Handle the delete session callback."""
+    session_id = call.data.split(':')[1]
+    
+    # Delete session
+    success = await SessionManager.delete_session_async(session_id)
+    
+    if success:
+        await bot.answer_callback_query(call.id, "Account deleted successfully!")
+    else:
+        await bot.answer_callback_query(call.id, "Failed to delete account!")
+    
+    # Update accounts list (using send_message instead of edit_message_text)
+    await bot.send_message(
+        call.message.chat.id,
+        Messages.SHOW_ACCOUNTS,
+        reply_markup=Keyboards.accounts_keyboard()
+    )
+
+
+@bot.callback_query_handler(func=lambda call: call.data == 'tool_send_message')
+async def tool_send_message_callback(call):
+    """Handle the tool send message callback."""
+    # Set waiting state
+    state['waiting_for_input'] = True
+    state['current_action'] = 'send_message_username'
+    state['temp_data'] = {}
+    
+    # Use the current message ID or store it for future edits
+    message_id = call.message.message_id
+    chat_id = call.message.chat.id
+    
+    # Store these for future reference
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
+    # Edit the main message to show the prompt
+    await bot.edit_message_text(
+        Messages.MESSAGE_USERNAME_PROMPT,
+        chat_id=chat_id,
+        message_id=message_id,
+        reply_markup=Keyboards.back_home_keyboard()
+    )
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data == 'tool_join_channel')
+async def tool_join_channel_callback(call):
+    """Handle the tool join channel callback."""
+    # Set waiting state
+    state['waiting_for_input'] = True
+    state['current_action'] = 'join_channel'
+    
+    # Use the current message ID or store it for future edits
+    message_id = call.message.message_id
+    chat_id = call.message.chat.id
+    
+    # Store these for future reference
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
+    # Edit the main message to show the prompt
+    await bot.edit_message_text(
+        Messages.JOIN_CHANNEL_PROMPT,
+        chat_id=chat_id,
+        message_id=message_id,
+        reply_markup=Keyboards.back_home_keyboard()
+    )
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data == 'tool_reaction')
+async def tool_reaction_callback(call):
+    """Handle the tool reaction callback."""
+    # Set waiting state
+    state['waiting_for_input'] = True
+    state['current_action'] = 'send_reaction'
+    
+    # Use the current message ID or store it for future edits
+    message_id = call.message.message_id
+    chat_id = call.message.chat.id
+    
+    # Store these for future reference
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
+    # Edit the main message to show the prompt
+    await bot.edit_message_text(
+        Messages.REACTION_PROMPT,
+        chat_id=chat_id,
+        message_id=message_id,
+        reply_markup=Keyboards.back_home_keyboard()
+    )
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data == 'tool_outreach')
+async def tool_outreach_callback(call):
+    """Handle the tool bulk outreach callback."""
+    # Set waiting state
+    state['waiting_for_input'] = True
+    state['current_action'] = 'outreach_recipients'
+    state['temp_data'] = {}
     
     # Use the current message ID or store it for future edits
     message_id = call.message.message_id
     chat_id = call.message.chat.id
     
-    # Store these for future reference
-    state['main_message_id'] = message_id
-    state['chat_id'] = chat_id
+    # Store these for future reference
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
+    # Edit the main message to show the prompt
+    await bot.edit_message_text(
+        Messages.OUTREACH_RECIPIENTS_PROMPT,
+        chat_id=chat_id,
+        message_id=message_id,
+        reply_markup=Keyboards.back_home_keyboard()
+    )
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data == 'tool_2fa')
+async def tool_2fa_callback(call):
+    """Handle the tool bulk 2FA callback."""
+    # Set waiting state
+    state['waiting_for_input'] = True
+    state['current_action'] = 'bulk_2fa_source'
+    state['temp_data'] = {}
+    
+    state['main_message_id'] = call.message.message_id
+    state['chat_id'] = call.message.chat.id
+    
+    # Edit the main message to show the prompt
+    await bot.edit_message_text(
+        Language.get_text("bulk_2fa_prompt"),
+        chat_id=state['chat_id'],
+        message_id=state['main_message_id'],
+        reply_markup=Keyboards.back_home_keyboard()
+    )
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data == 'tool_profile')
+async def tool_profile_callback(call):
+    """Handle the tool bulk profile callback."""
+    # Set waiting state
+    state['waiting_for_input'] = True
+    state['current_action'] = 'bulk_profile_source'
+    state['temp_data'] = {}
+    
+    state['main_message_id'] = call.message.message_id
+    state['chat_id'] = call.message.chat.id
+    
+    # Edit the main message to show the prompt
+    await bot.edit_message_text(
+        Language.get_text("bulk_profile_prompt"),
+        chat_id=state['chat_id'],
+        message_id=state['main_message_id'],
+        reply_markup=Keyboards.back_home_keyboard()
+    )
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data == 'tool_import')
+async def tool_import_callback(call):
+    """Handle the tool import sessions callback."""
+    # Set waiting state
+    state['waiting_for_input'] = True
+    state['current_action'] = 'import_directory'
+    state['temp_data'] = {}
+    
+    state['main_message_id'] = call.message.message_id
+    state['chat_id'] = call.message.chat.id
+    
+    # Edit the main message to show the prompt
+    await bot.edit_message_text(
+        Language.get_text("import_directory_prompt"),
+        chat_id=state['chat_id'],
+        message_id=state['main_message_id'],
+        reply_markup=Keyboards.back_home_keyboard()
+    )
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data == 'tool_credentials')
+async def tool_credentials_callback(call):
+    """Handle the tool API credentials callback."""
+    state['main_message_id'] = call.message.message_id
+    state['chat_id'] = call.message.chat.id
+    
+    # Show which accounts use which API credential
+    await bot.edit_message_text(
+        format_credential_usage(SessionManager.credential_usage(), SessionManager.read_sessions()['sessions']),
+        chat_id=state['chat_id'],
+        message_id=state['main_message_id'],
+        reply_markup=Keyboards.back_home_keyboard()
+    )
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data == 'tool_sweep')
+async def tool_sweep_callback(call):
+    """Handle the tool session sweep callback."""
+    await bot.edit_message_text(
+        Language.get_text("sweep_mode_prompt"),
+        chat_id=call.message.chat.id,
+        message_id=call.message.message_id,
+        reply_markup=Keyboards.sweep_mode_keyboard()
+    )
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('sweep:'))
+async def sweep_mode_callback(call):
+    """Handle the session sweep mode callback."""
+    # Set waiting state
+    state['waiting_for_input'] = True
+    state['current_action'] = 'sweep_target'
+    state['temp_data'] = {'terminate': call.data == 'sweep:terminate'}
+    
+    state['main_message_id'] = call.message.message_id
+    state['chat_id'] = call.message.chat.id
+    
+    # Edit the main message to prompt for the target accounts
+    await bot.edit_message_text(
+        Messages.TARGET_PROMPT,
+        chat_id=state['chat_id'],
+        message_id=state['main_message_id'],
+        reply_markup=Keyboards.back_home_keyboard()
+    )
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+# Add callback handlers for account management
+@bot.callback_query_handler(func=lambda call: call.data.startswith('view_account:'))
+async def view_account_callback(call):
+    """Handle the view account callback."""
+    session_id = call.data.split(':')[1]
+    
+    # Use the stored message ID or the current message ID
+    message_id = state.get('main_message_id') or call.message.message_id
+    chat_id = state.get('chat_id') or call.message.chat.id
+    
+    # Get account details
+    success, result = await AccountManager.get_account_details(session_id)
+    
+    if success:
+        # Format account details message
+        account_details_message = Messages.account_details(result)
+        
+        # Edit the message instead of sending a new one
+        await bot.edit_message_text(
+            account_details_message,
+            chat_id=chat_id,
+            message_id=message_id,
+            parse_mode='Markdown',
+            reply_markup=Keyboards.account_details_keyboard(session_id)
+        )
+    else:
+        # Edit the message with error
+        await bot.edit_message_text(
+            f"Failed to get account details: {result}",
+            chat_id=chat_id,
+            message_id=message_id,
+            reply_markup=Keyboards.back_home_keyboard()
+        )
+    
+    # Update the stored message ID and chat ID
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('edit_account:'))
+async def edit_account_callback(call):
+    """Handle the edit account callback."""
+    session_id = call.data.split(':')[1]
+    
+    # Use the stored message ID or the current message ID
+    message_id = state.get('main_message_id') or call.message.message_id
+    chat_id = state.get('chat_id') or call.message.chat.id
+    
+    # Edit the message instead of sending a new one
+    await bot.edit_message_text(
+        "Select what you want to edit:",
+        chat_id=chat_id,
+        message_id=message_id,
+        reply_markup=Keyboards.edit_profile_keyboard(session_id)
+    )
+    
+    # Update the stored message ID and chat ID
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('edit_first_name:'))
+async def edit_first_name_callback(call):
+    """Handle the edit first name callback."""
+    session_id = call.data.split(':')[1]
+    
+    # Set waiting state
+    state['waiting_for_input'] = True
+    state['current_action'] = f'edit_first_name:{session_id}'
+    
+    # Use the stored message ID or the current message ID
+    message_id = state.get('main_message_id') or call.message.message_id
+    chat_id = state.get('chat_id') or call.message.chat.id
+    
+    # Edit the message instead of sending a new one
+    await bot.edit_message_text(
+        Messages.EDIT_FIRST_NAME_PROMPT,
+        chat_id=chat_id,
+        message_id=message_id,
+        reply_markup=Keyboards.back_home_keyboard()
+    )
+    
+    # Update the stored message ID and chat ID
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('edit_last_name:'))
+async def edit_last_name_callback(call):
+    """Handle the edit last name callback."""
+    session_id = call.data.split(':')[1]
+    
+    # Set waiting state
+    state['waiting_for_input'] = True
+    state['current_action'] = f'edit_last_name:{session_id}'
+    
+    # Use the stored message ID or the current message ID
+    message_id = state.get('main_message_id') or call.message.message_id
+    chat_id = state.get('chat_id') or call.message.chat.id
+    
+    # Edit the message instead of sending a new one
+    await bot.edit_message_text(
+        Messages.EDIT_LAST_NAME_PROMPT,
+        chat_id=chat_id,
+        message_id=message_id,
+        reply_markup=Keyboards.back_home_keyboard()
+    )
+    
+    # Update the stored message ID and chat ID
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('edit_username:'))
+async def edit_username_callback(call):
+    """Handle the edit username callback."""
+    session_id = call.data.split(':')[1]
+    
+    # Set waiting state
+    state['waiting_for_input'] = True
+    state['current_action'] = f'edit_username:{session_id}'
+    
+    # Use the stored message ID or the current message ID
+    message_id = state.get('main_message_id') or call.message.message_id
+    chat_id = state.get('chat_id') or call.message.chat.id
+    
+    # Edit the message instead of sending a new one
+    await bot.edit_message_text(
+        Messages.EDIT_USERNAME_PROMPT,
+        chat_id=chat_id,
+        message_id=message_id,
+        reply_markup=Keyboards.back_home_keyboard()
+    )
+    
+    
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
+    
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('edit_bio:'))
+async def edit_bio_callback(call):
+    """Handle the edit bio callback."""
+    session_id = call.data.split(':')[1]
+    
+    
+    state['waiting_for_input'] = True
+    state['current_action'] = f'edit_bio:{session_id}'
+    
+    
+    message_id = state.get('main_message_id') or call.message.message_id
+    chat_id = state.get('chat_id') or call.message.chat.id
+    
+    
+    await bot.edit_message_text(
+        Messages.EDIT_BIO_PROMPT,
+        chat_id=chat_id,
+        message_id=message_id,
+        reply_markup=Keyboards.back_home_keyboard()
+    )
+    
+    
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('edit_tags:'))
+async def edit_tags_callback(call):
+    """Handle the edit tags callback."""
+    session_id = call.data.split(':')[1]
+    
+    # Set waiting state
+    state['waiting_for_input'] = True
+    state['current_action'] = f'edit_tags:{session_id}'
+    
+    # Use the stored message ID or the current message ID
+    message_id = state.get('main_message_id') or call.message.message_id
+    chat_id = state.get('chat_id') or call.message.chat.id
+    
+    session_data = SessionManager.read_sessions()['sessions'].get(session_id, {})
+    current_tags = ', '.join(session_data.get('tags', [])) or '-'
+    
+    await bot.edit_message_text(
+        Language.get_text("edit_tags_prompt").format(tags=current_tags),
+        chat_id=chat_id,
+        message_id=message_id,
+        reply_markup=Keyboards.back_home_keyboard()
+    )
+    
+    # Update the stored message ID and chat ID
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('change_2fa:'))
+async def change_2fa_callback(call):
+    """Handle the change 2FA callback."""
+    session_id = call.data.split(':')[1]
+    
+    # Use the stored message ID or the current message ID
+    message_id = state.get('main_message_id') or call.message.message_id
+    chat_id = state.get('chat_id') or call.message.chat.id
+    
+    # Edit the message instead of sending a new one
+    await bot.edit_message_text(
+        "2FA Password Management:",
+        chat_id=chat_id,
+        message_id=message_id,
+        reply_markup=Keyboards.change_2fa_keyboard(session_id)
+    )
+    
+    # Update the stored message ID and chat ID
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('set_2fa:'))
+async def set_2fa_callback(call):
+    """Handle the set 2FA callback."""
+    session_id = call.data.split(':')[1]
+    
+    # Get account details to check if 2FA is already enabled
+    success, result = await AccountManager.get_account_details(session_id)
+    
+    if success:
+        # Set waiting state
+        state['waiting_for_input'] = True
+        state['temp_data'] = {'session_id': session_id}
+        
+        if result['has_2fa']:
+            # If 2FA is already enabled, ask for current password first
+            state['current_action'] = 'current_2fa_password'
+            await bot.send_message(
+                call.message.chat.id,
+                Messages.CURRENT_2FA_PROMPT,
+                reply_markup=Keyboards.back_home_keyboard()
+            )
+        else:
+            # If 2FA is not enabled, ask for new password directly
+            state['current_action'] = 'new_2fa_password'
+            await bot.send_message(
+                call.message.chat.id,
+                Messages.NEW_2FA_PROMPT,
+                reply_markup=Keyboards.back_home_keyboard()
+            )
+    else:
+        await bot.send_message(
+            call.message.chat.id,
+            f"Failed to get account details: {result}",
+            reply_markup=Keyboards.back_home_keyboard()
+        )
+    
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('manage_sessions:'))
+async def manage_sessions_callback(call):
+    """Handle the manage sessions callback."""
+    session_id = call.data.split(':')[1]
     
-    # Edit the main message to show the prompt
+    # Use the stored message ID or the current message ID
+    message_id = state.get('main_message_id') or call.message.message_id
+    chat_id = state.get('chat_id') or call.message.chat.id
+    
+    # Edit the message instead of sending a new one
     await bot.edit_message_text(
-        Messages.JOIN_CHANNEL_PROMPT,
+        "Session Management:",
         chat_id=chat_id,
         message_id=message_id,
-        reply_markup=Keyboards.back_home_keyboard()
+        reply_markup=Keyboards.manage_sessions_keyboard(session_id)
     )
     
+    # Update the stored message ID and chat ID
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
     # Answer the callback query to remove the loading state
     await bot.answer_callback_query(call.id)
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'tool_reaction')
-async def tool_reaction_callback(call):
-    """Handle the tool reaction callback."""
-    # Set waiting state
-    state['waiting_for_input'] = True
-    state['current_action'] = 'send_reaction'
+@bot.callback_query_handler(func=lambda call: call.data.startswith('terminate_all:'))
+async def terminate_all_callback(call):
+    """Handle the terminate all sessions callback."""
+    session_id = call.data.split(':')[1]
     
-    # Use the current message ID or store it for future edits
-    message_id = call.message.message_id
-    chat_id = call.message.chat.id
     
-    # Store these for future reference
+    message_id = state.get('main_message_id') or call.message.message_id
+    chat_id = state.get('chat_id') or call.message.chat.id
+    
+    
+    await bot.edit_message_text(
+        Language.get_text("terminating_sessions"),
+        chat_id=chat_id,
+        message_id=message_id
+    )
+    
+    
+    success, result_message = await AccountManager.terminate_sessions(session_id, all_sessions=True)
+    
+    if success:
+        
+        success, sessions_or_error = await AccountManager.get_active_sessions(session_id)
+        
+        if success:
+            
+            sessions_text = format_sessions_info(sessions_or_error)
+            
+            
+            await bot.edit_message_text(
+                f"✅ {Language.get_text('all_sessions_terminated')}\n\n{sessions_text}",
+                chat_id=chat_id,
+                message_id=message_id,
+                reply_markup=generate_sessions_keyboard(session_id, sessions_or_error),
+                parse_mode="HTML"
+            )
+        else:
+            # Show success message but couldn't refresh sessions
+            await bot.edit_message_text(
+                f"✅ {Language.get_text('all_sessions_terminated')}",
+                chat_id=chat_id,
+                message_id=message_id,
+                reply_markup=Keyboards.manage_sessions_keyboard(session_id)
+            )
+    else:
+        # Show error message
+        await bot.edit_message_text(
+            f"❌ {Language.get_text('failed_terminate_sessions')}: {result_message}",
+            chat_id=chat_id,
+            message_id=message_id,
+            reply_markup=Keyboards.manage_sessions_keyboard(session_id)
+        )
+    
+    # Update the stored message ID and chat ID
     state['main_message_id'] = message_id
     state['chat_id'] = chat_id
     
-    # Edit the main message to show the prompt
+    # Answer the callback query to remove the loading state
+    await bot.answer_callback_query(call.id)
+
+
+# Change photo functionality has been removed as requested
+
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('manage_sessions:'))
+async def manage_sessions_back_callback(call):
+    """Handle the manage sessions callback for returning from session list."""
+    session_id = call.data.split(':')[1]
+    
+    # Use the stored message ID or the current message ID
+    message_id = state.get('main_message_id') or call.message.message_id
+    chat_id = state.get('chat_id') or call.message.chat.id
+    
+    # Edit the message to show the session management menu
     await bot.edit_message_text(
-        Messages.REACTION_PROMPT,
+        Language.get_text("session_management"),
         chat_id=chat_id,
         message_id=message_id,
-        reply_markup=Keyboards.back_home_keyboard()
+        reply_markup=Keyboards.manage_sessions_keyboard(session_id)
     )
     
+    # Update the stored message ID and chat ID
+    state['main_message_id'] = message_id
+    state['chat_id'] = chat_id
+    
     # Answer the callback query to remove the loading state
     await bot.answer_callback_query(call.id)
 
 
-# Add callback handlers for account management
-@bot.callback_query_handler(func=lambda call: call.data.startswith('view_account:'))
-async def view_account_callback(call):
-    """Handle the view account callback."""
+@bot.callback_query_handler(func=lambda call: call.data.startswith('view_active_sessions:'))
+async def view_active_sessions_callback(call):
+    """Handle the view active sessions callback."""
     session_id = call.data.split(':')[1]
     
     # Use the stored message ID or the current message ID
     message_id = state.get('main_message_id') or call.message.message_id
     chat_id = state.get('chat_id') or call.message.chat.id
     
-    # Get account details
-    success, result = await AccountManager.get_account_details(session_id)
+    # Show loading message
+    await bot.edit_message_text(
+        Language.get_text("fetching_sessions"),
+        chat_id=chat_id,
+        message_id=message_id
+    )
+    
+    # Get active sessions
+    success, sessions_or_error = await AccountManager.get_active_sessions(session_id)
     
     if success:
-        # Format account details message
-        account_details_message = Messages.account_details(result)
+        # Format sessions information
+        sessions_text = format_sessions_info(sessions_or_error)
         
-        # Edit the message instead of sending a new one
+        # Generate keyboard with session-specific actions
+        keyboard = generate_sessions_keyboard(session_id, sessions_or_error)
+        
+        # Edit the message to show sessions
         await bot.edit_message_text(
-            account_details_message,
+            sessions_text,
             chat_id=chat_id,
             message_id=message_id,
-            parse_mode='Markdown',
-            reply_markup=Keyboards.account_details_keyboard(session_id)
+            reply_markup=keyboard,
+            parse_mode="HTML"
         )
     else:
-        # Edit the message with error
+        # Show error message
         await bot.edit_message_text(
-            f"Failed to get account details: {result}",
+            f"❌ {Language.get_text('failed_terminate_sessions')}: {sessions_or_error}",
             chat_id=chat_id,
             message_id=message_id,
-            reply_markup=Keyboards.back_home_keyboard()
+            reply_markup=Keyboards.manage_sessions_keyboard(session_id)
         )
     
     # Update the stored message ID and chat ID
@@ -1323,23 +4832,59 @@ async def view_account_callback(call):
     await bot.answer_callback_query(call.id)
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('edit_account:'))
-async def edit_account_callback(call):
-    """Handle the edit account callback."""
-    session_id = call.data.split(':')[1]
+@bot.callback_query_handler(func=lambda call: call.data.startswith('terminate_session:'))
+async def terminate_session_callback(call):
+    """Handle the terminate specific session callback."""
+    parts = call.data.split(':')
+    session_id = parts[1]
+    auth_hash = int(parts[2])
     
     # Use the stored message ID or the current message ID
     message_id = state.get('main_message_id') or call.message.message_id
     chat_id = state.get('chat_id') or call.message.chat.id
     
-    # Edit the message instead of sending a new one
+    # Show loading message
     await bot.edit_message_text(
-        "Select what you want to edit:",
+        Language.get_text("terminating_sessions"),
         chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=Keyboards.edit_profile_keyboard(session_id)
+        message_id=message_id
     )
     
+    # Terminate the specific session
+    success, result_message = await AccountManager.terminate_sessions(session_id, session_ids=[auth_hash])
+    
+    if success:
+        # Get updated sessions after termination
+        success, sessions_or_error = await AccountManager.get_active_sessions(session_id)
+        
+        if success:
+            sessions_text = format_sessions_info(sessions_or_error)
+            
+            keyboard = generate_sessions_keyboard(session_id, sessions_or_error)
+            
+            await bot.edit_message_text(
+                f"✅ {Language.get_text('session_terminated')}\n\n{sessions_text}",
+                chat_id=chat_id,
+                message_id=message_id,
+                reply_markup=keyboard,
+                parse_mode="HTML"
+            )
+        else:
+            await bot.edit_message_text(
+                f"{Language.get_text('session_terminated')}\n{Language.get_text('fetching_sessions')} {sessions_or_error}",
+                chat_id=chat_id,
+                message_id=message_id,
+                reply_markup=Keyboards.manage_sessions_keyboard(session_id)
+            )
+    else:
+        # Show error message
+        await bot.edit_message_text(
+            f"❌ {Language.get_text('failed_terminate_sessions')}: {result_message}",
+            chat_id=chat_id,
+            message_id=message_id,
+            reply_markup=Keyboards.manage_sessions_keyboard(session_id)
+        )
+    
     # Update the stored message ID and chat ID
     state['main_message_id'] = message_id
     state['chat_id'] = chat_id
@@ -1348,1050 +4893,1349 @@ async def edit_account_callback(call):
     await bot.answer_callback_query(call.id)
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('edit_first_name:'))
-async def edit_first_name_callback(call):
-    """Handle the edit first name callback."""
-    session_id = call.data.split(':')[1]
-    
-    # Set waiting state
-    state['waiting_for_input'] = True
-    state['current_action'] = f'edit_first_name:{session_id}'
-    
-    # Use the stored message ID or the current message ID
-    message_id = state.get('main_message_id') or call.message.message_id
-    chat_id = state.get('chat_id') or call.message.chat.id
+def format_sessions_info(sessions):
+    """Format sessions information for display."""
+    if not sessions:
+        return Language.get_text("no_sessions")
+    
+    # Start with header
+    text = Language.get_text("active_sessions_header")
+    
+    # Store session hashes for the state
+    state['temp_data']['sessions'] = {}
+    
+    # Add each session
+    for i, session in enumerate(sessions, 1):
+        # Mark current session
+        current_marker = Language.get_text("current_session") if session["is_current"] else ""
+        
+        # Store session hash with index
+        session_hash = session["hash"]
+        state['temp_data']['sessions'][i] = session_hash
+        
+        # Format session information using language keys
+        text += Language.get_text("session_number").format(number=i, current_marker=current_marker) + "\n"
+        text += Language.get_text("device").format(device_model=session['device_model']) + "\n"
+        text += Language.get_text("platform").format(platform=session['platform'], system_version=session['system_version']) + "\n"
+        text += Language.get_text("app").format(app_name=session['app_name'], app_version=session['app_version']) + "\n"
+        text += Language.get_text("created").format(date_created=session['date_created']) + "\n"
+        text += Language.get_text("last_active").format(date_active=session['date_active']) + "\n"
+        text += Language.get_text("ip").format(ip=session['ip']) + "\n"
+        text += Language.get_text("location").format(country=session['country'], region=session['region']) + "\n"
+        
+        # Add official app and password pending indicators if applicable
+        if session["is_official_app"]:
+            text += Language.get_text("official_app") + "\n"
+        if session["is_password_pending"]:
+            text += Language.get_text("password_pending") + "\n"
+        
+        # Add session hash for debugging/reference
+        text += Language.get_text("session_id").format(hash=session_hash) + "\n"
+        
+        # Add separator between sessions
+        if i < len(sessions):
+            text += "\n" + "-" * 30 + "\n\n"
+    
+    return text
+
+
+def format_credential_usage(usage, sessions, shown=10):
+    """Format which accounts use each API credential for display."""
+    if not usage:
+        return Language.get_text("no_credentials")
+    
+    text = Language.get_text("credentials_usage_header") + "\n\n"
+    for credential_id, entry in usage.items():
+        text += Language.get_text("credential_usage_line").format(
+            credential_id=credential_id, api_id=entry['api_id'], count=len(entry['session_ids'])
+        ) + "\n"
+        
+        names = [
+            sessions[session_id].get('first_name') or sessions[session_id].get('account_id') or session_id
+            for session_id in entry['session_ids'][:shown]
+        ]
+        if names:
+            text += ", ".join(str(name) for name in names)
+            if len(entry['session_ids']) > shown:
+                text += " " + Language.get_text("more_accounts").format(count=len(entry['session_ids']) - shown)
+            text += "\n"
+        text += "\n"
+    
+    # Stay within Telegram's message length limit
+    return text[:4000]
+
+
+def bulk_progress_reporter(title, total, interval=2.0):
+    """
+    Build a progress callback for run_bulk_action that edits the main message.
     
-    # Edit the message instead of sending a new one
-    await bot.edit_message_text(
-        Messages.EDIT_FIRST_NAME_PROMPT,
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=Keyboards.back_home_keyboard()
-    )
+    Edits are throttled to one per interval seconds, plus one for the last account.
+    """
+    last_update = {'time': 0.0}
     
-    # Update the stored message ID and chat ID
-    state['main_message_id'] = message_id
-    state['chat_id'] = chat_id
+    async def progress(report):
+        now = time.monotonic()
+        if report.total < total and now - last_update['time'] < interval:
+            return
+        last_update['time'] = now
+        
+        await bot.edit_message_text(
+            Language.get_text("bulk_progress").format(
+                title=title, done=report.total, total=total,
+                success=report.success_count, failed=report.status_counts['failed']
+            ),
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id']
+        )
     
-    # Answer the callback query to remove the loading state
-    await bot.answer_callback_query(call.id)
+    return progress
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('edit_last_name:'))
-async def edit_last_name_callback(call):
-    """Handle the edit last name callback."""
-    session_id = call.data.split(':')[1]
-    
-    # Set waiting state
-    state['waiting_for_input'] = True
-    state['current_action'] = f'edit_last_name:{session_id}'
-    
-    # Use the stored message ID or the current message ID
-    message_id = state.get('main_message_id') or call.message.message_id
-    chat_id = state.get('chat_id') or call.message.chat.id
-    
-    # Edit the message instead of sending a new one
-    await bot.edit_message_text(
-        Messages.EDIT_LAST_NAME_PROMPT,
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=Keyboards.back_home_keyboard()
+def format_bulk_summary(title, report):
+    """Format the summary of a bulk action with an error-class histogram."""
+    text = f"{title}\n\n" + Language.get_text("bulk_status_counts").format(
+        success=report.success_count,
+        failed=report.status_counts['failed'],
+        skipped=report.status_counts['skipped']
     )
     
-    # Update the stored message ID and chat ID
-    state['main_message_id'] = message_id
-    state['chat_id'] = chat_id
+    if report.error_classes:
+        text += "\n\n" + Language.get_text("error_histogram_header")
+        for error_class, count in report.error_classes.most_common():
+            text += f"\n• {error_class}: {count}"
     
-    # Answer the callback query to remove the loading state
-    await bot.answer_callback_query(call.id)
+    return text
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('edit_username:'))
-async def edit_username_callback(call):
-    """Handle the edit username callback."""
-    session_id = call.data.split(':')[1]
-    
-    # Set waiting state
-    state['waiting_for_input'] = True
-    state['current_action'] = f'edit_username:{session_id}'
-    
-    # Use the stored message ID or the current message ID
-    message_id = state.get('main_message_id') or call.message.message_id
-    chat_id = state.get('chat_id') or call.message.chat.id
+async def read_message_template(text, available):
+    """
+    Compile and validate the message template entered by the user.
     
-    # Edit the message instead of sending a new one
-    await bot.edit_message_text(
-        Messages.EDIT_USERNAME_PROMPT,
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=Keyboards.back_home_keyboard()
-    )
+    Shows an error in the main message and returns None when the template is
+    invalid, so the user can try again.
+    """
+    try:
+        template = MessageTemplate(text)
+        template.validate(available)
+        return template
+    except ValueError as e:
+        await safe_execute(
+            bot.edit_message_text(
+                f"{Language.get_text('invalid_template').format(error=e)}\n\n{Messages.MESSAGE_CONTENT_PROMPT}",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.back_home_keyboard()
+            )
+        )
+        return None
+
+
+async def read_target_selector(text):
+    """
+    Parse the account selector entered by the user.
     
+    Shows an error in the main message and returns None when the selector is
+    invalid or matches no accounts, so the user can try again.
+    """
+    error_text = None
+    selector = None
     
-    state['main_message_id'] = message_id
-    state['chat_id'] = chat_id
+    try:
+        selector = TargetSelector.parse(text)
+        if not SessionManager.select_sessions(selector):
+            error_text = Language.get_text("no_accounts_selected")
+    except ValueError as e:
+        error_text = Language.get_text("invalid_selector").format(error=e)
     
+    if error_text:
+        await safe_execute(
+            bot.edit_message_text(
+                f"{error_text}\n\n{Messages.TARGET_PROMPT}",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.back_home_keyboard()
+            )
+        )
+        return None
     
-    await bot.answer_callback_query(call.id)
+    return selector
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('edit_bio:'))
-async def edit_bio_callback(call):
-    """Handle the edit bio callback."""
-    session_id = call.data.split(':')[1]
+async def send_bulk_report(chat_id, report):
+    """Send the report file of a bulk action as a document."""
+    if not report.total:
+        return
     
+    with open(report.path, 'rb') as file:
+        await safe_execute(
+            bot.send_document(
+                chat_id,
+                file,
+                caption=Language.get_text("bulk_report_caption").format(action=report.action)
+            )
+        )
+
+
+def generate_sessions_keyboard(session_id, sessions):
+    """Generate keyboard with buttons for each session."""
+    keyboard = InlineKeyboardMarkup(row_width=2)
     
-    state['waiting_for_input'] = True
-    state['current_action'] = f'edit_bio:{session_id}'
+    # Add buttons for each session
+    buttons = []
+    for i in range(1, len(sessions) + 1):
+        # Skip current session as it can't be terminated
+        if sessions[i-1]["is_current"]:
+            continue
+            
+        buttons.append(InlineKeyboardButton(
+            Language.get_text("terminate_session").format(number=i),
+            callback_data=f"terminate_session:{session_id}:{sessions[i-1]['hash']}"
+        ))
     
+    # Add buttons in pairs
+    for i in range(0, len(buttons), 2):
+        if i + 1 < len(buttons):
+            keyboard.add(buttons[i], buttons[i+1])
+        else:
+            keyboard.add(buttons[i])
     
-    message_id = state.get('main_message_id') or call.message.message_id
-    chat_id = state.get('chat_id') or call.message.chat.id
+    # Add back button
+    keyboard.add(InlineKeyboardButton(Language.get_text("terminate_all_sessions"), callback_data=f"terminate_all:{session_id}"))
+    keyboard.add(InlineKeyboardButton("╠═══ BACK ← ═══╣", callback_data=f"manage_sessions:{session_id}"))
     
+    return keyboard
+
+
+async def read_document_text(message):
+    """Download a document sent by the user and decode it as UTF-8 text."""
+    file_info = await bot.get_file(message.document.file_id)
+    downloaded_file = await bot.download_file(file_info.file_path)
+    return downloaded_file.decode('utf-8-sig', errors='replace')
+
+
+def accepts_input(message):
+    """Check whether a message is input for the current action."""
+    if not state['waiting_for_input']:
+        return False
+    return message.content_type == 'text' or state['current_action'] in FILE_INPUT_ACTIONS
+
+
+BOT_API_DOWNLOAD_LIMIT = 20 * 1024 * 1024
+
+
+async def download_message_media(message):
+    """
+    Save the media of a message to the media directory.
     
-    await bot.edit_message_text(
-        Messages.EDIT_BIO_PROMPT,
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=Keyboards.back_home_keyboard()
-    )
+    Media files older than Config.MEDIA_RETENTION, left behind by sends that
+    were never started, are deleted first.
     
+    Returns:
+        str: Path of the saved file, or None if the message has no media
+        
+    Raises:
+        ValueError: If the file is over the Bot API download limit or the download fails
+    """
+    if message.content_type == 'photo':
+        media = message.photo[-1]
+        file_name = f"{media.file_unique_id}.jpg"
+    elif message.content_type in ('document', 'video', 'audio'):
+        media = getattr(message, message.content_type)
+        file_name = f"{media.file_unique_id}_{os.path.basename(media.file_name or message.content_type)}"
+    else:
+        return None
     
-    state['main_message_id'] = message_id
-    state['chat_id'] = chat_id
+    if (media.file_size or 0) > BOT_API_DOWNLOAD_LIMIT:
+        raise ValueError(f"The file is larger than the {BOT_API_DOWNLOAD_LIMIT // (1024 * 1024)} MB bots can download")
     
-    # Answer the callback query to remove the loading state
-    await bot.answer_callback_query(call.id)
+    try:
+        file_info = await bot.get_file(media.file_id)
+        downloaded_file = await bot.download_file(file_info.file_path)
+    except Exception as e:
+        logger.error(f"Failed to download media {file_name}: {type(e).__name__}: {e}")
+        raise ValueError(f"The file could not be downloaded: {e}")
+    
+    os.makedirs(Config.MEDIA_DIR, exist_ok=True)
+    prune_message_media()
+    path = os.path.join(Config.MEDIA_DIR, file_name)
+    with open(path, 'wb') as file:
+        file.write(downloaded_file)
+    return path
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('change_2fa:'))
-async def change_2fa_callback(call):
-    """Handle the change 2FA callback."""
-    session_id = call.data.split(':')[1]
-    
-    # Use the stored message ID or the current message ID
-    message_id = state.get('main_message_id') or call.message.message_id
-    chat_id = state.get('chat_id') or call.message.chat.id
-    
-    # Edit the message instead of sending a new one
-    await bot.edit_message_text(
-        "2FA Password Management:",
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=Keyboards.change_2fa_keyboard(session_id)
-    )
+def prune_message_media():
+    """Delete media files older than Config.MEDIA_RETENTION from the media directory."""
+    cutoff = time.time() - Config.MEDIA_RETENTION
+    for entry in os.scandir(Config.MEDIA_DIR):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError as e:
+            logger.warning(f"Could not delete old media file {entry.path}: {e}")
+
+
+def discard_message_media(path):
+    """Delete the media file of a finished bulk send."""
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except OSError as e:
+        logger.warning(f"Could not delete media file {path}: {e}")
+
+
+async def read_message_media(message):
+    """
+    Download the media of the message content entered by the user.
     
-    # Update the stored message ID and chat ID
-    state['main_message_id'] = message_id
-    state['chat_id'] = chat_id
+    Shows an error in the main message and returns False when the download
+    fails, so the user can send the content again.
     
-    # Answer the callback query to remove the loading state
-    await bot.answer_callback_query(call.id)
+    Returns:
+        str: Path of the saved file, None if the message has no media, or False on failure
+    """
+    try:
+        return await download_message_media(message)
+    except ValueError as e:
+        await safe_execute(
+            bot.edit_message_text(
+                f"{Language.get_text('media_download_failed').format(error=e)}\n\n{Messages.MESSAGE_CONTENT_PROMPT}",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.back_home_keyboard()
+            )
+        )
+        return False
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('set_2fa:'))
-async def set_2fa_callback(call):
-    """Handle the set 2FA callback."""
-    session_id = call.data.split(':')[1]
+def open_message_media(path):
+    """Map the media saved for a bulk send, or return None for a text-only send."""
+    return SharedMedia(path) if path else None
+
+
+# Message handlers
+@bot.message_handler(func=accepts_input, content_types=['text', 'document', 'photo', 'video', 'audio'])
+@rate_limit(calls_per_second=5)  # محدود کردن تعداد فراخوانی‌ها برای ورودی کاربر
+async def handle_input(message):
+    """Handle user input based on current state."""
+    try:
+        action = state['current_action']
+    except KeyError:
+        logger.error("Current action not found in state")
+        # بازگشت به منوی اصلی در صورت بروز خطا
+        state['waiting_for_input'] = False
+        state['current_action'] = None
+        await safe_execute(
+            bot.send_message(
+                message.chat.id,
+                "An error occurred. Returning to main menu...",
+                reply_markup=Keyboards.home_keyboard()
+            )
+        )
+        return
+    
+    # Handle add account flow
+    if action == 'api_hash':
+        state['add_account']['api_hash'] = message.text
+        state['current_action'] = 'api_id'
+        
+        # Use the stored message ID or create a new one
+        if state.get('main_message_id'):
+            await safe_execute(
+                bot.edit_message_text(
+                    Messages.API_ID_PROMPT,
+                    chat_id=state['chat_id'],
+                    message_id=state['main_message_id'],
+                    reply_markup=Keyboards.back_home_keyboard()
+                )
+            )
+        else:
+            # If no main message exists, create one
+            sent_message = await safe_execute(
+                bot.send_message(
+                    message.chat.id, 
+                    Messages.API_ID_PROMPT,
+                    reply_markup=Keyboards.back_home_keyboard()
+                )
+            )
+            
+            # If message sending failed, return early
+            if sent_message is None:
+                return
+                
+            state['main_message_id'] = sent_message.message_id
+            state['chat_id'] = message.chat.id
     
-    # Get account details to check if 2FA is already enabled
-    success, result = await AccountManager.get_account_details(session_id)
+    elif action == 'api_id':
+        state['add_account']['api_id'] = message.text
+        state['current_action'] = 'phone'
+        
+        # Edit the main message
+        await bot.edit_message_text(
+            Messages.PHONE_PROMPT,
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id'],
+            reply_markup=Keyboards.back_home_keyboard()
+        )
     
-    if success:
-        # Set waiting state
-        state['waiting_for_input'] = True
-        state['temp_data'] = {'session_id': session_id}
+    elif action == 'phone':
+        state['add_account']['phone'] = message.text
         
-        if result['has_2fa']:
-            # If 2FA is already enabled, ask for current password first
-            state['current_action'] = 'current_2fa_password'
-            await bot.send_message(
-                call.message.chat.id,
-                Messages.CURRENT_2FA_PROMPT,
+        # Edit the main message to show processing
+        await bot.edit_message_text(
+            "Processing your request, please wait...",
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id']
+        )
+        
+        # Create session
+        success, result = await SessionManager.create_session(
+            state['add_account']['api_id'],
+            state['add_account']['api_hash'],
+            state['add_account']['phone'],
+            bot,
+            message.chat.id,
+            message.message_id
+        )
+        
+        if success:
+            state['add_account']['client'] = result
+            state['current_action'] = 'code'
+            
+            # Edit the main message to prompt for code
+            await bot.edit_message_text(
+                Messages.CODE_PROMPT,
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
                 reply_markup=Keyboards.back_home_keyboard()
             )
         else:
-            # If 2FA is not enabled, ask for new password directly
-            state['current_action'] = 'new_2fa_password'
-            await bot.send_message(
-                call.message.chat.id,
-                Messages.NEW_2FA_PROMPT,
+            # Edit the main message to show error
+            await bot.edit_message_text(
+                f"Failed to create session: {result}",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
                 reply_markup=Keyboards.back_home_keyboard()
             )
-    else:
-        await bot.send_message(
-            call.message.chat.id,
-            f"Failed to get account details: {result}",
-            reply_markup=Keyboards.back_home_keyboard()
-        )
-    
-    # Answer the callback query to remove the loading state
-    await bot.answer_callback_query(call.id)
-
-
-@bot.callback_query_handler(func=lambda call: call.data.startswith('manage_sessions:'))
-async def manage_sessions_callback(call):
-    """Handle the manage sessions callback."""
-    session_id = call.data.split(':')[1]
-    
-    # Use the stored message ID or the current message ID
-    message_id = state.get('main_message_id') or call.message.message_id
-    chat_id = state.get('chat_id') or call.message.chat.id
-    
-    # Edit the message instead of sending a new one
-    await bot.edit_message_text(
-        "Session Management:",
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=Keyboards.manage_sessions_keyboard(session_id)
-    )
-    
-    # Update the stored message ID and chat ID
-    state['main_message_id'] = message_id
-    state['chat_id'] = chat_id
-    
-    # Answer the callback query to remove the loading state
-    await bot.answer_callback_query(call.id)
-
-
-@bot.callback_query_handler(func=lambda call: call.data.startswith('terminate_all:'))
-async def terminate_all_callback(call):
-    """Handle the terminate all sessions callback."""
-    session_id = call.data.split(':')[1]
-    
-    
-    message_id = state.get('main_message_id') or call.message.message_id
-    chat_id = state.get('chat_id') or call.message.chat.id
-    
+            state['waiting_for_input'] = False
     
-    await bot.edit_message_text(
-        Language.get_text("terminating_sessions"),
-        chat_id=chat_id,
-        message_id=message_id
-    )
+    elif action == 'code':
+        state['add_account']['code'] = message.text
+        
+        # Edit the main message to show processing
+        await bot.edit_message_text(
+            "Verifying code, please wait...",
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id']
+        )
+        
+        # Sign in with code
+        success, result, user_info = await SessionManager.sign_in_with_code(
+            state['add_account']['client'],
+            state['add_account']['phone'],
+            state['add_account']['code']
+        )
+        
+        if success:
+            # Add session
+            session_id = await SessionManager.add_session_async(
+                state['add_account']['api_id'],
+                state['add_account']['api_hash'],
+                state['add_account']['phone'],
+                result,
+                user_info['first_name'],
+                str(user_info['id']),
+                user_info['username']
+            )
+            
+            # Edit the main message to show success
+            await bot.edit_message_text(
+                Messages.ACCOUNT_ADDED,
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.home_keyboard()
+            )
+            state['waiting_for_input'] = False
+        elif "Two-step verification" in result:
+            state['current_action'] = 'password'
+            
+            # Edit the main message to prompt for password
+            await bot.edit_message_text(
+                Messages.PASSWORD_PROMPT,
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.back_home_keyboard()
+            )
+        else:
+            # Edit the main message to show error
+            await bot.edit_message_text(
+                f"Failed to sign in: {result}",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.back_home_keyboard()
+            )
+            state['waiting_for_input'] = False
     
+    elif action == 'password':
+        state['add_account']['password'] = message.text
+        
+        # Edit the main message to show processing
+        await bot.edit_message_text(
+            "Verifying password, please wait...",
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id']
+        )
+        
+        # Sign in with password
+        success, result, user_info = await SessionManager.sign_in_with_code(
+            state['add_account']['client'],
+            state['add_account']['phone'],
+            state['add_account']['code'],
+            state['add_account']['password']
+        )
+        
+        if success:
+            # Add session
+            session_id = await SessionManager.add_session_async(
+                state['add_account']['api_id'],
+                state['add_account']['api_hash'],
+                state['add_account']['phone'],
+                result,
+                user_info['first_name'],
+                str(user_info['id']),
+                user_info['username']
+            )
+            
+            # Edit the main message to show success
+            await bot.edit_message_text(
+                Messages.ACCOUNT_ADDED,
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.home_keyboard()
+            )
+        else:
+            # Edit the main message to show error
+            await bot.edit_message_text(
+                f"Failed to sign in: {result}",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.back_home_keyboard()
+            )
+        
+        state['waiting_for_input'] = False
     
-    success, result_message = await AccountManager.terminate_sessions(session_id, all_sessions=True)
+    # Handle profile editing
+    elif action.startswith('edit_first_name:'):
+        session_id = action.split(':')[1]
+        new_first_name = message.text
+        
+        # Edit the main message to show processing
+        await bot.edit_message_text(
+            "Updating first name, please wait...",
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id']
+        )
+        
+        # Update profile
+        success, result_message = await AccountManager.update_profile(
+            session_id,
+            first_name=new_first_name
+        )
+        
+        if success:
+            # Edit the main message to show success
+            await bot.edit_message_text(
+                "First name updated successfully!",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.edit_profile_keyboard(session_id)
+            )
+        else:
+            # Edit the main message to show error
+            await bot.edit_message_text(
+                f"Failed to update first name: {result_message}",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.edit_profile_keyboard(session_id)
+            )
+        
+        state['waiting_for_input'] = False
     
-    if success:
+    elif action.startswith('edit_last_name:'):
+        session_id = action.split(':')[1]
+        new_last_name = None if message.text.lower() == 'none' else message.text
         
-        success, sessions_or_error = await AccountManager.get_active_sessions(session_id)
+        # Edit the main message to show processing
+        await bot.edit_message_text(
+            "Updating last name, please wait...",
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id']
+        )
+        
+        # Update profile
+        success, result_message = await AccountManager.update_profile(
+            session_id,
+            last_name=new_last_name
+        )
         
         if success:
-            
-            sessions_text = format_sessions_info(sessions_or_error)
-            
-            
+            # Edit the main message to show success
             await bot.edit_message_text(
-                f"✅ {Language.get_text('all_sessions_terminated')}\n\n{sessions_text}",
-                chat_id=chat_id,
-                message_id=message_id,
-                reply_markup=generate_sessions_keyboard(session_id, sessions_or_error),
-                parse_mode="HTML"
+                "Last name updated successfully!",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.edit_profile_keyboard(session_id)
             )
         else:
-            # Show success message but couldn't refresh sessions
+            # Edit the main message to show error
             await bot.edit_message_text(
-                f"✅ {Language.get_text('all_sessions_terminated')}",
-                chat_id=chat_id,
-                message_id=message_id,
-                reply_markup=Keyboards.manage_sessions_keyboard(session_id)
+                f"Failed to update last name: {result_message}",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.edit_profile_keyboard(session_id)
             )
-    else:
-        # Show error message
+        
+        state['waiting_for_input'] = False
+    
+    elif action.startswith('edit_username:'):
+        session_id = action.split(':')[1]
+        new_username = message.text
+        
+        # Edit the main message to show processing
         await bot.edit_message_text(
-            f"❌ {Language.get_text('failed_terminate_sessions')}: {result_message}",
-            chat_id=chat_id,
-            message_id=message_id,
-            reply_markup=Keyboards.manage_sessions_keyboard(session_id)
+            "Updating username, please wait...",
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id']
         )
+        
+        # Update profile
+        success, result_message = await AccountManager.update_profile(
+            session_id,
+            username=new_username
+        )
+        
+        if success:
+            # Edit the main message to show success
+            await bot.edit_message_text(
+                "Username updated successfully!",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.edit_profile_keyboard(session_id)
+            )
+        else:
+            # Edit the main message to show error
+            await bot.edit_message_text(
+                f"Failed to update username: {result_message}",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.edit_profile_keyboard(session_id)
+            )
+        
+        state['waiting_for_input'] = False
     
-    # Update the stored message ID and chat ID
-    state['main_message_id'] = message_id
-    state['chat_id'] = chat_id
-    
-    # Answer the callback query to remove the loading state
-    await bot.answer_callback_query(call.id)
-
-
-# Change photo functionality has been removed as requested
-
-
-@bot.callback_query_handler(func=lambda call: call.data.startswith('manage_sessions:'))
-async def manage_sessions_back_callback(call):
-    """Handle the manage sessions callback for returning from session list."""
-    session_id = call.data.split(':')[1]
-    
-    # Use the stored message ID or the current message ID
-    message_id = state.get('main_message_id') or call.message.message_id
-    chat_id = state.get('chat_id') or call.message.chat.id
-    
-    # Edit the message to show the session management menu
-    await bot.edit_message_text(
-        Language.get_text("session_management"),
-        chat_id=chat_id,
-        message_id=message_id,
-        reply_markup=Keyboards.manage_sessions_keyboard(session_id)
-    )
-    
-    # Update the stored message ID and chat ID
-    state['main_message_id'] = message_id
-    state['chat_id'] = chat_id
-    
-    # Answer the callback query to remove the loading state
-    await bot.answer_callback_query(call.id)
-
-
-@bot.callback_query_handler(func=lambda call: call.data.startswith('view_active_sessions:'))
-async def view_active_sessions_callback(call):
-    """Handle the view active sessions callback."""
-    session_id = call.data.split(':')[1]
-    
-    # Use the stored message ID or the current message ID
-    message_id = state.get('main_message_id') or call.message.message_id
-    chat_id = state.get('chat_id') or call.message.chat.id
-    
-    # Show loading message
-    await bot.edit_message_text(
-        Language.get_text("fetching_sessions"),
-        chat_id=chat_id,
-        message_id=message_id
-    )
-    
-    # Get active sessions
-    success, sessions_or_error = await AccountManager.get_active_sessions(session_id)
+    elif action.startswith('edit_bio:'):
+        session_id = action.split(':')[1]
+        new_bio = None if message.text.lower() == 'none' else message.text
+        
+        # Edit the main message to show processing
+        await bot.edit_message_text(
+            "Updating bio, please wait...",
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id']
+        )
+        
+        # Update profile
+        success, result_message = await AccountManager.update_profile(
+            session_id,
+            bio=new_bio
+        )
+        
+        if success:
+            # Edit the main message to show success
+            await bot.edit_message_text(
+                "Bio updated successfully!",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.edit_profile_keyboard(session_id)
+            )
+        else:
+            # Edit the main message to show error
+            await bot.edit_message_text(
+                f"Failed to update bio: {result_message}",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.edit_profile_keyboard(session_id)
+            )
+        
+        state['waiting_for_input'] = False
     
-    if success:
-        # Format sessions information
-        sessions_text = format_sessions_info(sessions_or_error)
+    elif action.startswith('edit_tags:'):
+        session_id = action.split(':')[1]
+        tags = [] if message.text.lower() == 'none' else message.text.split(',')
         
-        # Generate keyboard with session-specific actions
-        keyboard = generate_sessions_keyboard(session_id, sessions_or_error)
+        if SessionManager.set_tags(session_id, tags):
+            result_text = Language.get_text("tags_updated")
+        else:
+            result_text = "Failed to update tags: Session not found"
         
-        # Edit the message to show sessions
         await bot.edit_message_text(
-            sessions_text,
-            chat_id=chat_id,
-            message_id=message_id,
-            reply_markup=keyboard,
-            parse_mode="HTML"
+            result_text,
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id'],
+            reply_markup=Keyboards.account_details_keyboard(session_id)
         )
-    else:
-        # Show error message
+        
+        state['waiting_for_input'] = False
+    
+    # Handle 2FA password flow
+    elif action == 'current_2fa_password':
+        current_password = message.text
+        state['temp_data']['current_password'] = current_password
+        state['current_action'] = 'new_2fa_password'
+        
+        # Edit the main message to prompt for new password
         await bot.edit_message_text(
-            f"❌ {Language.get_text('failed_terminate_sessions')}: {sessions_or_error}",
-            chat_id=chat_id,
-            message_id=message_id,
-            reply_markup=Keyboards.manage_sessions_keyboard(session_id)
+            Messages.NEW_2FA_PROMPT,
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id'],
+            reply_markup=Keyboards.back_home_keyboard()
         )
     
-    # Update the stored message ID and chat ID
-    state['main_message_id'] = message_id
-    state['chat_id'] = chat_id
-    
-    # Answer the callback query to remove the loading state
-    await bot.answer_callback_query(call.id)
-
-
-@bot.callback_query_handler(func=lambda call: call.data.startswith('terminate_session:'))
-async def terminate_session_callback(call):
-    """Handle the terminate specific session callback."""
-    parts = call.data.split(':')
-    session_id = parts[1]
-    auth_hash = int(parts[2])
-    
-    # Use the stored message ID or the current message ID
-    message_id = state.get('main_message_id') or call.message.message_id
-    chat_id = state.get('chat_id') or call.message.chat.id
-    
-    # Show loading message
-    await bot.edit_message_text(
-        Language.get_text("terminating_sessions"),
-        chat_id=chat_id,
-        message_id=message_id
-    )
-    
-    # Terminate the specific session
-    success, result_message = await AccountManager.terminate_sessions(session_id, session_ids=[auth_hash])
-    
-    if success:
-        # Get updated sessions after termination
-        success, sessions_or_error = await AccountManager.get_active_sessions(session_id)
+    elif action == 'new_2fa_password':
+        new_password = message.text
+        session_id = state['temp_data']['session_id']
+        current_password = state['temp_data'].get('current_password')
+        
+        # Edit the main message to show processing
+        await bot.edit_message_text(
+            "Updating 2FA password, please wait...",
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id']
+        )
+        
+        # Update 2FA
+        success, result_message = await AccountManager.update_2fa(
+            session_id,
+            current_password=current_password,
+            new_password=new_password
+        )
         
         if success:
-            sessions_text = format_sessions_info(sessions_or_error)
-            
-            keyboard = generate_sessions_keyboard(session_id, sessions_or_error)
-            
+            # Edit the main message to show success
             await bot.edit_message_text(
-                f"✅ {Language.get_text('session_terminated')}\n\n{sessions_text}",
-                chat_id=chat_id,
-                message_id=message_id,
-                reply_markup=keyboard,
-                parse_mode="HTML"
+                "2FA password updated successfully!",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.change_2fa_keyboard(session_id)
             )
         else:
+            # Edit the main message to show error
             await bot.edit_message_text(
-                f"{Language.get_text('session_terminated')}\n{Language.get_text('fetching_sessions')} {sessions_or_error}",
-                chat_id=chat_id,
-                message_id=message_id,
-                reply_markup=Keyboards.manage_sessions_keyboard(session_id)
+                f"Failed to update 2FA password: {result_message}",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.change_2fa_keyboard(session_id)
             )
-    else:
-        # Show error message
-        await bot.edit_message_text(
-            f"❌ {Language.get_text('failed_terminate_sessions')}: {result_message}",
-            chat_id=chat_id,
-            message_id=message_id,
-            reply_markup=Keyboards.manage_sessions_keyboard(session_id)
-        )
-    
-    # Update the stored message ID and chat ID
-    state['main_message_id'] = message_id
-    state['chat_id'] = chat_id
-    
-    # Answer the callback query to remove the loading state
-    await bot.answer_callback_query(call.id)
-
-
-def format_sessions_info(sessions):
-    """Format sessions information for display."""
-    if not sessions:
-        return Language.get_text("no_sessions")
-    
-    # Start with header
-    text = Language.get_text("active_sessions_header")
-    
-    # Store session hashes for the state
-    state['temp_data']['sessions'] = {}
-    
-    # Add each session
-    for i, session in enumerate(sessions, 1):
-        # Mark current session
-        current_marker = Language.get_text("current_session") if session["is_current"] else ""
-        
-        # Store session hash with index
-        session_hash = session["hash"]
-        state['temp_data']['sessions'][i] = session_hash
-        
-        # Format session information using language keys
-        text += Language.get_text("session_number").format(number=i, current_marker=current_marker) + "\n"
-        text += Language.get_text("device").format(device_model=session['device_model']) + "\n"
-        text += Language.get_text("platform").format(platform=session['platform'], system_version=session['system_version']) + "\n"
-        text += Language.get_text("app").format(app_name=session['app_name'], app_version=session['app_version']) + "\n"
-        text += Language.get_text("created").format(date_created=session['date_created']) + "\n"
-        text += Language.get_text("last_active").format(date_active=session['date_active']) + "\n"
-        text += Language.get_text("ip").format(ip=session['ip']) + "\n"
-        text += Language.get_text("location").format(country=session['country'], region=session['region']) + "\n"
-        
-        # Add official app and password pending indicators if applicable
-        if session["is_official_app"]:
-            text += Language.get_text("official_app") + "\n"
-        if session["is_password_pending"]:
-            text += Language.get_text("password_pending") + "\n"
-        
-        # Add session hash for debugging/reference
-        text += Language.get_text("session_id").format(hash=session_hash) + "\n"
         
-        # Add separator between sessions
-        if i < len(sessions):
-            text += "\n" + "-" * 30 + "\n\n"
-    
-    return text
-
-
-def generate_sessions_keyboard(session_id, sessions):
-    """Generate keyboard with buttons for each session."""
-    keyboard = InlineKeyboardMarkup(row_width=2)
-    
-    # Add buttons for each session
-    buttons = []
-    for i in range(1, len(sessions) + 1):
-        # Skip current session as it can't be terminated
-        if sessions[i-1]["is_current"]:
-            continue
-            
-        buttons.append(InlineKeyboardButton(
-            Language.get_text("terminate_session").format(number=i),
-            callback_data=f"terminate_session:{session_id}:{sessions[i-1]['hash']}"
-        ))
-    
-    # Add buttons in pairs
-    for i in range(0, len(buttons), 2):
-        if i + 1 < len(buttons):
-            keyboard.add(buttons[i], buttons[i+1])
-        else:
-            keyboard.add(buttons[i])
-    
-    # Add back button
-    keyboard.add(InlineKeyboardButton(Language.get_text("terminate_all_sessions"), callback_data=f"terminate_all:{session_id}"))
-    keyboard.add(InlineKeyboardButton("╠═══ BACK ← ═══╣", callback_data=f"manage_sessions:{session_id}"))
-    
-    return keyboard
-
-
-# Message handlers
-@bot.message_handler(func=lambda message: state['waiting_for_input'])
-@rate_limit(calls_per_second=5)  # محدود کردن تعداد فراخوانی‌ها برای ورودی کاربر
-async def handle_input(message):
-    """Handle user input based on current state."""
-    try:
-        action = state['current_action']
-    except KeyError:
-        logger.error("Current action not found in state")
-        # بازگشت به منوی اصلی در صورت بروز خطا
         state['waiting_for_input'] = False
-        state['current_action'] = None
-        await safe_execute(
-            bot.send_message(
+    
+    # Handle change photo flow
+    elif action.startswith('change_photo:'):
+        if message.content_type != 'photo':
+            await bot.send_message(
                 message.chat.id,
-                "An error occurred. Returning to main menu...",
-                reply_markup=Keyboards.home_keyboard()
+                "Please send an image as the new profile photo."
             )
+            return
+        
+        session_id = action.split(':')[1]
+        logger.info(f"Starting profile photo update for session {session_id}")
+        
+        # Notify user that we're processing
+        status_message = await bot.send_message(
+            message.chat.id,
+            "⏳ Processing your photo, please wait..."
         )
-        return
-    
-    # Handle add account flow
-    if action == 'api_hash':
-        state['add_account']['api_hash'] = message.text
-        state['current_action'] = 'api_id'
         
-        # Use the stored message ID or create a new one
-        if state.get('main_message_id'):
-            await safe_execute(
-                bot.edit_message_text(
-                    Messages.API_ID_PROMPT,
-                    chat_id=state['chat_id'],
-                    message_id=state['main_message_id'],
-                    reply_markup=Keyboards.back_home_keyboard()
+        try:
+            # Get the photo file - use the largest available photo
+            logger.debug(f"Getting photo file info for file_id: {message.photo[-1].file_id}")
+            file_info = await bot.get_file(message.photo[-1].file_id)
+            logger.debug(f"Downloading file from path: {file_info.file_path}")
+            downloaded_file = await bot.download_file(file_info.file_path)
+            logger.debug(f"Downloaded file size: {len(downloaded_file)} bytes")
+            
+            # Save photo to a temporary file with a unique name
+            import uuid
+            temp_photo_path = f"temp_photo_{uuid.uuid4()}.jpg"
+            logger.debug(f"Saving to temporary file: {temp_photo_path}")
+            with open(temp_photo_path, 'wb') as f:
+                f.write(downloaded_file)
+            
+            logger.debug(f"Temporary file created, size: {os.path.getsize(temp_photo_path)} bytes")
+            
+            # Use our dedicated function to change the profile photo
+            success, message_text = await AccountManager.change_profile_photo(session_id, temp_photo_path)
+            
+            # Clean up the temporary file regardless of success
+            if os.path.exists(temp_photo_path):
+                os.remove(temp_photo_path)
+                logger.debug(f"Temporary file {temp_photo_path} removed")
+            
+            if success:
+                await bot.edit_message_text(
+                    "✅ Profile photo updated successfully!",
+                    chat_id=message.chat.id,
+                    message_id=status_message.message_id
                 )
-            )
-        else:
-            # If no main message exists, create one
-            sent_message = await safe_execute(
-                bot.send_message(
-                    message.chat.id, 
-                    Messages.API_ID_PROMPT,
-                    reply_markup=Keyboards.back_home_keyboard()
+                
+                await bot.send_message(
+                    message.chat.id,
+                    "You can now view your updated profile.",
+                    reply_markup=Keyboards.account_details_keyboard(session_id)
+                )
+            else:
+                await bot.edit_message_text(
+                    f"❌ Failed to update profile photo: {message_text}",
+                    chat_id=message.chat.id,
+                    message_id=status_message.message_id
+                )
+                
+                await bot.send_message(
+                    message.chat.id,
+                    "Please try again with a different photo.",
+                    reply_markup=Keyboards.account_details_keyboard(session_id)
                 )
+        except Exception as e:
+            logger.error(f"Unexpected error in photo processing: {str(e)}")
+            logger.error(traceback.format_exc())
+            
+            # Clean up the temporary file if it exists
+            if 'temp_photo_path' in locals() and os.path.exists(temp_photo_path):
+                os.remove(temp_photo_path)
+                logger.debug(f"Temporary file {temp_photo_path} removed after error")
+            
+            await bot.edit_message_text(
+                f"❌ Failed to process photo: {str(e)}",
+                chat_id=message.chat.id,
+                message_id=status_message.message_id
             )
             
-            # If message sending failed, return early
-            if sent_message is None:
-                return
-                
-            state['main_message_id'] = sent_message.message_id
-            state['chat_id'] = message.chat.id
+            await bot.send_message(
+                message.chat.id,
+                "Please try again with a different photo.",
+                reply_markup=Keyboards.account_details_keyboard(session_id)
+            )
+        
+        state['waiting_for_input'] = False
     
-    elif action == 'api_id':
-        state['add_account']['api_id'] = message.text
-        state['current_action'] = 'phone'
+    # Handle send message flow
+    elif action == 'send_message_username':
+        state['temp_data']['username'] = message.text
+        state['current_action'] = 'send_message_content'
+        
+        # Edit the main message to prompt for message content
+        await bot.edit_message_text(
+            Messages.MESSAGE_CONTENT_PROMPT,
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id'],
+            reply_markup=Keyboards.back_home_keyboard()
+        )
+    
+    elif action == 'send_message_content':
+        content = message.text if message.content_type == 'text' else message.caption or ''
+        if await read_message_template(content, MessageTemplate.ACCOUNT_FIELDS + ('recipient',)) is None:
+            return
         
-        # Edit the main message
+        media_path = await read_message_media(message)
+        if media_path is False:
+            return
+        
+        state['temp_data']['content'] = content
+        state['temp_data']['media_path'] = media_path
+        state['current_action'] = 'send_message_target'
+        
+        # Edit the main message to prompt for the target accounts
         await bot.edit_message_text(
-            Messages.PHONE_PROMPT,
+            Messages.TARGET_PROMPT,
             chat_id=state['chat_id'],
             message_id=state['main_message_id'],
             reply_markup=Keyboards.back_home_keyboard()
         )
     
-    elif action == 'phone':
-        state['add_account']['phone'] = message.text
+    elif action == 'send_message_target':
+        selector = await read_target_selector(message.text)
+        if selector is None:
+            return
+        
+        username = state['temp_data']['username']
+        content = state['temp_data']['content']
         
         # Edit the main message to show processing
         await bot.edit_message_text(
-            "Processing your request, please wait...",
+            "Sending message with all accounts, please wait...",
             chat_id=state['chat_id'],
             message_id=state['main_message_id']
         )
         
-        # Create session
-        success, result = await SessionManager.create_session(
-            state['add_account']['api_id'],
-            state['add_account']['api_hash'],
-            state['add_account']['phone'],
-            bot,
-            message.chat.id,
-            message.message_id
+        # Send message with all accounts, reading any media from disk once
+        media = open_message_media(state['temp_data'].get('media_path'))
+        try:
+            report = await AccountManager.send_message_with_all_accounts(
+                username, content, selector, force=selector.force, media=media
+            )
+        finally:
+            if media:
+                media.close()
+            discard_message_media(state['temp_data'].get('media_path'))
+        
+        # Edit the main message to show the summary
+        await bot.edit_message_text(
+            format_bulk_summary(f"Message sent successfully with {report.success_count} accounts!", report),
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id'],
+            reply_markup=Keyboards.home_keyboard()
         )
+        await send_bulk_report(state['chat_id'], report)
         
-        if success:
-            state['add_account']['client'] = result
-            state['current_action'] = 'code'
-            
-            # Edit the main message to prompt for code
-            await bot.edit_message_text(
-                Messages.CODE_PROMPT,
-                chat_id=state['chat_id'],
-                message_id=state['main_message_id'],
-                reply_markup=Keyboards.back_home_keyboard()
-            )
-        else:
-            # Edit the main message to show error
-            await bot.edit_message_text(
-                f"Failed to create session: {result}",
-                chat_id=state['chat_id'],
-                message_id=state['main_message_id'],
-                reply_markup=Keyboards.back_home_keyboard()
-            )
-            state['waiting_for_input'] = False
+        state['waiting_for_input'] = False
     
-    elif action == 'code':
-        state['add_account']['code'] = message.text
+    # Handle join channel flow
+    elif action == 'join_channel':
+        if not LinkParser.parse_invite_hash(message.text):
+            try:
+                LinkParser.parse_username(message.text)
+            except ValueError as e:
+                # Keep waiting for a valid username or link
+                await bot.edit_message_text(
+                    f"{e}\n\n{Messages.JOIN_CHANNEL_PROMPT}",
+                    chat_id=state['chat_id'],
+                    message_id=state['main_message_id'],
+                    reply_markup=Keyboards.back_home_keyboard()
+                )
+                return
         
-        # Edit the main message to show processing
+        state['temp_data'] = {'username': message.text}
+        state['current_action'] = 'join_channel_target'
+        
+        # Edit the main message to prompt for the target accounts
         await bot.edit_message_text(
-            "Verifying code, please wait...",
+            Messages.TARGET_PROMPT,
             chat_id=state['chat_id'],
-            message_id=state['main_message_id']
+            message_id=state['main_message_id'],
+            reply_markup=Keyboards.back_home_keyboard()
         )
+    
+    elif action == 'join_channel_target':
+        selector = await read_target_selector(message.text)
+        if selector is None:
+            return
         
-        # Sign in with code
-        success, result, user_info = await SessionManager.sign_in_with_code(
-            state['add_account']['client'],
-            state['add_account']['phone'],
-            state['add_account']['code']
+        username = state['temp_data']['username']
+        
+        # Edit the main message to show processing
+        await bot.edit_message_text(
+            "Joining channel with all accounts, please wait...",
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id']
         )
         
-        if success:
-            # Add session
-            session_id = SessionManager.add_session(
-                state['add_account']['api_id'],
-                state['add_account']['api_hash'],
-                state['add_account']['phone'],
-                result,
-                user_info['first_name'],
-                str(user_info['id']),
-                user_info['username']
-            )
-            
-            # Edit the main message to show success
+        try:
+            # Join channel with all accounts
+            report = await AccountManager.join_channel_with_all_accounts(username, selector, force=selector.force)
+        except ValueError as e:
             await bot.edit_message_text(
-                Messages.ACCOUNT_ADDED,
+                f"Failed to join channel: {e}",
                 chat_id=state['chat_id'],
                 message_id=state['main_message_id'],
                 reply_markup=Keyboards.home_keyboard()
             )
             state['waiting_for_input'] = False
-        elif "Two-step verification" in result:
-            state['current_action'] = 'password'
-            
-            # Edit the main message to prompt for password
-            await bot.edit_message_text(
-                Messages.PASSWORD_PROMPT,
-                chat_id=state['chat_id'],
-                message_id=state['main_message_id'],
-                reply_markup=Keyboards.back_home_keyboard()
-            )
-        else:
-            # Edit the main message to show error
-            await bot.edit_message_text(
-                f"Failed to sign in: {result}",
-                chat_id=state['chat_id'],
-                message_id=state['main_message_id'],
-                reply_markup=Keyboards.back_home_keyboard()
-            )
-            state['waiting_for_input'] = False
-    
-    elif action == 'password':
-        state['add_account']['password'] = message.text
+            return
         
-        # Edit the main message to show processing
+        # Edit the main message to show the summary
         await bot.edit_message_text(
-            "Verifying password, please wait...",
+            format_bulk_summary(f"Joined channel successfully with {report.success_count} accounts!", report),
             chat_id=state['chat_id'],
-            message_id=state['main_message_id']
-        )
-        
-        # Sign in with password
-        success, result, user_info = await SessionManager.sign_in_with_code(
-            state['add_account']['client'],
-            state['add_account']['phone'],
-            state['add_account']['code'],
-            state['add_account']['password']
+            message_id=state['main_message_id'],
+            reply_markup=Keyboards.home_keyboard()
         )
+        await send_bulk_report(state['chat_id'], report)
         
-        if success:
-            # Add session
-            session_id = SessionManager.add_session(
-                state['add_account']['api_id'],
-                state['add_account']['api_hash'],
-                state['add_account']['phone'],
-                result,
-                user_info['first_name'],
-                str(user_info['id']),
-                user_info['username']
-            )
-            
-            # Edit the main message to show success
-            await bot.edit_message_text(
-                Messages.ACCOUNT_ADDED,
-                chat_id=state['chat_id'],
-                message_id=state['main_message_id'],
-                reply_markup=Keyboards.home_keyboard()
-            )
+        state['waiting_for_input'] = False
+    
+    # Handle bulk outreach flow
+    elif action == 'outreach_recipients':
+        if message.content_type == 'document':
+            text = await read_document_text(message)
         else:
-            # Edit the main message to show error
+            text = message.text or ''
+        
+        recipients = AccountManager.parse_recipients(text)
+        if not recipients:
             await bot.edit_message_text(
-                f"Failed to sign in: {result}",
+                f"{Language.get_text('no_recipients')}\n\n{Messages.OUTREACH_RECIPIENTS_PROMPT}",
                 chat_id=state['chat_id'],
                 message_id=state['main_message_id'],
                 reply_markup=Keyboards.back_home_keyboard()
             )
+            return
         
-        state['waiting_for_input'] = False
-    
-    # Handle profile editing
-    elif action.startswith('edit_first_name:'):
-        session_id = action.split(':')[1]
-        new_first_name = message.text
+        state['temp_data'] = {'recipients': recipients}
+        state['current_action'] = 'outreach_content'
         
-        # Edit the main message to show processing
+        # Edit the main message to prompt for message content
         await bot.edit_message_text(
-            "Updating first name, please wait...",
+            f"{len(recipients)} recipients loaded.\n\n{Messages.MESSAGE_CONTENT_PROMPT}",
             chat_id=state['chat_id'],
-            message_id=state['main_message_id']
+            message_id=state['main_message_id'],
+            reply_markup=Keyboards.back_home_keyboard()
         )
+    
+    elif action == 'outreach_content':
+        available = MessageTemplate.ACCOUNT_FIELDS + tuple(MessageTemplate.recipient_fields(state['temp_data']['recipients']))
+        content = message.text if message.content_type == 'text' else message.caption or ''
+        if await read_message_template(content, available) is None:
+            return
         
-        # Update profile
-        success, result_message = await AccountManager.update_profile(
-            session_id,
-            first_name=new_first_name
-        )
+        media_path = await read_message_media(message)
+        if media_path is False:
+            return
         
-        if success:
-            # Edit the main message to show success
-            await bot.edit_message_text(
-                "First name updated successfully!",
-                chat_id=state['chat_id'],
-                message_id=state['main_message_id'],
-                reply_markup=Keyboards.edit_profile_keyboard(session_id)
-            )
-        else:
-            # Edit the main message to show error
-            await bot.edit_message_text(
-                f"Failed to update first name: {result_message}",
-                chat_id=state['chat_id'],
-                message_id=state['main_message_id'],
-                reply_markup=Keyboards.edit_profile_keyboard(session_id)
-            )
+        state['temp_data']['content'] = content
+        state['temp_data']['media_path'] = media_path
+        state['current_action'] = 'outreach_target'
         
-        state['waiting_for_input'] = False
+        # Edit the main message to prompt for the target accounts
+        await bot.edit_message_text(
+            Messages.TARGET_PROMPT,
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id'],
+            reply_markup=Keyboards.back_home_keyboard()
+        )
     
-    elif action.startswith('edit_last_name:'):
-        session_id = action.split(':')[1]
-        new_last_name = None if message.text.lower() == 'none' else message.text
+    elif action == 'outreach_target':
+        selector = await read_target_selector(message.text)
+        if selector is None:
+            return
+        
+        recipients = state['temp_data']['recipients']
+        content = state['temp_data']['content']
         
         # Edit the main message to show processing
         await bot.edit_message_text(
-            "Updating last name, please wait...",
+            f"Sending message to {len(recipients)} recipients, please wait...",
             chat_id=state['chat_id'],
             message_id=state['main_message_id']
         )
         
-        # Update profile
-        success, result_message = await AccountManager.update_profile(
-            session_id,
-            last_name=new_last_name
+        media = open_message_media(state['temp_data'].get('media_path'))
+        try:
+            report = await AccountManager.send_message_to_recipients(
+                recipients, content, selector, force=selector.force, media=media
+            )
+        finally:
+            if media:
+                media.close()
+            discard_message_media(state['temp_data'].get('media_path'))
+        
+        # Edit the main message to show the summary
+        await bot.edit_message_text(
+            format_bulk_summary(f"Message sent successfully to {report.success_count} recipients!", report),
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id'],
+            reply_markup=Keyboards.home_keyboard()
         )
+        await send_bulk_report(state['chat_id'], report)
         
-        if success:
-            # Edit the main message to show success
-            await bot.edit_message_text(
-                "Last name updated successfully!",
-                chat_id=state['chat_id'],
-                message_id=state['main_message_id'],
-                reply_markup=Keyboards.edit_profile_keyboard(session_id)
-            )
+        state['waiting_for_input'] = False
+    
+    # Handle bulk 2FA flow
+    elif action == 'bulk_2fa_source':
+        if message.content_type == 'document':
+            text = await read_document_text(message)
         else:
-            # Edit the main message to show error
-            await bot.edit_message_text(
-                f"Failed to update last name: {result_message}",
-                chat_id=state['chat_id'],
-                message_id=state['main_message_id'],
-                reply_markup=Keyboards.edit_profile_keyboard(session_id)
-            )
+            text = message.text or ''
         
-        state['waiting_for_input'] = False
+        if text.strip().lower() == 'generate':
+            state['temp_data'] = {'passwords': None}
+        else:
+            try:
+                passwords, unmatched = AccountManager.parse_password_rows(
+                    text, SessionManager.read_sessions()['sessions']
+                )
+            except ValueError as e:
+                passwords, unmatched = {}, [str(e)]
+            
+            if not passwords:
+                await bot.edit_message_text(
+                    f"{Language.get_text('no_matching_rows')}\n{', '.join(unmatched[:10])}\n\n{Language.get_text('bulk_2fa_prompt')}",
+                    chat_id=state['chat_id'],
+                    message_id=state['main_message_id'],
+                    reply_markup=Keyboards.back_home_keyboard()
+                )
+                return
+            
+            state['temp_data'] = {'passwords': passwords, 'unmatched': unmatched}
+        
+        state['current_action'] = 'bulk_2fa_target'
+        
+        # Edit the main message to prompt for the target accounts
+        await bot.edit_message_text(
+            Messages.TARGET_PROMPT,
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id'],
+            reply_markup=Keyboards.back_home_keyboard()
+        )
     
-    elif action.startswith('edit_username:'):
-        session_id = action.split(':')[1]
-        new_username = message.text
+    elif action == 'bulk_2fa_target':
+        selector = await read_target_selector(message.text)
+        if selector is None:
+            return
+        
+        passwords = state['temp_data']['passwords']
+        total = len(SessionManager.select_sessions(selector))
+        if passwords is not None:
+            total = len(set(passwords) & set(SessionManager.select_sessions(selector)))
         
         # Edit the main message to show processing
         await bot.edit_message_text(
-            "Updating username, please wait...",
+            "Changing 2FA passwords, please wait...",
             chat_id=state['chat_id'],
             message_id=state['main_message_id']
         )
         
-        # Update profile
-        success, result_message = await AccountManager.update_profile(
-            session_id,
-            username=new_username
-        )
-        
-        if success:
-            # Edit the main message to show success
-            await bot.edit_message_text(
-                "Username updated successfully!",
-                chat_id=state['chat_id'],
-                message_id=state['main_message_id'],
-                reply_markup=Keyboards.edit_profile_keyboard(session_id)
+        try:
+            report = await AccountManager.rotate_2fa(
+                passwords, selector, progress=bulk_progress_reporter("2FA rotation", total)
             )
-        else:
-            # Edit the main message to show error
+        except ValueError as e:
             await bot.edit_message_text(
-                f"Failed to update username: {result_message}",
+                f"Error changing 2FA passwords: {e}",
                 chat_id=state['chat_id'],
                 message_id=state['main_message_id'],
-                reply_markup=Keyboards.edit_profile_keyboard(session_id)
+                reply_markup=Keyboards.home_keyboard()
             )
+            state['waiting_for_input'] = False
+            return
         
-        state['waiting_for_input'] = False
-    
-    elif action.startswith('edit_bio:'):
-        session_id = action.split(':')[1]
-        new_bio = None if message.text.lower() == 'none' else message.text
+        summary = format_bulk_summary(f"2FA password changed on {report.success_count} accounts!", report)
+        if state['temp_data'].get('unmatched'):
+            summary += "\n\n" + Language.get_text("unmatched_rows").format(count=len(state['temp_data']['unmatched']))
         
-        # Edit the main message to show processing
+        # Edit the main message to show the summary
         await bot.edit_message_text(
-            "Updating bio, please wait...",
+            summary,
             chat_id=state['chat_id'],
-            message_id=state['main_message_id']
-        )
-        
-        # Update profile
-        success, result_message = await AccountManager.update_profile(
-            session_id,
-            bio=new_bio
+            message_id=state['main_message_id'],
+            reply_markup=Keyboards.home_keyboard()
         )
+        await send_bulk_report(state['chat_id'], report)
         
-        if success:
-            # Edit the main message to show success
-            await bot.edit_message_text(
-                "Bio updated successfully!",
-                chat_id=state['chat_id'],
-                message_id=state['main_message_id'],
-                reply_markup=Keyboards.edit_profile_keyboard(session_id)
-            )
+        state['waiting_for_input'] = False
+    
+    # Handle bulk profile flow
+    elif action == 'bulk_profile_source':
+        if message.content_type == 'document':
+            text = await read_document_text(message)
         else:
-            # Edit the main message to show error
+            text = message.text or ''
+        
+        try:
+            profiles, unmatched = AccountManager.parse_profile_source(text, SessionManager.read_sessions()['sessions'])
+        except ValueError as e:
+            profiles, unmatched = {}, [str(e)]
+        
+        if not profiles:
             await bot.edit_message_text(
-                f"Failed to update bio: {result_message}",
+                f"{Language.get_text('no_matching_rows')}\n{', '.join(unmatched[:10])}\n\n{Language.get_text('bulk_profile_prompt')}",
                 chat_id=state['chat_id'],
                 message_id=state['main_message_id'],
-                reply_markup=Keyboards.edit_profile_keyboard(session_id)
+                reply_markup=Keyboards.back_home_keyboard()
             )
+            return
         
-        state['waiting_for_input'] = False
-    
-    # Handle 2FA password flow
-    elif action == 'current_2fa_password':
-        current_password = message.text
-        state['temp_data']['current_password'] = current_password
-        state['current_action'] = 'new_2fa_password'
+        state['temp_data'] = {'profiles': profiles, 'unmatched': unmatched}
+        state['current_action'] = 'bulk_profile_target'
         
-        # Edit the main message to prompt for new password
+        # Edit the main message to prompt for the target accounts
         await bot.edit_message_text(
-            Messages.NEW_2FA_PROMPT,
+            Messages.TARGET_PROMPT,
             chat_id=state['chat_id'],
             message_id=state['main_message_id'],
             reply_markup=Keyboards.back_home_keyboard()
         )
     
-    elif action == 'new_2fa_password':
-        new_password = message.text
-        session_id = state['temp_data']['session_id']
-        current_password = state['temp_data'].get('current_password')
+    elif action == 'bulk_profile_target':
+        selector = await read_target_selector(message.text)
+        if selector is None:
+            return
+        
+        profiles = state['temp_data']['profiles']
+        total = len(set(profiles) & set(SessionManager.select_sessions(selector)))
         
         # Edit the main message to show processing
         await bot.edit_message_text(
-            "Updating 2FA password, please wait...",
+            "Updating profiles, please wait...",
             chat_id=state['chat_id'],
             message_id=state['main_message_id']
         )
         
-        # Update 2FA
-        success, result_message = await AccountManager.update_2fa(
-            session_id,
-            current_password=current_password,
-            new_password=new_password
+        report = await AccountManager.update_profiles(
+            profiles, selector, progress=bulk_progress_reporter("Profile update", total)
         )
         
-        if success:
-            # Edit the main message to show success
-            await bot.edit_message_text(
-                "2FA password updated successfully!",
-                chat_id=state['chat_id'],
-                message_id=state['main_message_id'],
-                reply_markup=Keyboards.change_2fa_keyboard(session_id)
-            )
-        else:
-            # Edit the main message to show error
-            await bot.edit_message_text(
-                f"Failed to update 2FA password: {result_message}",
-                chat_id=state['chat_id'],
-                message_id=state['main_message_id'],
-                reply_markup=Keyboards.change_2fa_keyboard(session_id)
-            )
+        summary = format_bulk_summary(f"Profile updated on {report.success_count} accounts!", report)
+        if state['temp_data'].get('unmatched'):
+            summary += "\n\n" + Language.get_text("unmatched_rows").format(count=len(state['temp_data']['unmatched']))
+        
+        # Edit the main message to show the summary
+        await bot.edit_message_text(
+            summary,
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id'],
+            reply_markup=Keyboards.home_keyboard()
+        )
+        await send_bulk_report(state['chat_id'], report)
         
         state['waiting_for_input'] = False
     
-    # Handle change photo flow
-    elif action.startswith('change_photo:'):
-        if message.content_type != 'photo':
-            await bot.send_message(
-                message.chat.id,
-                "Please send an image as the new profile photo."
-            )
-            return
-        
-        session_id = action.split(':')[1]
-        logger.info(f"Starting profile photo update for session {session_id}")
+    # Handle import sessions flow
+    elif action == 'import_directory':
+        directory = message.text.strip()
+        verify = directory.lower().endswith(' verify')
+        if verify:
+            directory = directory[:-len(' verify')].strip()
         
-        # Notify user that we're processing
-        status_message = await bot.send_message(
-            message.chat.id,
-            "⏳ Processing your photo, please wait..."
-        )
-        
-        try:
-            # Get the photo file - use the largest available photo
-            logger.debug(f"Getting photo file info for file_id: {message.photo[-1].file_id}")
-            file_info = await bot.get_file(message.photo[-1].file_id)
-            logger.debug(f"Downloading file from path: {file_info.file_path}")
-            downloaded_file = await bot.download_file(file_info.file_path)
-            logger.debug(f"Downloaded file size: {len(downloaded_file)} bytes")
-            
-            # Save photo to a temporary file with a unique name
-            import uuid
-            temp_photo_path = f"temp_photo_{uuid.uuid4()}.jpg"
-            logger.debug(f"Saving to temporary file: {temp_photo_path}")
-            with open(temp_photo_path, 'wb') as f:
-                f.write(downloaded_file)
-            
-            logger.debug(f"Temporary file created, size: {os.path.getsize(temp_photo_path)} bytes")
-            
-            # Use our dedicated function to change the profile photo
-            success, message_text = await AccountManager.change_profile_photo(session_id, temp_photo_path)
-            
-            # Clean up the temporary file regardless of success
-            if os.path.exists(temp_photo_path):
-                os.remove(temp_photo_path)
-                logger.debug(f"Temporary file {temp_photo_path} removed")
-            
-            if success:
-                await bot.edit_message_text(
-                    "✅ Profile photo updated successfully!",
-                    chat_id=message.chat.id,
-                    message_id=status_message.message_id
-                )
-                
-                await bot.send_message(
-                    message.chat.id,
-                    "You can now view your updated profile.",
-                    reply_markup=Keyboards.account_details_keyboard(session_id)
-                )
-            else:
-                await bot.edit_message_text(
-                    f"❌ Failed to update profile photo: {message_text}",
-                    chat_id=message.chat.id,
-                    message_id=status_message.message_id
-                )
-                
-                await bot.send_message(
-                    message.chat.id,
-                    "Please try again with a different photo.",
-                    reply_markup=Keyboards.account_details_keyboard(session_id)
-                )
-        except Exception as e:
-            logger.error(f"Unexpected error in photo processing: {str(e)}")
-            logger.error(traceback.format_exc())
-            
-            # Clean up the temporary file if it exists
-            if 'temp_photo_path' in locals() and os.path.exists(temp_photo_path):
-                os.remove(temp_photo_path)
-                logger.debug(f"Temporary file {temp_photo_path} removed after error")
-            
+        if not os.path.isdir(directory):
             await bot.edit_message_text(
-                f"❌ Failed to process photo: {str(e)}",
-                chat_id=message.chat.id,
-                message_id=status_message.message_id
-            )
-            
-            await bot.send_message(
-                message.chat.id,
-                "Please try again with a different photo.",
-                reply_markup=Keyboards.account_details_keyboard(session_id)
+                f"Directory not found: {directory}\n\n{Language.get_text('import_directory_prompt')}",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.back_home_keyboard()
             )
+            return
         
-        state['waiting_for_input'] = False
-    
-    # Handle send message flow
-    elif action == 'send_message_username':
-        state['temp_data']['username'] = message.text
-        state['current_action'] = 'send_message_content'
+        state['temp_data'] = {'directory': directory, 'verify': verify}
+        state['current_action'] = 'import_credentials'
         
-        # Edit the main message to prompt for message content
+        # Edit the main message to prompt for the default API credentials
         await bot.edit_message_text(
-            Messages.MESSAGE_CONTENT_PROMPT,
+            Language.get_text("import_credentials_prompt"),
             chat_id=state['chat_id'],
             message_id=state['main_message_id'],
             reply_markup=Keyboards.back_home_keyboard()
         )
     
-    elif action == 'send_message_content':
-        username = state['temp_data']['username']
-        content = message.text
+    elif action == 'import_credentials':
+        api_id, api_hash = None, None
+        if message.text.strip() != '-':
+            parts = message.text.split()
+            if len(parts) != 2 or not parts[0].isdigit():
+                await bot.edit_message_text(
+                    Language.get_text("import_credentials_prompt"),
+                    chat_id=state['chat_id'],
+                    message_id=state['main_message_id'],
+                    reply_markup=Keyboards.back_home_keyboard()
+                )
+                return
+            api_id, api_hash = int(parts[0]), parts[1]
         
         # Edit the main message to show processing
         await bot.edit_message_text(
-            "Sending message with all accounts, please wait...",
+            "Importing session files, please wait...",
             chat_id=state['chat_id'],
             message_id=state['main_message_id']
         )
         
-        # Send message with all accounts
-        success_count = await AccountManager.send_message_with_all_accounts(username, content)
+        report, verify_report = await AccountManager.import_session_files(
+            state['temp_data']['directory'], api_id, api_hash, verify=state['temp_data']['verify']
+        )
+        
+        summary = format_bulk_summary(f"{report.success_count} sessions imported!", report)
+        if report.status_counts['updated'] or report.status_counts['duplicate']:
+            summary += "\n" + Language.get_text("import_status_counts").format(
+                updated=report.status_counts['updated'],
+                duplicate=report.status_counts['duplicate']
+            )
+        if verify_report:
+            summary += "\n\n" + format_bulk_summary(f"{verify_report.success_count} imported sessions verified!", verify_report)
         
-        # Edit the main message to show success
+        # Edit the main message to show the summary
         await bot.edit_message_text(
-            f"Message sent successfully with {success_count} accounts!",
+            summary,
             chat_id=state['chat_id'],
             message_id=state['main_message_id'],
             reply_markup=Keyboards.home_keyboard()
         )
+        await send_bulk_report(state['chat_id'], report)
+        if verify_report:
+            await send_bulk_report(state['chat_id'], verify_report)
         
         state['waiting_for_input'] = False
     
-    # Handle join channel flow
-    elif action == 'join_channel':
-        username = message.text
+    # Handle session sweep flow
+    elif action == 'sweep_target':
+        selector = await read_target_selector(message.text)
+        if selector is None:
+            return
         
         # Edit the main message to show processing
         await bot.edit_message_text(
-            "Joining channel with all accounts, please wait...",
+            "Checking the sessions of all accounts, please wait...",
             chat_id=state['chat_id'],
             message_id=state['main_message_id']
         )
         
-        # Join channel with all accounts
-        success_count = await AccountManager.join_channel_with_all_accounts(username)
+        report, totals = await AccountManager.sweep_sessions(selector, terminate=state['temp_data']['terminate'])
+        
+        summary = format_bulk_summary(f"Sessions checked with {report.success_count} accounts!", report)
+        summary += "\n\n" + Language.get_text("sweep_summary").format(
+            foreign=totals['foreign'], terminated=totals['terminated']
+        )
         
-        # Edit the main message to show success
+        # Edit the main message to show the summary
         await bot.edit_message_text(
-            f"Joined channel successfully with {success_count} accounts!",
+            summary,
             chat_id=state['chat_id'],
             message_id=state['main_message_id'],
             reply_markup=Keyboards.home_keyboard()
         )
+        await send_bulk_report(state['chat_id'], report)
         
         state['waiting_for_input'] = False
     
     # Handle send reaction flow
     elif action == 'send_reaction':
-        message_link = message.text
+        try:
+            LinkParser.parse_message(message.text)
+        except ValueError as e:
+            # Keep waiting for a valid link
+            await bot.edit_message_text(
+                f"{e}\n\n{Messages.REACTION_PROMPT}",
+                chat_id=state['chat_id'],
+                message_id=state['main_message_id'],
+                reply_markup=Keyboards.back_home_keyboard()
+            )
+            return
+        
+        state['temp_data'] = {'message_link': message.text}
+        state['current_action'] = 'send_reaction_target'
+        
+        # Edit the main message to prompt for the target accounts
+        await bot.edit_message_text(
+            Messages.TARGET_PROMPT,
+            chat_id=state['chat_id'],
+            message_id=state['main_message_id'],
+            reply_markup=Keyboards.back_home_keyboard()
+        )
+    
+    elif action == 'send_reaction_target':
+        selector = await read_target_selector(message.text)
+        if selector is None:
+            return
+        
+        message_link = state['temp_data']['message_link']
         
         # Edit the main message to show processing with safe execution
         await safe_execute(
@@ -2403,36 +6247,18 @@ async def handle_input(message):
         )
         
         try:
-            # Send reaction with all accounts using process_multiple_accounts for better performance
-            # Get all accounts first
-            sessions = SessionManager.read_sessions()
-            accounts = sessions.get('sessions', {})
-            
-            # Define a helper function for sending reaction with a single account
-            async def send_reaction_with_account(account_id, link):
-                # Implementation depends on your AccountManager structure
-                # This is a placeholder for the actual implementation
-                return await AccountManager.send_reaction(account_id, link)
-            
-            # Process all accounts in parallel
-            results = await process_multiple_accounts(
-                accounts.keys(),
-                send_reaction_with_account,
-                message_link
-            )
+            report = await AccountManager.send_reaction_with_all_accounts(message_link, selector, force=selector.force)
             
-            # Count successful operations
-            success_count = sum(1 for result in results if result)
-            
-            # Edit the main message to show success with safe execution
+            # Edit the main message to show the summary with safe execution
             await safe_execute(
                 bot.edit_message_text(
-                    f"Reaction sent successfully with {success_count} accounts!",
+                    format_bulk_summary(f"Reaction sent successfully with {report.success_count} accounts!", report),
                     chat_id=state['chat_id'],
                     message_id=state['main_message_id'],
                     reply_markup=Keyboards.home_keyboard()
                 )
             )
+            await send_bulk_report(state['chat_id'], report)
         except Exception as e:
             logger.error(f"Error sending reactions: {e}")
             # Show error message to user
@@ -2577,6 +6403,97 @@ async def help_command(message):
     # Reset waiting state
     state['waiting_for_input'] = False
 
+def convert_sessions_file(format_name):
+    """Rewrite the sessions file in another format and print the size change."""
+
+    try:
+        codec = StoreCodec(format_name)
+    except ValueError as e:
+        print(colored(str(e), 'red'))
+        sys.exit(1)
+    
+    before = os.path.getsize(Config.SESSIONS_FILE)
+    session_store.convert(codec)
+    after = os.path.getsize(Config.SESSIONS_FILE)
+    
+    print(colored(f"Sessions file converted to {format_name}: {before:,} -> {after:,} bytes", 'green'))
+    if format_name != Config.SESSIONS_FORMAT.lower():
+        print(colored(f"Set SESSIONS_FORMAT={format_name} to keep saving in this format", 'yellow'))
+
+
+def benchmark_store_codecs(sizes=(100, 10000, 100000), rounds=3):
+    """
+    Print load time, save time and file size of every available sessions format.
+    
+    Each format is read back with its own decoder, and the records have the stored
+    shape: a credential_id per record plus a credentials table, sealed when
+    SESSIONS_PASSPHRASE is set.
+    """
+    codecs = [
+        ('json indent=4', lambda data: json.dumps(data, indent=4).encode('utf-8'), json.loads),
+        ('json', StoreCodec('json').dumps, json.loads)
+    ]
+    for name, loads in (
+        ('orjson', lambda raw: orjson.loads(raw)),
+        ('msgpack', lambda raw: msgpack.unpackb(raw, raw=False, strict_map_key=False))
+    ):
+        try:
+            codecs.append((name, StoreCodec(name).dumps, loads))
+        except ValueError as e:
+            print(colored(f"Skipping {name}: {e}", 'yellow'))
+    
+    cipher = None
+    if Config.SESSIONS_PASSPHRASE:
+        salt = secrets.token_bytes(16)
+        cipher = RecordCipher(Config.SESSIONS_PASSPHRASE, salt)
+    
+    print(f"{'sessions':>9} {'format':<14} {'save ms':>9} {'load ms':>9} {'size KB':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'Sessions')
+        for size in sizes:
+            data = {
+                'next_id': size + 1,
+                'credentials': {
+                    f"cred_{number}": {"api_id": 20000000 + number, "api_hash": secrets.token_hex(16)}
+                    for number in range(1, 8)
+                },
+                'sessions': {
+                    f"session_{number}": {
+                        "id": number,
+                        "credential_id": f"cred_{number % 7 + 1}",
+                        "phone": f"+1555{number:07d}",
+                        "session": base64.urlsafe_b64encode(secrets.token_bytes(263)).decode(),
+                        "first_name": f"Account {number}",
+                        "username": f"user{number}",
+                        "account_id": str(5000000000 + number),
+                        "tags": ["warm", f"batch{number % 10}"]
+                    } for number in range(1, size + 1)
+                }
+            }
+            if cipher:
+                store = SessionStore(path=path)
+                store.cipher = cipher
+                store._encrypt_all(salt, data)
+            
+            for name, dumps, loads in codecs:
+                save_times, load_times = [], []
+                for _ in range(rounds):
+                    started = time.perf_counter()
+                    with open(path, 'wb') as file:
+                        file.write(dumps(data))
+                    save_times.append(time.perf_counter() - started)
+                    
+                    started = time.perf_counter()
+                    with open(path, 'rb') as file:
+                        loads(file.read())
+                    load_times.append(time.perf_counter() - started)
+                
+                print(
+                    f"{size:>9,} {name:<14} {min(save_times) * 1000:>9.1f} {min(load_times) * 1000:>9.1f} "
+                    f"{os.path.getsize(path) / 1024:>10,.1f}"
+                )
+
+
 def display_startup_banner():
     os.system('cls' if os.name == 'nt' else 'clear')
     
@@ -2642,6 +6559,10 @@ async def main():
             sessions = SessionManager.read_sessions()
             session_count = len(sessions.get('sessions', {}))
             logger.info(f"Found {session_count} existing sessions")
+        except ValueError as e:
+            # Encrypted store without the right passphrase; nothing would work
+            logger.critical(f"Could not open sessions: {e}")
+            raise
         except Exception as e:
             logger.warning(f"Could not read sessions: {e}")
             session_count = 0
@@ -2656,8 +6577,11 @@ async def main():
         print(colored(f"Current language: {Language.get_language()}", 'yellow'))
         print(colored("\nBot is now running! Press Ctrl+C to stop.", 'green', attrs=['bold']))
         
-        
-        await bot.polling(non_stop=True, timeout=60)
+        lag_monitor = asyncio.create_task(loop_lag_monitor.run(Config.LOOP_LAG_REPORT_INTERVAL))
+        try:
+            await bot.polling(non_stop=True, timeout=60)
+        finally:
+            lag_monitor.cancel()
     except Exception as e:
         logger.error(f"Error in main function: {e}")
         logger.error(traceback.format_exc())
@@ -2667,6 +6591,16 @@ async def main():
         await asyncio.sleep(1)
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ['--convert-sessions']:
+        convert_sessions_file(sys.argv[2] if len(sys.argv) > 2 else Config.SESSIONS_FORMAT)
+        sys.exit(0)
+    if sys.argv[1:2] == ['--benchmark-sessions']:
+        benchmark_store_codecs([int(size) for size in sys.argv[2:]] or (100, 10000, 100000))
+        sys.exit(0)
+    if sys.argv[1:2] == ['--benchmark-templates']:
+        MessageTemplate.benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
+        sys.exit(0)
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -2675,3 +6609,6 @@ if __name__ == "__main__":
         print(colored(f"\nFatal error: {e}", 'red', attrs=['bold']))
         logger.critical(f"Fatal error: {e}")
         logger.critical(traceback.format_exc())
+    finally:
+        # Changes are saved in the background; make sure the last ones reach the disk
+        session_store.flush()
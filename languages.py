@@ -81,8 +81,8 @@ class EnglishText:
         
         
         "message_username_prompt": "▓▒░ Please enter the username of the user you want to message ░▒▓",
-        "message_content_prompt": "▓▒░ Please enter the message content ░▒▓",
-        "join_channel_prompt": "▓▒░ Please enter the username of the channel you want to join ░▒▓",
+        "message_content_prompt": "▓▒░ Please enter the message content, or send a photo, video or file with the message as its caption. You can personalise it with {first_name}, {last_name}, {username}, {phone}, {account_id} of the sending account and {recipient} or any column of an uploaded recipient CSV; when you use them, write {{ and }} for literal braces ░▒▓",
+        "join_channel_prompt": "▓▒░ Please enter the username, link or invite link of the channel you want to join ░▒▓",
         "reaction_prompt": "▓▒░ Please enter the link to the message you want to react to ░▒▓",
         
         
@@ -137,6 +137,59 @@ class EnglishText:
         "back_button": "☜ BACK ☜",
         
         
+        "bulk_status_counts": "✓ Succeeded: {success} | ✗ Failed: {failed} | ⤼ Skipped: {skipped}",
+        "error_histogram_header": "📊 Errors by class:",
+        "bulk_report_caption": "📄 Per-account report for {action}",
+        
+        
+        "target_prompt": "▓▒░ Which accounts should do this? Send 'all', or filters such as tags:poolb ids:1-200 health:ok. Add 'force' to repeat it for accounts that already did it ░▒▓",
+        "invalid_selector": "✗ Invalid account selector: {error}",
+        "no_accounts_selected": "⚠ No accounts match this selector.",
+        "edit_tags": "🏷 Tags 🏷",
+        "edit_tags_prompt": "▓▒░ Current tags: {tags}\nPlease enter the new tags separated by commas (or 'none' to remove them) ░▒▓",
+        "tags_updated": "✓ Tags updated successfully! ✓",
+        
+        
+        "invalid_template": "✗ Invalid message template: {error}",
+        "media_download_failed": "✗ Could not use the attached file: {error}",
+        
+        
+        "session_sweep": "🛡 Session Sweep 🛡",
+        "sweep_mode_prompt": "▓▒░ The sweep lists the sessions of every account that were not created with your API IDs or device profile. What should happen to them? ░▒▓",
+        "sweep_report_only": "📄 Report only",
+        "sweep_terminate": "🚫 Terminate them",
+        "sweep_summary": "Foreign sessions found: {foreign}\nTerminated: {terminated}",
+        
+        
+        "bulk_2fa": "🔐 Bulk 2FA 🔐",
+        "bulk_2fa_prompt": "▓▒░ Send a CSV (text or file) with an account_id, session_id or phone column and current_password / new_password columns, or send 'generate' to give every account a new random password. Missing current passwords are taken from the vault and missing new ones are generated. All new passwords are saved to the encrypted vault (VAULT_PASSPHRASE) ░▒▓",
+        "no_matching_rows": "⚠ No rows matched a stored account:",
+        "unmatched_rows": "⚠ {count} rows did not match a stored account.",
+        "bulk_progress": "{title}: {done}/{total} done\n✓ {success}  ✗ {failed}",
+        
+        
+        "bulk_profile": "👤 Bulk Profile Edit 👤",
+        "bulk_profile_prompt": "▓▒░ Send a CSV (text or file) with an account_id, session_id or phone column and any of the first_name, last_name, bio and username columns (empty cells are left unchanged), or one template line per field for all accounts, e.g.\nbio: Admin of @{username}\nlast_name: {first_name}'s ░▒▓",
+        
+        
+        "import_sessions": "📥 Import Sessions 📥",
+        "import_directory_prompt": "▓▒░ Please enter the path of a directory on the bot's server with Telethon or Pyrogram .session files. Add ' verify' at the end to log in with the imported sessions and fill in their account details ░▒▓",
+        "import_credentials_prompt": "▓▒░ Please enter the default API ID and API hash separated by a space, used for files without a JSON file next to them, or '-' to use only those JSON files ░▒▓",
+        "import_status_counts": "↻ Updated: {updated} | ⧉ Duplicate files: {duplicate}",
+        
+        
+        "api_credentials": "🔑 API Credentials 🔑",
+        "credentials_usage_header": "▓▒░ API credentials and the accounts using them ░▒▓",
+        "credential_usage_line": "🔑 {credential_id} · API ID {api_id} · {count} accounts",
+        "more_accounts": "and {count} more",
+        "no_credentials": "No API credentials are stored yet.",
+        
+        
+        "bulk_outreach": "✉ Bulk Outreach ✉",
+        "outreach_recipients_prompt": "▓▒░ Please send the recipients (usernames, phone numbers, or IDs written as id:123456), one per line or comma separated, or upload them as a .txt/.csv file. A CSV with a 'recipient' header column is also accepted ░▒▓",
+        "no_recipients": "⚠ No recipients found. Please try again.",
+        
+        
         "language_changed": "Language changed to English!",
         
         
@@ -190,8 +243,8 @@ class PersianText:
         
         
         "message_username_prompt": "▓▒░ لطفاً نام کاربری شخصی که می‌خواهید به او پیام دهید را وارد کنید ░▒▓",
-        "message_content_prompt": "▓▒░ لطفاً محتوای پیام را وارد کنید ░▒▓",
-        "join_channel_prompt": "▓▒░ لطفاً نام کاربری کانالی که می‌خواهید به آن بپیوندید را وارد کنید ░▒▓",
+        "message_content_prompt": "▓▒░ لطفاً محتوای پیام را وارد کنید، یا یک عکس، ویدیو یا فایل را با متن پیام به عنوان کپشن ارسال کنید. می‌توانید آن را با {first_name}، {last_name}، {username}، {phone}، {account_id} حساب ارسال‌کننده و {recipient} یا هر ستون فایل CSV گیرندگان شخصی‌سازی کنید؛ در این صورت برای آکولاد معمولی {{ و }} بنویسید ░▒▓",
+        "join_channel_prompt": "▓▒░ لطفاً نام کاربری، لینک یا لینک دعوت کانالی که می‌خواهید به آن بپیوندید را وارد کنید ░▒▓",
         "reaction_prompt": "▓▒░ لطفاً لینک پیامی که می‌خواهید به آن واکنش دهید را وارد کنید ░▒▓",
         
         # Session management
@@ -246,6 +299,59 @@ class PersianText:
         "back_button": "☜ بازگشت ☜",
         
         
+        "bulk_status_counts": "✓ موفق: {success} | ✗ ناموفق: {failed} | ⤼ رد شده: {skipped}",
+        "error_histogram_header": "📊 خطاها بر اساس نوع:",
+        "bulk_report_caption": "📄 گزارش هر حساب برای {action}",
+        
+        
+        "target_prompt": "▓▒░ کدام حساب‌ها این کار را انجام دهند؟ 'all' یا فیلترهایی مانند tags:poolb ids:1-200 health:ok را ارسال کنید. برای تکرار برای حساب‌هایی که قبلاً انجام داده‌اند 'force' را اضافه کنید ░▒▓",
+        "invalid_selector": "✗ انتخابگر حساب نامعتبر است: {error}",
+        "no_accounts_selected": "⚠ هیچ حسابی با این انتخابگر مطابقت ندارد.",
+        "edit_tags": "🏷 برچسب‌ها 🏷",
+        "edit_tags_prompt": "▓▒░ برچسب‌های فعلی: {tags}\nلطفاً برچسب‌های جدید را با کاما جدا کنید (یا 'none' برای حذف) ░▒▓",
+        "tags_updated": "✓ برچسب‌ها با موفقیت به‌روزرسانی شدند! ✓",
+        
+        
+        "invalid_template": "✗ قالب پیام نامعتبر است: {error}",
+        "media_download_failed": "✗ استفاده از فایل پیوست ممکن نشد: {error}",
+        
+        
+        "session_sweep": "🛡 بررسی نشست‌ها 🛡",
+        "sweep_mode_prompt": "▓▒░ این بررسی نشست‌هایی از هر حساب را که با API ID یا مشخصات دستگاه شما ساخته نشده‌اند فهرست می‌کند. با آن‌ها چه شود؟ ░▒▓",
+        "sweep_report_only": "📄 فقط گزارش",
+        "sweep_terminate": "🚫 پایان دادن به آن‌ها",
+        "sweep_summary": "نشست‌های ناشناس یافت‌شده: {foreign}\nپایان داده‌شده: {terminated}",
+        
+        
+        "bulk_2fa": "🔐 تأیید دو مرحله‌ای گروهی 🔐",
+        "bulk_2fa_prompt": "▓▒░ یک فایل یا متن CSV با ستون account_id، session_id یا phone و ستون‌های current_password / new_password ارسال کنید، یا 'generate' را بفرستید تا برای هر حساب یک رمز تصادفی جدید ساخته شود. رمزهای فعلی ناموجود از گاوصندوق خوانده و رمزهای جدید ناموجود ساخته می‌شوند. همه رمزهای جدید در گاوصندوق رمزنگاری‌شده (VAULT_PASSPHRASE) ذخیره می‌شوند ░▒▓",
+        "no_matching_rows": "⚠ هیچ ردیفی با حساب‌های ذخیره‌شده مطابقت نداشت:",
+        "unmatched_rows": "⚠ {count} ردیف با هیچ حساب ذخیره‌شده‌ای مطابقت نداشت.",
+        "bulk_progress": "{title}: {done}/{total} انجام شد\n✓ {success}  ✗ {failed}",
+        
+        
+        "bulk_profile": "👤 ویرایش گروهی پروفایل 👤",
+        "bulk_profile_prompt": "▓▒░ یک فایل یا متن CSV با ستون account_id، session_id یا phone و هر یک از ستون‌های first_name، last_name، bio و username ارسال کنید (خانه‌های خالی تغییر نمی‌کنند)، یا برای همه حساب‌ها برای هر فیلد یک خط قالب بفرستید، مثلاً\nbio: Admin of @{username}\nlast_name: {first_name}'s ░▒▓",
+        
+        
+        "import_sessions": "📥 وارد کردن نشست‌ها 📥",
+        "import_directory_prompt": "▓▒░ لطفاً مسیر پوشه‌ای روی سرور ربات را که فایل‌های .session تلگرام (Telethon یا Pyrogram) دارد وارد کنید. برای ورود با نشست‌های وارد شده و تکمیل اطلاعات حساب‌ها، ' verify' را به انتها اضافه کنید ░▒▓",
+        "import_credentials_prompt": "▓▒░ لطفاً API ID و API hash پیش‌فرض را با یک فاصله وارد کنید (برای فایل‌هایی که فایل JSON کنارشان نیست)، یا '-' تا فقط از آن فایل‌های JSON استفاده شود ░▒▓",
+        "import_status_counts": "↻ به‌روزرسانی شده: {updated} | ⧉ فایل تکراری: {duplicate}",
+        
+        
+        "api_credentials": "🔑 اعتبارنامه‌های API 🔑",
+        "credentials_usage_header": "▓▒░ اعتبارنامه‌های API و حساب‌هایی که از آن‌ها استفاده می‌کنند ░▒▓",
+        "credential_usage_line": "🔑 {credential_id} · API ID {api_id} · {count} حساب",
+        "more_accounts": "و {count} حساب دیگر",
+        "no_credentials": "هنوز هیچ اعتبارنامه API ذخیره نشده است.",
+        
+        
+        "bulk_outreach": "✉ ارسال گروهی به فهرست ✉",
+        "outreach_recipients_prompt": "▓▒░ لطفاً گیرندگان (نام کاربری، شماره تلفن یا شناسه به شکل id:123456) را هر کدام در یک خط یا جدا شده با کاما ارسال کنید، یا آن‌ها را به صورت فایل .txt/.csv بارگذاری کنید. فایل CSV با ستون 'recipient' نیز پذیرفته می‌شود ░▒▓",
+        "no_recipients": "⚠ هیچ گیرنده‌ای یافت نشد. لطفاً دوباره تلاش کنید.",
+        
+        
         "language_changed": "زبان به فارسی تغییر کرد!",
         
         
@@ -0,0 +1,47 @@
+import importlib.util
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def load_bot_module():
+    """Import VX-acc.py (not importable by name) with its data and log files in a temp directory."""
+
+    if 'vx_acc' in sys.modules:
+        return sys.modules['vx_acc']
+    
+    directory = tempfile.mkdtemp(prefix='vx-acc-tests-')
+    os.environ['DATA_DIR'] = os.path.join(directory, 'data')
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        spec = importlib.util.spec_from_file_location('vx_acc', os.path.join(ROOT, 'VX-acc.py'))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['vx_acc'] = module
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    return module
+
+
+@pytest.fixture(scope='session')
+def vx():
+    return load_bot_module()
+
+
+@pytest.fixture
+def store(vx, monkeypatch, tmp_path):
+    """Give the bot a fresh cleartext session store in a temp file."""
+
+    path = tmp_path / 'Sessions.json'
+    path.write_text('{"sessions": {}}', encoding='utf-8')
+    monkeypatch.setattr(vx.Config, 'SESSIONS_PASSPHRASE', '')
+    session_store = vx.SessionStore(path=str(path), codec=vx.StoreCodec('json'))
+    monkeypatch.setattr(vx, 'session_store', session_store)
+    yield session_store
+    session_store.flush()
@@ -0,0 +1,14 @@
+import importlib
+
+
+def test_tgliszt_telegram_imports_from_repo_root():
+    telegram = importlib.import_module('TgLiszt.telegram')
+    datacenters = importlib.import_module('TgLiszt.datacenters')
+
+    assert telegram.SessionConverter.DC_ADDRESSES == datacenters.PRODUCTION_DC_ADDRESSES
+
+
+def test_bot_shares_the_tgliszt_dc_table(vx):
+    datacenters = importlib.import_module('TgLiszt.datacenters')
+
+    assert vx.SessionFileParser.DC_ADDRESSES is datacenters.PRODUCTION_DC_ADDRESSES
@@ -0,0 +1,48 @@
+import asyncio
+import concurrent.futures
+import os
+
+import pytest
+
+
+@pytest.fixture
+def import_files(vx, store, monkeypatch, tmp_path):
+    """Import fake .session files, given as file name -> (session string, account_id, phone)."""
+
+    def run(files):
+        directory = tmp_path / f"import{len(list(tmp_path.iterdir()))}"
+        directory.mkdir()
+        for name in files:
+            (directory / name).write_bytes(b'')
+        
+        def parse(path):
+            session, account_id, phone = files[os.path.basename(path)]
+            return {'session': session, 'account_id': account_id, 'phone': phone, 'api_id': 1, 'api_hash': 'hash'}
+        
+        monkeypatch.setattr(vx.SessionFileParser, 'parse', staticmethod(parse))
+        monkeypatch.setattr(vx, 'ProcessPoolExecutor', concurrent.futures.ThreadPoolExecutor)
+        report, _ = asyncio.run(vx.AccountManager.import_session_files(str(directory)))
+        return report
+    
+    return run
+
+
+def test_two_files_of_one_account_import_once(vx, store, import_files):
+    report = import_files({
+        'a.session': ('1first', '42', '+1555'),
+        'b.session': ('1second', '42', '+1555'),
+        'c.session': ('1other', '43', None)
+    })
+
+    assert report.status_counts == {'success': 2, 'duplicate': 1}
+    assert len(store.load()['sessions']) == 2
+
+
+def test_file_of_a_stored_account_is_reported_updated(vx, store, import_files):
+    import_files({'a.session': ('1first', '42', None)})
+
+    report = import_files({'b.session': ('1second', '42', None), 'c.session': ('1first', '42', None)})
+
+    assert report.status_counts == {'updated': 1, 'skipped': 1}
+    session_id = store.find_account('42')
+    assert store.load()['sessions'][session_id]['session'] == '1second'
@@ -0,0 +1,103 @@
+import pytest
+
+
+@pytest.fixture(scope='module')
+def parser(vx):
+    return vx.LinkParser
+
+
+@pytest.mark.parametrize('link, expected', [
+    ('https://t.me/durov/42', ('public', 'durov', 42, None, None)),
+    ('t.me/durov/42', ('public', 'durov', 42, None, None)),
+    ('https://telegram.me/durov/42/', ('public', 'durov', 42, None, None)),
+    ('https://www.t.me/s/durov/42', ('public', 'durov', 42, None, None)),
+    ('https://t.me/durov/42?single', ('public', 'durov', 42, None, None)),
+    ('https://t.me/durov/42#anchor', ('public', 'durov', 42, None, None)),
+    ('  https://t.me/durov/42  ', ('public', 'durov', 42, None, None)),
+])
+def test_public_links(parser, link, expected):
+    assert tuple(parser.parse_message(link)) == expected
+
+
+@pytest.mark.parametrize('link, expected', [
+    ('https://t.me/c/1234567890/15', ('private', 1234567890, 15, None, None)),
+    ('https://t.me/c/1234567890/15/', ('private', 1234567890, 15, None, None)),
+    ('tg://privatepost?channel=1234567890&post=15', ('private', 1234567890, 15, None, None)),
+])
+def test_private_links(parser, link, expected):
+    assert tuple(parser.parse_message(link)) == expected
+
+
+@pytest.mark.parametrize('link, expected', [
+    ('https://t.me/forum_chat/7/101', ('public', 'forum_chat', 101, 7, None)),
+    ('https://t.me/c/1234567890/7/101', ('private', 1234567890, 101, 7, None)),
+    ('https://t.me/forum_chat/101?thread=7', ('public', 'forum_chat', 101, 7, None)),
+    ('tg://resolve?domain=forum_chat&post=101&thread=7', ('public', 'forum_chat', 101, 7, None)),
+])
+def test_topic_links(parser, link, expected):
+    assert tuple(parser.parse_message(link)) == expected
+
+
+@pytest.mark.parametrize('link, expected', [
+    ('https://t.me/channel_name/42?comment=1001', ('public', 'channel_name', 42, None, 1001)),
+    ('https://t.me/c/1234567890/42?comment=1001', ('private', 1234567890, 42, None, 1001)),
+    ('tg://resolve?domain=channel_name&post=42&comment=1001', ('public', 'channel_name', 42, None, 1001)),
+])
+def test_comment_links(parser, link, expected):
+    assert tuple(parser.parse_message(link)) == expected
+
+
+def test_target_key_normalizes_username_case(parser):
+    assert parser.parse_message('https://t.me/DuRov/42').key() == parser.parse_message('t.me/durov/42').key()
+    assert parser.parse_message('https://t.me/c/99/42?comment=5').key() == 'private:99/42?comment=5'
+
+
+@pytest.mark.parametrize('link', [
+    '',
+    None,
+    'hello',
+    'https://t.me/durov',
+    'https://t.me/durov/abc',
+    'https://t.me/c/abc/42',
+    'https://t.me/abc/42',
+    'https://example.com/durov/42',
+    'https://t.me/durov/42?comment=abc',
+    'https://t.me/+AbCdEf123',
+    'tg://resolve?domain=durov',
+    'tg://privatepost?channel=123',
+])
+def test_invalid_message_links(parser, link):
+    with pytest.raises(ValueError):
+        parser.parse_message(link)
+
+
+@pytest.mark.parametrize('link, expected', [
+    ('https://t.me/+AbCdEf_12-3', 'AbCdEf_12-3'),
+    ('t.me/+AbCdEf123/', 'AbCdEf123'),
+    ('https://t.me/joinchat/AbCdEf123', 'AbCdEf123'),
+    ('https://telegram.me/joinchat/AbCdEf123', 'AbCdEf123'),
+    ('tg://join?invite=AbCdEf123', 'AbCdEf123'),
+])
+def test_invite_links(parser, link, expected):
+    assert parser.parse_invite_hash(link) == expected
+
+
+@pytest.mark.parametrize('link', ['', None, 'https://t.me/durov', 'https://t.me/durov/42', 'https://t.me/+', 'AbCdEf123'])
+def test_non_invite_links(parser, link):
+    assert parser.parse_invite_hash(link) is None
+
+
+@pytest.mark.parametrize('link, expected', [
+    ('@durov', 'durov'),
+    ('durov', 'durov'),
+    ('https://t.me/durov', 'durov'),
+    ('t.me/durov/', 'durov'),
+])
+def test_usernames(parser, link, expected):
+    assert parser.parse_username(link) == expected
+
+
+@pytest.mark.parametrize('link', ['', None, '@abc', '@1durov', 'https://t.me/+AbCdEf123', 'https://t.me/durov/42'])
+def test_invalid_usernames(parser, link):
+    with pytest.raises(ValueError):
+        parser.parse_username(link)
@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from telethon import functions, types
+from telethon.errors import ChannelInvalidError
+
+
+def channel(channel_id, **kwargs):
+    return types.Channel(
+        id=channel_id, title=f"chat {channel_id}", photo=types.ChatPhotoEmpty(), date=None,
+        access_hash=channel_id * 10, **kwargs
+    )
+
+
+class FakeClient:
+    """Answers the requests resolve_message_target makes, and counts dialog walks."""
+
+    def __init__(self, channels=(), dialogs=(), discussion=None):
+        self.channels = channels
+        self.dialogs = dialogs
+        self.discussion = discussion
+        self.dialog_walks = 0
+    
+    async def __call__(self, request):
+        if isinstance(request, functions.channels.GetChannelsRequest):
+            if isinstance(self.channels, Exception):
+                raise self.channels
+            return SimpleNamespace(chats=list(self.channels))
+        if isinstance(request, functions.messages.GetDiscussionMessageRequest):
+            return self.discussion
+        raise AssertionError(f"Unexpected request {request}")
+    
+    async def get_input_entity(self, entity):
+        return types.InputPeerChannel(entity.id, entity.access_hash)
+    
+    async def iter_dialogs(self):
+        self.dialog_walks += 1
+        for entity in self.dialogs:
+            yield SimpleNamespace(entity=entity)
+
+
+@pytest.fixture(scope='module')
+def resolve(vx):
+    return lambda client, link: asyncio.run(
+        vx.AccountManager.resolve_message_target(client, vx.LinkParser.parse_message(link))
+    )
+
+
+def test_private_channel_is_fetched_by_id_without_walking_dialogs(resolve):
+    client = FakeClient(channels=[channel(1234567890)])
+
+    peer, message_id = resolve(client, 'https://t.me/c/1234567890/15')
+
+    assert peer == types.InputPeerChannel(1234567890, 12345678900)
+    assert message_id == 15
+    assert client.dialog_walks == 0
+
+
+def test_private_channel_falls_back_to_dialogs(resolve):
+    client = FakeClient(channels=ChannelInvalidError(None), dialogs=[channel(7), channel(1234567890)])
+
+    peer, _ = resolve(client, 'https://t.me/c/1234567890/15')
+
+    assert peer.channel_id == 1234567890
+    assert client.dialog_walks == 1
+
+
+def test_private_channel_not_joined(resolve):
+    client = FakeClient(channels=[types.ChannelForbidden(id=1234567890, access_hash=1, title='x')])
+
+    with pytest.raises(ValueError, match='not a member'):
+        resolve(client, 'https://t.me/c/1234567890/15')
+    assert client.dialog_walks == 0
+
+
+def test_comment_goes_to_the_discussion_group_whatever_the_chat_order(resolve):
+    post = types.Message(id=42, peer_id=types.PeerChannel(555), date=None, message='')
+    discussion = SimpleNamespace(messages=[post], chats=[channel(1234567890), channel(555, megagroup=True)])
+    client = FakeClient(channels=[channel(1234567890)], discussion=discussion)
+
+    peer, message_id = resolve(client, 'https://t.me/c/1234567890/15?comment=99')
+
+    assert peer.channel_id == 555
+    assert message_id == 99
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+
+class FakeClient:
+    async def disconnect(self):
+        pass
+
+
+@pytest.fixture
+def outreach(vx, monkeypatch, tmp_path):
+    sent = []
+    sessions = {f"session_{number}": {'id': number, 'account_id': str(number)} for number in range(1, 4)}
+
+    async def connect_session(session_data, tracker=None):
+        return FakeClient()
+    
+    async def send_content(client, session_id, peer, text, media, upload_semaphore, tracker):
+        sent.append((session_id, peer, time.monotonic()))
+    
+    monkeypatch.setattr(vx.SessionManager, 'select_sessions', lambda selector=None: sessions)
+    monkeypatch.setattr(vx.SessionManager, 'update_sessions', lambda updates: None)
+    monkeypatch.setattr(vx.AccountManager, 'connect_session', connect_session)
+    monkeypatch.setattr(vx.AccountManager, '_send_content', send_content)
+    monkeypatch.setattr(vx, 'action_ledger', vx.ActionLedger(path=str(tmp_path / 'Ledger.json'), ttl=0))
+    monkeypatch.setattr(vx.Config, 'OUTREACH_QUOTA', 2)
+    monkeypatch.setattr(vx.Config, 'OUTREACH_INTERVAL', 0.3)
+    monkeypatch.setattr(vx.Config, 'BULK_CONCURRENCY', 1)
+    
+    def run(text):
+        recipients = vx.AccountManager.parse_recipients(text)
+        return asyncio.run(vx.AccountManager.send_message_to_recipients(recipients, 'Hello'))
+    
+    return run, sent
+
+
+def test_pacing_does_not_hold_a_concurrency_slot(outreach):
+    run, sent = outreach
+    started = time.monotonic()
+
+    report = run('\n'.join(f"user{number}" for number in range(6)))
+
+    assert report.success_count == 6
+    # Three accounts each wait one interval between their two sends; holding
+    # the single slot through the waits would serialize them into three
+    assert time.monotonic() - started < 0.6
+
+
+def test_recipient_written_two_ways_is_messaged_once(outreach):
+    run, sent = outreach
+
+    run('+1 555 0100 200')
+    report = run('+15550100200')
+
+    assert [peer for _, peer, _ in sent] == ['+15550100200']
+    assert report.status_counts['skipped'] == 1
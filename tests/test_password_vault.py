@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+
+class FakeClient:
+    """Accepts a 2FA change only with the account's real password."""
+
+    def __init__(self, vx, password, error=None):
+        self.vx = vx
+        self.password = password
+        self.error = error
+        self.calls = []
+    
+    async def edit_2fa(self, current_password, new_password):
+        self.calls.append((current_password, new_password))
+        if self.error:
+            raise self.error
+        if current_password != self.password:
+            raise self.vx.PasswordHashInvalidError(None)
+        self.password = new_password
+    
+    async def disconnect(self):
+        pass
+
+
+@pytest.fixture
+def vault_env(vx, monkeypatch, tmp_path):
+    monkeypatch.setattr(vx.Config, 'VAULT_PASSPHRASE', 'vault passphrase')
+    monkeypatch.setattr(vx.Config, 'VAULT_FILE', str(tmp_path / 'Vault.json'))
+    monkeypatch.setattr(vx.PasswordVault, '_shared', None)
+    monkeypatch.setattr(vx.SessionManager, 'select_sessions', lambda selector=None: {'session_1': {'account_id': '42'}})
+    return vx
+
+
+def rotate(vx, monkeypatch, client, passwords=None):
+    async def run_bulk_action(action, function, sessions, progress=None):
+        try:
+            await function(client, 'session_1', {'attempts': 0})
+        except Exception as e:
+            return e
+    
+    monkeypatch.setattr(vx.AccountManager, 'run_bulk_action', run_bulk_action)
+    return asyncio.run(vx.AccountManager.rotate_2fa(passwords))
+
+
+def reopened(vx):
+    return vx.PasswordVault()
+
+
+def test_rotation_stores_the_new_password(vault_env, monkeypatch):
+    vx = vault_env
+    client = FakeClient(vx, 'old')
+
+    assert rotate(vx, monkeypatch, client, {'session_1': ('old', 'new')}) is None
+    assert reopened(vx).get('42') == 'new'
+    assert reopened(vx).get_pending('42') is None
+
+
+def test_rotation_recovers_an_unconfirmed_change(vault_env, monkeypatch):
+    vx = vault_env
+    vault = asyncio.run(vx.PasswordVault.open_shared())
+    vault.store('42', 'old')
+    vault.save()
+    client = FakeClient(vx, 'old', error=ConnectionError('lost'))
+    rotate(vx, monkeypatch, client, {'session_1': (None, 'applied')})
+    assert reopened(vx).get('42') == 'old'
+    assert reopened(vx).get_pending('42') == 'applied'
+
+    # The change went through even though the confirmation was lost
+    client = FakeClient(vx, 'applied')
+    assert rotate(vx, monkeypatch, client) is None
+
+    vault = reopened(vx)
+    assert client.calls[0][0] == 'old'
+    assert client.calls[1][0] == 'applied'
+    assert vault.get('42') == client.password
+    assert vault.get_pending('42') is None
+
+
+def test_rejected_pending_password_is_dropped(vault_env, monkeypatch):
+    vx = vault_env
+    vault = asyncio.run(vx.PasswordVault.open_shared())
+    vault.store('42', 'old')
+    vault.set_pending('42', 'stale')
+    vault.save()
+
+    error = rotate(vx, monkeypatch, FakeClient(vx, 'other'))
+
+    assert isinstance(error, vx.PasswordHashInvalidError)
+    assert reopened(vx).get('42') == 'old'
+    assert reopened(vx).get_pending('42') is None
+
+
+def test_single_account_change_updates_the_vault(vault_env, monkeypatch):
+    vx = vault_env
+    client = FakeClient(vx, 'old')
+
+    async def get_client_for_session(session_id):
+        return True, client
+    
+    monkeypatch.setattr(vx.AccountManager, 'get_client_for_session', get_client_for_session)
+    monkeypatch.setattr(vx.SessionManager, 'read_sessions', lambda: {'sessions': {'session_1': {'account_id': '42'}}})
+
+    assert asyncio.run(vx.AccountManager.update_2fa('session_1', 'old', 'manual')) == (True, "2FA updated successfully")
+    assert reopened(vx).get('42') == 'manual'
@@ -0,0 +1,68 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from telethon import functions, types
+
+
+class FakeClient:
+    def __init__(self, available):
+        self.available = available
+    
+    async def __call__(self, request):
+        assert isinstance(request, functions.channels.GetFullChannelRequest)
+        return SimpleNamespace(full_chat=SimpleNamespace(available_reactions=self.available))
+    
+    async def get_input_entity(self, username):
+        return types.InputPeerChannel(1, 2)
+    
+    async def disconnect(self):
+        pass
+
+
+@pytest.fixture
+def react(vx, monkeypatch):
+    calls = {'connects': 0, 'bulk': 0}
+    sessions = {f"session_{number}": {'id': number} for number in range(1, 6)}
+
+    def run(available):
+        async def connect_session(session_data, tracker=None):
+            calls['connects'] += 1
+            return FakeClient(available)
+        
+        async def run_bulk_action(action, function, sessions, **kwargs):
+            calls['bulk'] += 1
+        
+        monkeypatch.setattr(vx.SessionManager, 'select_sessions', lambda selector=None: sessions)
+        monkeypatch.setattr(vx.AccountManager, 'connect_session', connect_session)
+        monkeypatch.setattr(vx.AccountManager, 'run_bulk_action', run_bulk_action)
+        return asyncio.run(vx.AccountManager.send_reaction_with_all_accounts('https://t.me/durov/42'))
+    
+    return run, calls
+
+
+def test_run_aborts_once_when_no_reaction_is_allowed(react):
+    run, calls = react
+
+    with pytest.raises(ValueError, match='None of the configured reactions'):
+        run(types.ChatReactionsNone())
+    assert calls == {'connects': 1, 'bulk': 0}
+
+
+@pytest.mark.parametrize('available', [types.ChatReactionsAll(), None])
+def test_run_goes_ahead_when_reactions_are_allowed_or_unknown(react, available):
+    run, calls = react
+
+    run(available)
+
+    assert calls == {'connects': 1, 'bulk': 1}
+
+
+def test_allowed_reactions_keep_the_chat_spelling(vx):
+    available = types.ChatReactionsSome([types.ReactionEmoji('❤'), types.ReactionEmoji('👍')])
+
+    allowed = asyncio.run(vx.AccountManager.get_allowed_reactions(
+        FakeClient(available), types.InputPeerChannel(1, 2), ['❤️', '🔥', '👍']
+    ))
+
+    assert allowed == ['❤', '👍']
@@ -0,0 +1,44 @@
+import csv
+import os
+
+import pytest
+from telethon.crypto import AuthKey
+from telethon.sessions import SQLiteSession
+
+from TgLiszt.telegram import SessionConverter
+
+
+def write_telethon_session(path):
+    session = SQLiteSession(path)
+    session.set_dc(2, '149.154.167.51', 443)
+    session.auth_key = AuthKey(os.urandom(256))
+    session.save()
+    session.close()
+
+
+def test_string_sessions_csv_survives_commas_and_quotes(tmp_path):
+    sources = tmp_path / 'sessions'
+    sources.mkdir()
+    for name in ('plain', 'with, comma', 'with "quote"'):
+        write_telethon_session(str(sources / name))
+    output = tmp_path / 'converted'
+
+    with pytest.raises(SystemExit) as exit_info:
+        SessionConverter.convert(str(sources), 'telethon-string', str(output))
+    
+    assert exit_info.value.code == 0
+    with open(output / 'sessions_telethon-string.csv', encoding='utf-8', newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert sorted(row['source'] for row in rows) == sorted(str(path) for path in sources.iterdir())
+    assert all(SessionConverter.read(row['session']).dc_id == 2 for row in rows)
+
+
+def test_convert_passes_the_api_id_on(tmp_path):
+    write_telethon_session(str(tmp_path / 'account'))
+
+    with pytest.raises(SystemExit):
+        SessionConverter.convert(str(tmp_path / 'account.session'), 'pyrogram-string', str(tmp_path / 'out'), '12345')
+    
+    with open(tmp_path / 'out' / 'sessions_pyrogram-string.csv', encoding='utf-8', newline='') as file:
+        row = next(csv.DictReader(file))
+    assert SessionConverter.read(row['session']).api_id == 12345
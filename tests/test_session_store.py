@@ -0,0 +1,223 @@
+import copy
+import json
+
+import pytest
+
+
+@pytest.fixture
+def open_store(vx, monkeypatch, tmp_path):
+    """Write sessions data to a temp file and open a store over it, cleartext unless a passphrase is given."""
+
+    stores = []
+
+    def open_store(data, passphrase=''):
+        monkeypatch.setattr(vx.Config, 'SESSIONS_PASSPHRASE', passphrase)
+        path = tmp_path / 'Sessions.json'
+        if data is not None:
+            path.write_text(json.dumps(data), encoding='utf-8')
+        stores.append(vx.SessionStore(path=str(path), codec=vx.StoreCodec('json')))
+        return stores[-1]
+    
+    yield open_store
+    for store in stores:
+        store.flush()
+
+
+@pytest.mark.parametrize('sessions, next_id', [
+    ({}, 1),
+    ({'session_3': {'id': 3}, 'session_7': {'id': 7}}, 8),
+    ({'my_acc_5': {}}, 6),
+    ({'session_2': {'id': 'abc'}, 'imported': {'id': None}}, 3),
+    ({'session_x': {'id': '12'}}, 13),
+])
+def test_counter_starts_after_every_numbered_session(open_store, sessions, next_id):
+    assert open_store({'sessions': sessions}).load()['next_id'] == next_id
+
+
+def test_incomplete_credential_is_kept_without_rewriting_the_file(open_store):
+    data = {'next_id': 3, 'sessions': {
+        'session_1': {'id': 1, 'session': '1a', 'api_id': 7},
+        'session_2': {'id': 2, 'session': '1b', 'api_hash': 'hash'}
+    }}
+    store = open_store(data)
+
+    assert store.load()['sessions'] == data['sessions']
+    store.flush()
+    assert store.write_count == 0
+
+
+def add_account(vx, number, phone=None, api_id=1, api_hash='hash'):
+    return vx.SessionManager.add_session(
+        api_id, api_hash, phone or f"+1555000{number:04d}", f"1session{number}", f"Account {number}", str(number), ''
+    )
+
+
+def test_failed_change_leaves_the_store_as_it_was(vx, store):
+    session_id = add_account(vx, 1)
+    before = copy.deepcopy(store.load())
+
+    def change(data):
+        store.update_record(data, session_id, {'first_name': 'Changed'}, drop=('username',))
+        store.put_record(data, 'session_9', {'id': 9, 'account_id': '99'})
+        store.allocate_id(data)
+        raise RuntimeError('change failed')
+    
+    with pytest.raises(RuntimeError):
+        store.mutate(change)
+    
+    assert store.load() == before
+    assert store.find_account('1') == session_id
+    assert store.find_account('99') is None
+
+
+def test_write_sessions_accepts_the_live_data(vx, store):
+    add_account(vx, 1)
+    add_account(vx, 2)
+
+    vx.SessionManager.write_sessions(vx.SessionManager.read_sessions())
+
+    assert sorted(store.load()['sessions']) == ['session_1', 'session_2']
+
+
+SAMPLE = {'next_id': 3, 'sessions': {
+    'session_1': {'id': 1, 'session': '1abc', 'first_name': 'Ünïcode ✓', 'tags': ['warm']},
+    'session_2': {'id': 2, 'session': '1def', 'first_name': None, 'tags': []}
+}}
+
+
+@pytest.mark.parametrize('name', ['json', 'orjson', 'msgpack'])
+def test_codec_round_trip(vx, name):
+    try:
+        codec = vx.StoreCodec(name)
+    except ValueError:
+        pytest.skip(f"{name} is not installed")
+    
+    raw = codec.dumps(SAMPLE)
+
+    assert vx.StoreCodec.detect(raw) == ('msgpack' if name == 'msgpack' else 'json')
+    assert vx.StoreCodec.loads(raw) == SAMPLE
+
+
+def test_store_reads_any_format_and_saves_in_its_own(vx, open_store, tmp_path):
+    pytest.importorskip('msgpack')
+    path = tmp_path / 'Sessions.json'
+    store = open_store(None)
+    path.write_bytes(vx.StoreCodec('msgpack').dumps(SAMPLE))
+    
+    store.convert(vx.StoreCodec('json'))
+    store.flush()
+
+    assert path.read_bytes().startswith(b'{')
+    assert vx.StoreCodec.loads(path.read_bytes())['sessions'] == SAMPLE['sessions']
+
+
+LEGACY = {'sessions': {
+    'session_1': {'id': 1, 'session': '1first', 'api_id': 11, 'api_hash': 'hash-a', 'account_id': '101'},
+    'session_4': {'id': 4, 'session': '1second', 'api_id': '11', 'api_hash': 'hash-a', 'account_id': '104'},
+    'extra': {'session': '1third', 'api_id': 12, 'api_hash': 'hash-b', 'account_id': '105'}
+}}
+
+
+def test_legacy_cleartext_file_is_migrated(vx, open_store, tmp_path):
+    store = open_store(LEGACY, passphrase='store passphrase')
+    store.load()
+    store.flush()
+
+    saved = json.loads((tmp_path / 'Sessions.json').read_text(encoding='utf-8'))
+    records = saved['sessions']
+    assert saved['next_id'] == 6
+    assert records['extra']['id'] == 5
+    assert saved['encryption']['binding'] == 'record'
+    assert len(saved['credentials']) == 2
+    assert records['session_1']['credential_id'] == records['session_4']['credential_id']
+    assert all('api_id' not in record and 'api_hash' not in record for record in records.values())
+    assert all(vx.RecordCipher.is_sealed(record['session']) for record in records.values())
+    assert all(vx.RecordCipher.is_sealed(credential['api_hash']) for credential in saved['credentials'].values())
+    
+    reopened = open_store(None, passphrase='store passphrase')
+    sessions = reopened.load()['sessions']
+    assert reopened.reveal('session', sessions['extra']['session'], sessions['extra']['id']) == '1third'
+    assert sorted(reopened.credentials().values()) == [(11, 'hash-a'), (12, 'hash-b')]
+    assert vx.SessionStore.session_digest('1first') in reopened.session_digests()
+
+
+def test_field_bound_file_is_rebound_to_records(vx, open_store):
+    store = open_store(LEGACY, passphrase='store passphrase')
+    data = store.load()
+    cipher = store.cipher
+    # Seal the way files were written before values were bound to their record
+    for session_id, record in data['sessions'].items():
+        data['sessions'][session_id] = {
+            **record, 'session': cipher.seal('session', store.reveal('session', record['session'], record['id']))
+        }
+    for credential_id, credential in data['credentials'].items():
+        data['credentials'][credential_id] = {
+            **credential, 'api_hash': cipher.seal('api_hash', store.reveal('api_hash', credential['api_hash'], credential_id))
+        }
+    data['encryption'].pop('binding')
+    store.mutate(lambda data: None)
+    store.flush()
+    
+    reopened = open_store(None, passphrase='store passphrase')
+    record = reopened.load()['sessions']['session_4']
+    assert reopened.load()['encryption']['binding'] == 'record'
+    assert reopened.reveal('session', record['session'], record['id']) == '1second'
+    assert sorted(reopened.credentials().values()) == [(11, 'hash-a'), (12, 'hash-b')]
+    with pytest.raises(ValueError):
+        reopened.reveal('session', record['session'])
+
+
+def test_sealed_value_does_not_open_in_another_record_or_field(vx):
+    cipher = vx.RecordCipher('store passphrase', b'0' * 16)
+    sealed = cipher.seal('session', '1secret', 1)
+
+    assert cipher.open('session', sealed, 1) == '1secret'
+    with pytest.raises(ValueError):
+        cipher.open('session', sealed, 2)
+    with pytest.raises(ValueError):
+        cipher.open('api_hash', sealed, 1)
+    with pytest.raises(ValueError):
+        vx.RecordCipher('other passphrase', b'0' * 16).open('session', sealed, 1)
+
+
+def test_accounts_share_one_credential_per_api_pair(vx, store):
+    first = add_account(vx, 1, api_id=11, api_hash='hash-a')
+    second = add_account(vx, 2, api_id='11', api_hash='hash-a')
+    third = add_account(vx, 3, api_id=12, api_hash='hash-b')
+
+    sessions = store.load()['sessions']
+    assert sessions[first]['credential_id'] == sessions[second]['credential_id'] != sessions[third]['credential_id']
+    assert vx.SessionManager.credentials_for(sessions[second]) == (11, 'hash-a')
+    assert all('api_id' not in record and 'api_hash' not in record for record in sessions.values())
+
+
+def test_deleted_session_numbers_are_never_reused(vx, store):
+    first = add_account(vx, 1)
+    second = add_account(vx, 2)
+    vx.SessionManager.delete_session(second)
+    vx.SessionManager.delete_session(first)
+
+    third = add_account(vx, 3)
+
+    assert (first, second, third) == ('session_1', 'session_2', 'session_3')
+    assert store.load()['sessions'][third]['id'] == 3
+
+
+def test_find_account_by_account_id_or_phone(vx, store):
+    session_id = add_account(vx, 1, phone='+1 (555) 000-0001')
+
+    assert store.find_account('1') == session_id
+    assert store.find_account(1) == session_id
+    assert store.find_account(None, '15550000001') == session_id
+    assert store.find_account('2', '+15550000001') is None
+    assert store.find_account('2') is None
+
+
+def test_adding_a_stored_account_updates_it(vx, store):
+    session_id = add_account(vx, 1)
+
+    assert add_account(vx, 1) == session_id
+    vx.SessionManager.update_sessions({session_id: {'phone': '+15559990000'}})
+    assert store.find_account(None, '+15559990000') == session_id
+    assert store.find_account(None, '+15550000001') is None
+    assert len(store.load()['sessions']) == 1